@@ -0,0 +1,260 @@
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import (FIRST_COMPLETED, ThreadPoolExecutor,
+                                as_completed, wait)
+from functools import lru_cache, partial
+
+from breaker import BREAKERS
+from deadlines import REQUEST_TIMEOUT
+from metrics import (EXPORTED_QUANTILES, REGISTRY, Counter, Gauge,
+                     SlidingQuantiles)
+from settings import getenv
+
+POOL_CONNECTIONS = int(getenv('POOL_CONNECTIONS', 10))
+POOL_MAXSIZE = int(getenv('POOL_MAXSIZE', 10))
+POOL_BLOCK = getenv('POOL_BLOCK', '') == '1'
+HEDGE_REQUESTS = getenv('HEDGE_REQUESTS', '') == '1'
+HEDGE_QUANTILE = float(getenv('HEDGE_QUANTILE', 0.95))
+HEDGE_MIN_SAMPLES = int(getenv('HEDGE_MIN_SAMPLES', 20))
+HEDGE_WORKERS = int(getenv('HEDGE_WORKERS', 16))
+CURRENT_DATE_PATTERN = re.compile(rb'"current_date"\s*:\s*\d+')
+
+REQUEST_QUANTILES = REGISTRY.register(Gauge(
+    'homework_request_latency_quantile_seconds',
+    'Квантили длительности запросов к API по последним ответам',
+    ['quantile']))
+HEDGED_REQUESTS = REGISTRY.register(Counter(
+    'homework_hedged_requests_total',
+    'Повторные запросы к медленно отвечающему API по победившей попытке',
+    ['winner']))
+
+
+def fingerprint(content):
+    """Отпечаток тела ответа без меняющегося при каждом опросе current_date."""
+    return hashlib.blake2b(
+        CURRENT_DATE_PATTERN.sub(b'', content), digest_size=16).digest()
+
+
+def close_response(future):
+    """Закрытие ответа попытки, проигравшей гонку."""
+    if not future.cancelled() and future.exception() is None:
+        close = getattr(future.result(), 'close', None)
+        if close is not None:
+            close()
+
+
+class PracticumClient:
+    """Клиент API Практикума с пулом постоянных соединений."""
+
+    def __init__(self, session=None, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK,
+                 breakers=BREAKERS, timeout=REQUEST_TIMEOUT,
+                 hedge=HEDGE_REQUESTS, hedge_quantile=HEDGE_QUANTILE,
+                 hedge_min_samples=HEDGE_MIN_SAMPLES):
+        """Сессия с пулом: pool_maxsize — предел соединений к хосту.
+
+        breakers — автоматы защиты по хостам, общие для всех подписок;
+        timeout — тайм-ауты (соединение, чтение) одного запроса. С hedge
+        запрос, не получивший ответа за квантиль hedge_quantile недавних
+        длительностей, дублируется, и берётся ответ, пришедший первым.
+        """
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block,
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        self.breakers = breakers
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = SlidingQuantiles()
+        self.executor = None
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.short_circuited = 0
+        self.validators = {}
+        self.unsettled = {}
+
+    def get(self, deadline=None, **request_parameters):
+        """GET-запрос через общий пул соединений и автомат хоста.
+
+        Тайм-ауты запроса урезаются до остатка бюджета deadline. Сетевые
+        ошибки, тайм-ауты и ответы 5xx считаются сбоями хоста.
+        """
+        breaker = self.breakers.for_url(request_parameters['url'])
+        timeout = self.timeout
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+        request_parameters.setdefault('timeout', timeout)
+        breaker.before()
+        try:
+            response = self.send(request_parameters)
+        except OSError:
+            breaker.failure()
+            raise
+        if response.status_code >= 500:
+            breaker.failure()
+        else:
+            breaker.success()
+        return response
+
+    def hedge_delay(self):
+        """Задержка перед повторной попыткой или None без дублирования."""
+        if not self.hedge or len(self.latencies) < self.hedge_min_samples:
+            return None
+        return self.latencies.quantile(self.hedge_quantile)
+
+    def send(self, request_parameters):
+        """Запрос с дублированием; потоковые ответы не дублируются."""
+        delay = self.hedge_delay()
+        if delay is None or request_parameters.get('stream'):
+            return self.timed_get(request_parameters)
+        return self.hedged_get(request_parameters, delay)
+
+    def timed_get(self, request_parameters):
+        """Одна попытка запроса с учётом её длительности."""
+        with self.lock:
+            self.requests += 1
+        started = time.monotonic()
+        response = self.session.get(**request_parameters)
+        self.latencies.observe(time.monotonic() - started)
+        return response
+
+    def hedged_get(self, request_parameters, delay):
+        """Первый ответ из двух попыток; вторая начинается через delay.
+
+        Ответ проигравшей попытки закрывается, как только она завершится.
+        Если обе попытки упали, поднимается ошибка последней.
+        """
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=HEDGE_WORKERS,
+                    thread_name_prefix='hedge')
+        attempt = partial(self.timed_get, request_parameters)
+        first = self.executor.submit(attempt)
+        done, _ = wait([first], timeout=delay, return_when=FIRST_COMPLETED)
+        if done:
+            return first.result()
+        attempts = [first, self.executor.submit(attempt)]
+        error = None
+        for future in as_completed(attempts):
+            try:
+                response = future.result()
+            except OSError as failure:
+                error = failure
+                continue
+            HEDGED_REQUESTS.labels(
+                'first' if future is first else 'hedge').inc()
+            for other in attempts:
+                if other is not future:
+                    other.add_done_callback(close_response)
+            return response
+        raise error
+
+    def conditional_headers(self, key):
+        """Заголовки условного запроса по подтверждённому ответу."""
+        etag, modified, _ = self.validators.get(key, (None, None, None))
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if modified:
+            headers['If-Modified-Since'] = modified
+        return headers
+
+    def unchanged(self, key, response):
+        """Совпадает ли ответ с подтверждённым: 304, ETag или отпечаток.
+
+        Возвращает признак и признаки ответа (ETag, Last-Modified,
+        отпечаток) для подтверждения через track() и commit().
+        """
+        if response.status_code == 304:
+            self.short_circuited += 1
+            return True, None
+        headers = getattr(response, 'headers', {})
+        content = getattr(response, 'content', None)
+        observed = (
+            headers.get('ETag'),
+            headers.get('Last-Modified'),
+            fingerprint(content) if isinstance(content, bytes) else None,
+        )
+        committed = self.validators.get(key)
+        if (observed[-1] is not None and committed is not None
+                and committed[-1] == observed[-1]):
+            self.short_circuited += 1
+            return True, observed
+        return False, observed
+
+    def track(self, key, observed):
+        """Учёт пачки, обрабатывающей ответ с признаками observed.
+
+        Возвращает on_complete(delivered) для этой пачки.
+        """
+        with self.lock:
+            self.unsettled[key] = self.unsettled.get(key, 0) + 1
+        return partial(self.commit, key, observed)
+
+    def commit(self, key, observed, delivered=True):
+        """Подтверждение ответа после полной обработки его пачки.
+
+        Пока по ключу не завершены другие пачки, ответ не подтверждается:
+        их уведомления ещё могут не дойти, и следующий опрос должен
+        разобрать ответ заново.
+        """
+        with self.lock:
+            left = self.unsettled.get(key, 1) - 1
+            if left:
+                self.unsettled[key] = left
+            else:
+                self.unsettled.pop(key, None)
+            if delivered and not left:
+                self.validators[key] = observed
+
+    def connections(self):
+        """Число TCP-соединений, открытых пулами клиента."""
+        import requests
+
+        if not isinstance(self.session, requests.Session):
+            return 0
+        opened = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            opened += sum(pools[key].num_connections for key in pools.keys())
+        return opened
+
+    def stats(self):
+        """Счётчики запросов и повторного использования соединений."""
+        connections = self.connections()
+        return {
+            'requests': self.requests,
+            'connections': connections,
+            'reused': max(self.requests - connections, 0),
+            'short_circuited': self.short_circuited,
+        }
+
+    def close(self):
+        """Закрытие всех соединений пула и потоков повторных попыток."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+@lru_cache(maxsize=None)
+def default_client():
+    """Общий клиент, через который по умолчанию идут запросы к API."""
+    client = PracticumClient()
+    for quantile in EXPORTED_QUANTILES:
+        REQUEST_QUANTILES.set_function(
+            partial(client.latencies.quantile, quantile), quantile)
+    return client
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from functools import partial
+
+import aiohttp
+
+import coalesce
+import homework
+from breaker import BREAKERS
+from changes import PendingBatch
+from deadlines import (POLL_DEADLINE, REQUEST_CONNECT_TIMEOUT,
+                       REQUEST_READ_TIMEOUT)
+from homework import (BOT_MESSAGE, BOT_MESSAGE_FAIL,
+                      RESPONSE_EXCEPTION_MESSAGE, RETRY_TIME, logger)
+from scheduler import AdaptiveScheduler
+from settings import getenv
+from state import STATE_FILE, open_store
+from timers import TimerHeap
+
+ASYNC_CONCURRENCY = int(getenv('ASYNC_CONCURRENCY', 100))
+TELEGRAM_API = '{base_url}{token}/sendMessage'
+TELEGRAM_REFUSAL_MESSAGE = 'Telegram отказал в отправке: {description}'
+
+
+async def get_api_answer(session, token, current_timestamp):
+    """Асинхронный запрос к API-сервису."""
+    request_parameters = dict(
+        url=homework.ENDPOINT,
+        headers=homework.tenant_headers(token),
+        params={'from_date': current_timestamp},
+    )
+    breaker = BREAKERS.for_url(homework.ENDPOINT)
+    breaker.before()
+    try:
+        async with session.get(**request_parameters) as response:
+            if response.status >= 500:
+                breaker.failure()
+            else:
+                breaker.success()
+            homework.check_status_code(
+                response.status, request_parameters,
+                response.headers.get('Retry-After'))
+            answer = await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        breaker.failure()
+        raise ConnectionError(RESPONSE_EXCEPTION_MESSAGE.format(
+            **request_parameters, error=error))
+    return homework.check_api_answer(answer, request_parameters)
+
+
+async def send_message(session, chat_id, message):
+    """Асинхронная отправка сообщения в Telegram чат."""
+    try:
+        async with session.post(
+            TELEGRAM_API.format(
+                base_url=homework.TELEGRAM_BASE_URL,
+                token=homework.TELEGRAM_TOKEN),
+            json={'chat_id': chat_id, 'text': str(message)},
+        ) as response:
+            answer = await response.json(content_type=None)
+        if not answer.get('ok'):
+            raise ConnectionError(TELEGRAM_REFUSAL_MESSAGE.format(
+                description=answer.get('description')))
+        logger.info(BOT_MESSAGE.format(message=message, chat_id=chat_id))
+        return True
+    except Exception as error:
+        logger.exception(BOT_MESSAGE_FAIL.format(message=message, error=error))
+        return False
+
+
+async def shared_api_answer(session, semaphore, token, current_timestamp):
+    """Проверенный ответ API, общий для подписок с одним токеном."""
+    async with semaphore:
+        response = await get_api_answer(session, token, current_timestamp)
+    homework.check_response(response)
+    return response
+
+
+async def poll_tenant(session, semaphore, tenant):
+    """Один асинхронный цикл опроса API и уведомления для подписки.
+
+    Разбор изменений и учёт ошибок общие с homework.poll_tenant(), здесь
+    только запрос и отправка. Возвращает число отправленных статусов
+    и ошибку цикла, если она была.
+    """
+    batch = PendingBatch(tenant)
+    try:
+        response = await coalesce.ASYNC_FLIGHTS.run(
+            (tenant.token, tenant.current_date), partial(
+                shared_api_answer, session, semaphore,
+                tenant.token, tenant.current_date))
+        sent_count = 0
+        for _, _, message, on_sent in homework.pending_changes(
+                tenant, response['homeworks'], batch):
+            async with semaphore:
+                sent = await send_message(session, tenant.chat_id, message)
+            on_sent(sent)
+            sent_count += 1
+        batch.close(response.get('current_date', tenant.current_date))
+        return sent_count, None
+    except Exception as error:
+        batch.abandon()
+        message = homework.poll_error(tenant, error)
+        if message is not None:
+            async with semaphore:
+                sent = await send_message(session, tenant.chat_id, message)
+            homework.mark_error_sent(tenant, message, sent)
+        return 0, error
+
+
+async def poll_and_reschedule(session, semaphore, scheduler, tenant):
+    """Опрос подписки и выбор времени следующего опроса."""
+    sent, error = await poll_tenant(session, semaphore, tenant)
+    scheduler.reschedule(tenant, sent, error, time.time())
+
+
+async def poll_tenants(session, semaphore, tenants, scheduler=None):
+    """Параллельный опрос всех подписок, которым подошёл срок."""
+    scheduler = scheduler or AdaptiveScheduler(RETRY_TIME)
+    now = time.time()
+    await asyncio.gather(*(
+        poll_and_reschedule(session, semaphore, scheduler, tenant)
+        for tenant in tenants if tenant.next_poll <= now))
+
+
+async def main(concurrency=ASYNC_CONCURRENCY):
+    """Асинхронная логика работы бота с ограничением параллелизма."""
+    homework.init()
+    tenants = homework.get_tenants()
+    store = open_store(STATE_FILE)
+    store.restore(tenants)
+    semaphore = asyncio.Semaphore(concurrency)
+    scheduler = AdaptiveScheduler(RETRY_TIME)
+    timers = TimerHeap()
+    for tenant in tenants:
+        timers.schedule(tenant, tenant.next_poll)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(
+        total=POLL_DEADLINE, connect=REQUEST_CONNECT_TIMEOUT,
+        sock_read=REQUEST_READ_TIMEOUT)
+    try:
+        async with aiohttp.ClientSession(
+                connector=connector, timeout=timeout) as session:
+            while True:
+                due = timers.pop_due(time.time())
+                await poll_tenants(session, semaphore, due, scheduler)
+                for tenant in due:
+                    timers.schedule(tenant, tenant.next_poll)
+                    store.remember(tenant)
+                store.maybe_flush()
+                await asyncio.sleep(timers.wait_time(time.time()))
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
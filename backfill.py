@@ -0,0 +1,130 @@
+"""Догоняющий опрос за прошедший период после долгого простоя.
+
+API принимает только нижнюю границу from_date, поэтому окна периода
+ничего не экономят: ответ с начала окна всё равно содержит все работы,
+обновлённые позже. Каждая подписка запрашивается один раз с начала
+периода, подписки — параллельно с общим ограничением числа запросов,
+а уведомления уходят в хронологическом порядке.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import homework
+from changes import PendingBatch
+from deadlines import Deadline
+from messages import Template
+from metrics import ERRORS
+from settings import getenv
+from state import STATE_FILE, open_store
+
+BACKFILL_WORKERS = int(getenv('BACKFILL_WORKERS', 8))
+BACKFILL_MESSAGE = ('Догоняющий опрос {chat_id}: работ {homeworks},'
+                    ' уведомлений {queued}')
+BACKFILL_FAIL_MESSAGE = Template(
+    'Догоняющий опрос {chat_id} не удался: {error}')
+
+
+def updated_at(homework_item):
+    """Время обновления работы в секундах или None."""
+    value = homework_item.get('date_updated')
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return datetime.fromisoformat(
+            str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def fetch_period(tenant, since, until=None):
+    """Работы, обновлённые с since до until, по времени обновления.
+
+    Курсор — current_date ответа, а с until — не дальше until: работы,
+    обновлённые позже, принесёт обычный опрос.
+    """
+    response = homework.shared_api_answer(tenant, since, Deadline())
+    current_date = response.get('current_date', since)
+    homeworks = response['homeworks']
+    if until is not None:
+        homeworks = [
+            item for item in homeworks
+            if (updated_at(item) or since) < until]
+        current_date = min(current_date, until)
+    homeworks = sorted(homeworks, key=lambda item: updated_at(item) or 0)
+    return homeworks, current_date
+
+
+def backfill(deliveries, tenants, since, until=None,
+             workers=BACKFILL_WORKERS):
+    """Догоняющий опрос подписок с since; курсоры сдвигаются к концу."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = [
+            (tenant, pool.submit(fetch_period, tenant, since, until))
+            for tenant in tenants
+        ]
+        for tenant, future in pending:
+            try:
+                homeworks, current_date = future.result()
+                batch = PendingBatch(tenant)
+                queued = homework.notify_changes(
+                    deliveries, tenant, homeworks, batch)
+                batch.close(current_date)
+            except Exception as error:
+                ERRORS.labels(type(error).__name__).inc()
+                homework.logger.error(BACKFILL_FAIL_MESSAGE.format(
+                    chat_id=tenant.chat_id, error=error))
+                continue
+            homework.logger.info(BACKFILL_MESSAGE.format(
+                chat_id=tenant.chat_id, homeworks=len(homeworks),
+                queued=queued))
+
+
+def run_backfill(tenants, since, until=None, workers=BACKFILL_WORKERS):
+    """Догоняющий опрос с доставкой всех уведомлений и записью курсоров."""
+    store = open_store(STATE_FILE)
+    store.restore(tenants)
+    deliveries = homework.start_deliveries()
+    try:
+        backfill(deliveries, tenants, since, until, workers)
+        homework.drain_deliveries(deliveries)
+    finally:
+        deliveries.stop(homework.DRAIN_TIMEOUT)
+        for tenant in tenants:
+            store.remember(tenant)
+        store.close()
+
+
+def parse_time(value):
+    """Момент из командной строки: секунды или дата ISO 8601."""
+    try:
+        return int(value)
+    except ValueError:
+        return int(datetime.fromisoformat(value).timestamp())
+
+
+def parse_args():
+    """Параметры догоняющего опроса из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--since', type=parse_time, required=True,
+                        help='начало периода: секунды или дата ISO 8601')
+    parser.add_argument('--until', type=parse_time,
+                        help='конец периода, по умолчанию сейчас')
+    parser.add_argument('--workers', type=int, default=BACKFILL_WORKERS)
+    parser.add_argument('--live', action='store_true',
+                        help='после догоняющего опроса перейти к обычному')
+    return parser.parse_args()
+
+
+def main():
+    """Догоняющий опрос и, с --live, продолжение обычного цикла."""
+    args = parse_args()
+    homework.init()
+    tenants = homework.get_tenants()
+    run_backfill(tenants, args.since, args.until, args.workers)
+    if args.live:
+        homework.run_bot(tenants)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""Память на одну отслеживаемую работу: словарь из JSON и статус."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import measure_homework_memory  # noqa: E402
+from tenants import measure_tenant_memory  # noqa: E402
+
+HOMEWORKS = int(os.getenv('BENCH_HOMEWORKS', 100000))
+RESULT_MESSAGE = '{name:<24} {size:10.1f} байт'
+
+
+if __name__ == '__main__':
+    raw, compact = measure_homework_memory(HOMEWORKS)
+    print(RESULT_MESSAGE.format(name='работа: словарь', size=raw))
+    print(RESULT_MESSAGE.format(name='работа: статус', size=compact))
+    print(RESULT_MESSAGE.format(
+        name='подписка', size=measure_tenant_memory(HOMEWORKS)))
@@ -0,0 +1,64 @@
+"""Накладные расходы кучи таймеров и диспетчера на 100 000 таймеров."""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timers import TimerDispatcher, TimerHeap  # noqa: E402
+
+TIMERS = int(os.getenv('BENCH_TIMERS', 100000))
+RESULT_MESSAGE = '{name:<12} {total:8.3f} с  {per_timer:8.3f} мкс/таймер'
+
+
+def measure(name, action):
+    """Время действия над всеми таймерами."""
+    started = time.perf_counter()
+    action()
+    total = time.perf_counter() - started
+    print(RESULT_MESSAGE.format(
+        name=name, total=total, per_timer=total / TIMERS * 1e6))
+    return total
+
+
+def bench_heap(keys, deadlines):
+    """Установка, перенос, отмена и извлечение в голой куче."""
+    timers = TimerHeap()
+    measure('schedule', lambda: [
+        timers.schedule(key, due) for key, due in zip(keys, deadlines)])
+    measure('reschedule', lambda: [
+        timers.schedule(key, due + 1) for key, due in zip(keys, deadlines)])
+    measure('cancel', lambda: [timers.cancel(key) for key in keys[::2]])
+    measure('pop_due', lambda: timers.pop_due(float('inf')))
+
+
+def bench_dispatch(keys):
+    """Передача всех наступивших таймеров в пул потоков."""
+    done = threading.Event()
+    handled = []
+
+    def handler(key):
+        handled.append(key)
+        if len(handled) == TIMERS:
+            done.set()
+
+    timers = TimerHeap()
+    for key in keys:
+        timers.schedule(key, 0)
+    dispatcher = TimerDispatcher(timers, handler)
+
+    def dispatch():
+        dispatcher.dispatch_due()
+        done.wait()
+
+    measure('dispatch', dispatch)
+    dispatcher.pool.shutdown()
+
+
+if __name__ == '__main__':
+    keys = list(range(TIMERS))
+    deadlines = [random.uniform(0, 3600) for _ in keys]
+    bench_heap(keys, deadlines)
+    bench_dispatch(keys)
@@ -0,0 +1,170 @@
+"""Замеры конвейера опрос-проверка-форматирование-отправка.
+
+Результаты пишутся в JSON; с --baseline сравниваются с прошлым прогоном,
+и при замедлении больше допуска скрипт завершается с кодом 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+import simulator  # noqa: E402
+from delivery import DirectDelivery  # noqa: E402
+from tenants import Tenant  # noqa: E402
+
+SIZES = (1000, 10000, 100000)
+RESULT_MESSAGE = '{name:<40} {per_call:12.3f} мкс/вызов'
+REGRESSION_MESSAGE = ('Замедление {name}: {before:.3f} -> {after:.3f}'
+                      ' мкс/вызов (+{ratio:.0%})')
+
+
+def measure(function, calls, repeat=3):
+    """Лучшее из repeat прогонов: секунды на один вызов."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best
+
+
+def make_homeworks(size):
+    """Ответ API с size домашними работами."""
+    statuses = tuple(homework.VERDICTS)
+    return {
+        'homeworks': [
+            {'id': index, 'homework_name': f'student__hw{index}.zip',
+             'status': statuses[index % len(statuses)],
+             'reviewer_comment': 'Комментарий ревьюера',
+             'date_updated': '2022-02-13T14:40:57Z',
+             'lesson_name': 'Итоговый проект'}
+            for index in range(size)
+        ],
+        'current_date': 0,
+    }
+
+
+def bench_check_response(sizes):
+    """check_response на больших списках работ."""
+    results = {}
+    for size in sizes:
+        answer = make_homeworks(size)
+        results[f'check_response[{size}]'] = measure(
+            lambda: homework.check_response(answer), 100)
+    return results
+
+
+def bench_parse_status(sizes):
+    """parse_status для всех работ большого ответа."""
+    results = {}
+    for size in sizes:
+        homeworks = make_homeworks(size)['homeworks']
+        results[f'parse_status[{size}]'] = measure(
+            lambda: [homework.parse_status(hw) for hw in homeworks], 3) / size
+    return results
+
+
+def bench_get_api_answer(server, calls):
+    """get_api_answer к локальному симулятору."""
+    headers = homework.tenant_headers('bench')
+    homework.request_api_answer(headers, 0)
+    return {'get_api_answer[simulator]': measure(
+        lambda: homework.request_api_answer(headers, 0), calls)}
+
+
+def bench_pipeline(server, tenants_count):
+    """Итерации в духе main(): опрос всех подписок и отправка статусов."""
+    import telegram
+
+    urls = simulator.endpoints(server)
+    bot = telegram.Bot(
+        '1234:bench', base_url=urls['TELEGRAM_BASE_URL'])
+    deliveries = DirectDelivery(
+        lambda chat_id, message: homework.send_chat_message(
+            bot, chat_id, message))
+    tenants = [Tenant(f'token{index}', index, 0)
+               for index in range(tenants_count)]
+
+    def iteration():
+        for tenant in tenants:
+            homework.poll_tenant(deliveries, tenant)
+
+    return {f'pipeline[{tenants_count} tenants]': measure(
+        iteration, 3, repeat=1) / tenants_count}
+
+
+def run(sizes, calls, tenants_count):
+    """Все замеры; результат — секунды на вызов по именам."""
+    server = simulator.start_simulator(simulator.Simulator(
+        simulator.SimulatorConfig(change_probability=0.3, seed=1)))
+    homework.ENDPOINT = simulator.endpoints(server)['PRACTICUM_ENDPOINT']
+    homework.logger.disabled = True
+    try:
+        results = {}
+        results.update(bench_check_response(sizes))
+        results.update(bench_parse_status(sizes))
+        results.update(bench_get_api_answer(server, calls))
+        results.update(bench_pipeline(server, tenants_count))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Замеры, замедлившиеся относительно baseline больше допуска."""
+    regressions = []
+    for name, after in results.items():
+        before = baseline.get(name)
+        if before and after > before * (1 + tolerance):
+            regressions.append(REGRESSION_MESSAGE.format(
+                name=name, before=before * 1e6, after=after * 1e6,
+                ratio=after / before - 1))
+    return regressions
+
+
+def parse_args():
+    """Параметры прогона из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--baseline', help='JSON прошлого прогона')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    return parser.parse_args()
+
+
+def main():
+    """Прогон, вывод, сохранение и сравнение с baseline."""
+    args = parse_args()
+    results = run(args.sizes, args.calls, args.tenants)
+    for name, per_call in results.items():
+        print(RESULT_MESSAGE.format(name=name, per_call=per_call * 1e6))
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'created': int(time.time()),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline:
+            regressions = compare(
+                results, json.load(baseline)['results'], args.tolerance)
+        for regression in regressions:
+            print(regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Автоматы защиты от сбоев внешних сервисов, общие для всех подписок.
+
+Пока сервис отвечает, автомат закрыт. После failure_threshold сбоев
+подряд он размыкается, и запросы к хосту не отправляются cooldown секунд.
+Затем один пробный запрос (полуоткрытое состояние) решает, замкнуть
+автомат или снова разомкнуть.
+"""
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlsplit
+
+from exceptions import CircuitOpenException
+from metrics import REGISTRY, Counter, Gauge
+from settings import getenv
+
+CIRCUIT_FAILURES = int(getenv('CIRCUIT_FAILURES', 5))
+CIRCUIT_COOLDOWN = float(getenv('CIRCUIT_COOLDOWN', 60))
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+CIRCUIT_OPEN_MESSAGE = ('Запросы к {host} приостановлены после сбоев,'
+                        ' повтор через {retry_after:.0f} с')
+
+CIRCUIT_STATE = REGISTRY.register(Gauge(
+    'homework_circuit_state',
+    'Состояние автомата: 0 — закрыт, 1 — полуоткрыт, 2 — разомкнут',
+    ['host']))
+CIRCUIT_TRANSITIONS = REGISTRY.register(Counter(
+    'homework_circuit_transitions_total', 'Переключения автоматов',
+    ['host', 'state']))
+
+
+def host_of(url):
+    """Хост из адреса запроса."""
+    return urlsplit(url).netloc
+
+
+class CircuitBreaker:
+    """Автомат одного хоста: закрыт, разомкнут или полуоткрыт."""
+
+    def __init__(self, host, failure_threshold=CIRCUIT_FAILURES,
+                 cooldown=CIRCUIT_COOLDOWN, clock=time.monotonic,
+                 on_change=None):
+        """Функция on_change(host, previous, state) узнаёт о переключениях."""
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def switch(self, state):
+        """Смена состояния под блокировкой; возвращает пару переключения."""
+        previous, self.state = self.state, state
+        CIRCUIT_TRANSITIONS.labels(self.host, state).inc()
+        return previous, state
+
+    def notify(self, change):
+        """Сообщение о переключении вне блокировки."""
+        if change is not None and self.on_change is not None:
+            self.on_change(self.host, *change)
+
+    def before(self):
+        """Разрешение на запрос или CircuitOpenException."""
+        change = None
+        with self.lock:
+            if self.state == OPEN:
+                left = self.opened_at + self.cooldown - self.clock()
+                if left > 0:
+                    raise CircuitOpenException(CIRCUIT_OPEN_MESSAGE.format(
+                        host=self.host, retry_after=left),
+                        host=self.host, retry_after=left)
+                change = self.switch(HALF_OPEN)
+                self.probing = True
+            elif self.state == HALF_OPEN:
+                if self.probing:
+                    raise CircuitOpenException(CIRCUIT_OPEN_MESSAGE.format(
+                        host=self.host, retry_after=self.cooldown),
+                        host=self.host, retry_after=self.cooldown)
+                self.probing = True
+        self.notify(change)
+
+    def success(self):
+        """Успешный ответ: автомат замыкается."""
+        change = None
+        with self.lock:
+            self.failures = 0
+            self.probing = False
+            if self.state != CLOSED:
+                change = self.switch(CLOSED)
+        self.notify(change)
+
+    def failure(self):
+        """Сбой: после failure_threshold подряд автомат размыкается."""
+        change = None
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == HALF_OPEN or (
+                    self.state == CLOSED
+                    and self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                change = self.switch(OPEN)
+        self.notify(change)
+
+
+def guard(breaker, function, failures, answers=()):
+    """Вызов function под защитой breaker; failures считаются сбоями.
+
+    Остальные исключения, как и answers среди failures, означают, что
+    хост отвечает, и сбоем не считаются.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        breaker.before()
+        try:
+            result = function(*args, **kwargs)
+        except answers:
+            breaker.success()
+            raise
+        except failures:
+            breaker.failure()
+            raise
+        except Exception:
+            breaker.success()
+            raise
+        breaker.success()
+        return result
+    return wrapper
+
+
+class Breakers:
+    """Автоматы по хостам; создаются при первом обращении к хосту."""
+
+    def __init__(self, **options):
+        """Параметры options передаются каждому новому CircuitBreaker."""
+        self.options = options
+        self.lock = threading.Lock()
+        self.breakers = {}
+        self.listeners = []
+
+    def for_url(self, url):
+        """Автомат хоста из адреса url."""
+        host = host_of(url)
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = self.breakers[host] = CircuitBreaker(
+                    host, on_change=self.changed, **self.options)
+                CIRCUIT_STATE.set_function(
+                    lambda: STATE_VALUES[breaker.state], host)
+        return breaker
+
+    def subscribe(self, listener):
+        """Подписка listener(host, previous, state) на переключения."""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """Отписка listener."""
+        self.listeners.remove(listener)
+
+    def changed(self, host, previous, state):
+        """Рассылка переключения подписчикам."""
+        for listener in list(self.listeners):
+            listener(host, previous, state)
+
+
+BREAKERS = Breakers()
@@ -0,0 +1,113 @@
+import threading
+from functools import partial
+
+from records import HomeworkRecord
+
+
+def detect_changes(statuses, homeworks):
+    """Работы, статус которых отличается от последнего отправленного.
+
+    statuses — компактная запись «ключ работы → код отправленного статуса».
+    Возвращает пары (HomeworkRecord, словарь работы). Работа с неизвестным
+    статусом считается изменившейся, чтобы ошибка разбора не потерялась.
+    """
+    changes = []
+    for homework in homeworks:
+        record = HomeworkRecord.from_homework(homework)
+        if record.status is None or statuses.get(record.key) != record.status:
+            changes.append((record, homework))
+    return changes
+
+
+def queue_change(tenant, key, status, batch):
+    """Учёт уведомления о статусе status работы key в пачке batch.
+
+    Возвращает on_sent для отправки уведомления или None, если такое же
+    уведомление уже в очереди: тогда пачка дождётся его доставки, а не
+    отправит его ещё раз.
+    """
+    batch.add()
+    with tenant.lock:
+        waiting = tenant.inflight.get((key, status))
+        if waiting is not None:
+            waiting.append(batch)
+            return None
+        tenant.inflight[(key, status)] = [batch]
+    return partial(settle_change, tenant, key, status)
+
+
+def settle_change(tenant, key, status, sent):
+    """Запись доставленного статуса и учёт доставки в ждущих её пачках.
+
+    Словарь статусов не меняется на месте, а заменяется копией: потоки
+    опроса читают и сохраняют его без блокировки.
+    """
+    with tenant.lock:
+        batches = tenant.inflight.pop((key, status), ())
+        if sent:
+            tenant.statuses = {**tenant.statuses, key: status}
+    for batch in batches:
+        batch.delivered(sent)
+
+
+class PendingBatch:
+    """Уведомления одного опроса: курсор сдвигается после доставки всех.
+
+    Уведомления добавляются по одному через add(), а close() отмечает
+    конец пачки, поэтому её размер не нужно знать заранее.
+    """
+
+    __slots__ = ('tenant', 'current_date', 'left', 'failed', 'closed',
+                 'on_complete', 'lock')
+
+    def __init__(self, tenant, on_complete=None):
+        """Пустая пачка для подписки tenant.
+
+        on_complete(delivered) вызывается, когда пачка завершена;
+        delivered — доставлены ли все её уведомления.
+        """
+        self.tenant = tenant
+        self.current_date = None
+        self.left = 0
+        self.failed = False
+        self.closed = False
+        self.on_complete = on_complete
+        self.lock = threading.Lock()
+
+    def add(self):
+        """Учёт ещё одного уведомления пачки."""
+        with self.lock:
+            self.left += 1
+
+    def close(self, current_date):
+        """Конец пачки: курсор сдвинется после доставки всех уведомлений."""
+        with self.lock:
+            self.current_date = current_date
+            self.closed = True
+            done = not self.left
+        if done:
+            self.complete()
+
+    def abandon(self):
+        """Конец пачки опроса, прерванного ошибкой: курсор не сдвигается."""
+        with self.lock:
+            self.failed = True
+        self.close(None)
+
+    def complete(self):
+        """Сдвиг курсора после доставки всей пачки."""
+        delivered = not self.failed
+        if delivered:
+            self.tenant.current_date = self.current_date
+        if self.on_complete is not None:
+            self.on_complete(delivered)
+
+    def delivered(self, sent):
+        """Учёт доставки уведомления и сдвиг курсора в конце пачки."""
+        with self.lock:
+            if not sent:
+                self.failed = True
+            self.left -= 1
+            done = self.closed and not self.left
+        if done:
+            self.complete()
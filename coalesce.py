@@ -0,0 +1,107 @@
+"""Один запрос к API на всех подписчиков одного токена.
+
+За одним токеном Практикума могут следить несколько чатов: студент,
+наставник, руководитель команды. Одновременные опросы с одинаковыми
+токеном и from_date сливаются в один запрос, а его проверенный ответ
+ещё COALESCE_TTL секунд отдаётся из кэша. Изменения статусов затем
+рассылаются в каждый чат по его собственному состоянию.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+
+from metrics import REGISTRY, Counter
+from settings import getenv
+
+COALESCE_TTL = float(getenv('COALESCE_TTL', 30))
+
+COALESCED_POLLS = REGISTRY.register(Counter(
+    'homework_coalesced_polls_total',
+    'Опросы, получившие ответ без собственного запроса к API',
+    ['source']))
+
+
+class SingleFlight:
+    """Слияние одновременных вызовов по ключу и кэш результата на ttl.
+
+    Ошибки передаются всем ожидающим, но не кэшируются.
+    """
+
+    def __init__(self, ttl=COALESCE_TTL, clock=time.monotonic):
+        """Результат хранится ttl секунд по часам clock."""
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.cache = {}
+
+    def expire(self):
+        """Удаление устаревших результатов; кэш упорядочен по сроку."""
+        now = self.clock()
+        while self.cache:
+            key = next(iter(self.cache))
+            if self.cache[key][0] > now:
+                break
+            del self.cache[key]
+
+    def store(self, key, result):
+        """Результат завершённого запроса попадает в кэш."""
+        self.cache[key] = (self.clock() + self.ttl, result)
+
+    def do(self, key, function):
+        """Результат function() для key: из кэша, общий или свой."""
+        with self.lock:
+            self.expire()
+            if key in self.cache:
+                COALESCED_POLLS.labels('cache').inc()
+                return self.cache[key][1]
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Future()
+        if not leader:
+            COALESCED_POLLS.labels('flight').inc()
+            return flight.result()
+        try:
+            result = function()
+        except Exception as error:
+            with self.lock:
+                del self.flights[key]
+            flight.set_exception(error)
+            raise
+        with self.lock:
+            del self.flights[key]
+            self.store(key, result)
+        flight.set_result(result)
+        return result
+
+
+class AsyncSingleFlight(SingleFlight):
+    """То же для асинхронного бота: вызовы в полёте — задачи asyncio."""
+
+    def finish(self, key, task):
+        """Снятие задачи и кэширование её успешного результата."""
+        del self.flights[key]
+        if not task.cancelled() and task.exception() is None:
+            self.store(key, task.result())
+
+    async def run(self, key, factory):
+        """Результат корутины factory() для key: из кэша, общий или свой."""
+        import asyncio
+
+        self.expire()
+        if key in self.cache:
+            COALESCED_POLLS.labels('cache').inc()
+            return self.cache[key][1]
+        task = self.flights.get(key)
+        if task is None:
+            task = self.flights[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(partial(self.finish, key))
+        else:
+            COALESCED_POLLS.labels('flight').inc()
+        return await asyncio.shield(task)
+
+
+FLIGHTS = SingleFlight()
+ASYNC_FLIGHTS = AsyncSingleFlight()
@@ -0,0 +1,53 @@
+"""Тайм-ауты запросов и бюджет времени цикла опроса.
+
+У каждого запроса есть тайм-ауты на соединение и на чтение, а у цикла
+опроса подписки — общий бюджет. Тайм-ауты запроса урезаются до остатка
+бюджета, а при потоковом чтении бюджет проверяется между порциями, так
+что медленный ответ не задерживает цикл дольше POLL_DEADLINE секунд.
+"""
+import time
+
+from exceptions import DeadlineException
+from settings import getenv
+
+REQUEST_CONNECT_TIMEOUT = float(getenv('REQUEST_CONNECT_TIMEOUT', 3.05))
+REQUEST_READ_TIMEOUT = float(getenv('REQUEST_READ_TIMEOUT', 10))
+REQUEST_TIMEOUT = (REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT)
+POLL_DEADLINE = float(getenv('POLL_DEADLINE', 30))
+DEADLINE_MESSAGE = 'Цикл опроса не уложился в {budget:.1f} с'
+
+
+class Deadline:
+    """Бюджет времени, общий для всех запросов одного цикла опроса."""
+
+    __slots__ = ('budget', 'clock', 'expires')
+
+    def __init__(self, budget=POLL_DEADLINE, clock=time.monotonic):
+        """Бюджет budget секунд отсчитывается с момента создания."""
+        self.budget = budget
+        self.clock = clock
+        self.expires = clock() + budget
+
+    def remaining(self):
+        """Оставшееся время; отрицательное, если бюджет исчерпан."""
+        return self.expires - self.clock()
+
+    def check(self):
+        """Оставшееся время или DeadlineException."""
+        left = self.remaining()
+        if left <= 0:
+            raise DeadlineException(
+                DEADLINE_MESSAGE.format(budget=self.budget),
+                budget=self.budget)
+        return left
+
+    def timeout(self, timeout=REQUEST_TIMEOUT):
+        """Тайм-ауты (соединение, чтение), урезанные до остатка бюджета."""
+        left = self.check()
+        return tuple(min(part, left) for part in timeout)
+
+    def iterate(self, chunks):
+        """Порции ответа с проверкой бюджета перед каждой."""
+        for chunk in chunks:
+            self.check()
+            yield chunk
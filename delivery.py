@@ -0,0 +1,260 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+from exceptions import CircuitOpenException
+from messages import Template
+from settings import getenv
+
+TELEGRAM_GLOBAL_RATE = float(getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(getenv('TELEGRAM_CHAT_RATE', 1))
+DELIVERY_ATTEMPTS = int(getenv('DELIVERY_ATTEMPTS', 5))
+DELIVERY_RETRY_TIME = float(getenv('DELIVERY_RETRY_TIME', 1))
+DRAIN_TIMEOUT = float(getenv('DRAIN_TIMEOUT', 60))
+TICK_TIME = 1.0
+
+DELIVERED_MESSAGE = Template('Бот успешно отправил сообщение - "{message}"'
+                             ' в чат {chat_id}')
+DELIVERY_RETRY_MESSAGE = Template(
+    'Повтор отправки в чат {chat_id} через {delay:.1f} с по причине {error}')
+DELIVERY_FAIL_MESSAGE = Template(
+    'Отправка сообщения {message} не удалась по причине {error}')
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не больше capacity."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate, capacity=None, now=0.0):
+        """Корзина изначально полна."""
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated_at = now
+
+    def wait_time(self, now):
+        """Через сколько секунд будет доступен токен."""
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Расход одного токена."""
+        self.tokens -= 1
+
+
+class Delivery:
+    """Сообщение в очереди на отправку."""
+
+    __slots__ = ('chat_id', 'message', 'on_sent', 'enqueued_at', 'attempt')
+
+    def __init__(self, chat_id, message, on_sent, enqueued_at):
+        """on_sent(sent) вызывается после успеха или окончательной неудачи."""
+        self.chat_id = chat_id
+        self.message = message
+        self.on_sent = on_sent
+        self.enqueued_at = enqueued_at
+        self.attempt = 0
+
+
+class DirectDelivery:
+    """Отправка сразу в вызывающем потоке, без очереди."""
+
+    def __init__(self, send):
+        """send(chat_id, message) возвращает True при успехе."""
+        self.send = send
+
+    def put(self, chat_id, message, on_sent=None):
+        """Немедленная отправка сообщения."""
+        sent = self.send(chat_id, message)
+        if on_sent is not None:
+            on_sent(sent)
+
+    def put_status(self, chat_id, message, on_sent=None, status=None,
+                   key=None):
+        """Уведомление о статусе; без сводок — обычное сообщение."""
+        self.put(chat_id, message, on_sent)
+
+
+class DeliveryQueue:
+    """Очередь исходящих сообщений Telegram с отдельным рабочим потоком.
+
+    Частота ограничена корзинами токенов для каждого чата и для бота
+    в целом, RetryAfter и NetworkError приводят к повтору с задержкой.
+    BadRequest повтором не исправить: такое сообщение сразу не доставлено.
+    """
+
+    def __init__(self, send, logger, global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE, attempts=DELIVERY_ATTEMPTS,
+                 retry_time=DELIVERY_RETRY_TIME, clock=time.monotonic,
+                 sleep=time.sleep):
+        """send(chat_id, message) бросает исключение при неудаче."""
+        self.send = send
+        self.logger = logger
+        self.chat_rate = chat_rate
+        self.attempts = attempts
+        self.retry_time = retry_time
+        self.clock = clock
+        self.sleep = sleep
+        self.global_bucket = TokenBucket(global_rate, now=clock())
+        self.chat_buckets = {}
+        self.queue = queue.SimpleQueue()
+        self.delayed = []
+        self.counter = itertools.count()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.stopped = threading.Event()
+        self.thread = None
+        self.idle = threading.Condition()
+        self.unfinished = 0
+
+    def put(self, chat_id, message, on_sent=None):
+        """Постановка сообщения в очередь без ожидания отправки."""
+        with self.idle:
+            self.unfinished += 1
+        self.queue.put(Delivery(chat_id, message, on_sent, self.clock()))
+
+    def put_status(self, chat_id, message, on_sent=None, status=None,
+                   key=None):
+        """Уведомление о статусе; без сводок — обычное сообщение."""
+        self.put(chat_id, message, on_sent)
+
+    def start(self):
+        """Запуск рабочего потока отправки."""
+        self.thread = threading.Thread(
+            target=self.run, name='telegram-delivery', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Остановка рабочего потока; None в очереди будит его."""
+        self.stopped.set()
+        self.queue.put(None)
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def drain(self, timeout=None):
+        """Ожидание доставки или отказа по всем сообщениям очереди."""
+        with self.idle:
+            return self.idle.wait_for(lambda: not self.unfinished, timeout)
+
+    def depth(self):
+        """Число сообщений, ожидающих отправки."""
+        return self.queue.qsize() + len(self.delayed)
+
+    def stats(self):
+        """Глубина очереди, счётчики и задержка отправки."""
+        return {
+            'depth': self.depth(),
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'latency_avg': self.latency_total / self.sent if self.sent else 0,
+            'latency_max': self.latency_max,
+        }
+
+    def run(self):
+        """Цикл рабочего потока до вызова stop()."""
+        while not self.stopped.is_set():
+            delivery = self.next_delivery()
+            if delivery is not None:
+                self.deliver(delivery)
+
+    def next_delivery(self):
+        """Следующее сообщение: сначала отложенные, срок которых наступил."""
+        now = self.clock()
+        if self.delayed and self.delayed[0][0] <= now:
+            return heapq.heappop(self.delayed)[-1]
+        timeout = TICK_TIME
+        if self.delayed:
+            timeout = min(self.delayed[0][0] - now, timeout)
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def postpone(self, delivery, delay):
+        """Возврат сообщения в очередь через delay секунд."""
+        heapq.heappush(
+            self.delayed,
+            (self.clock() + delay, next(self.counter), delivery))
+
+    def chat_bucket(self, chat_id):
+        """Корзина токенов чата."""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, now=self.clock())
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def deliver(self, delivery):
+        """Отправка с учётом ограничений частоты и повторов."""
+        from telegram.error import BadRequest, NetworkError, RetryAfter
+
+        chat_bucket = self.chat_bucket(delivery.chat_id)
+        chat_wait = chat_bucket.wait_time(self.clock())
+        if chat_wait > 0:
+            self.postpone(delivery, chat_wait)
+            return
+        global_wait = self.global_bucket.wait_time(self.clock())
+        if global_wait > 0:
+            self.sleep(global_wait)
+            self.global_bucket.wait_time(self.clock())
+        self.global_bucket.take()
+        chat_bucket.take()
+        try:
+            self.send(delivery.chat_id, delivery.message)
+        except RetryAfter as error:
+            self.retry(delivery, error.retry_after, error)
+        except CircuitOpenException as error:
+            self.retry(delivery, error.retry_after, error)
+        except BadRequest as error:
+            self.finish(delivery, False, error)
+        except NetworkError as error:
+            delivery.attempt += 1
+            if delivery.attempt >= self.attempts:
+                self.finish(delivery, False, error)
+            else:
+                self.retry(
+                    delivery,
+                    self.retry_time * 2 ** (delivery.attempt - 1), error)
+        except Exception as error:
+            self.finish(delivery, False, error)
+        else:
+            self.finish(delivery, True)
+
+    def retry(self, delivery, delay, error):
+        """Повтор отправки после задержки."""
+        self.retried += 1
+        self.logger.warning(DELIVERY_RETRY_MESSAGE.format(
+            chat_id=delivery.chat_id, delay=delay, error=error))
+        self.postpone(delivery, delay)
+
+    def finish(self, delivery, sent, error=None):
+        """Учёт результата и вызов on_sent."""
+        if sent:
+            latency = self.clock() - delivery.enqueued_at
+            self.sent += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            self.logger.info(DELIVERED_MESSAGE.format(
+                message=delivery.message, chat_id=delivery.chat_id))
+        else:
+            self.failed += 1
+            self.logger.error(DELIVERY_FAIL_MESSAGE.format(
+                message=delivery.message, error=error))
+        if delivery.on_sent is not None:
+            delivery.on_sent(sent)
+        with self.idle:
+            self.unfinished -= 1
+            if not self.unfinished:
+                self.idle.notify_all()
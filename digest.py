@@ -0,0 +1,165 @@
+"""Сводки: несколько смен статусов одним сообщением в чат.
+
+Когда ревьюер проверяет сразу несколько работ или после простоя
+накопились изменения, уведомления о статусах копятся по чатам и уходят
+одним сообщением: по истечении DIGEST_WINDOW секунд с первого
+уведомления или при накоплении DIGEST_SIZE уведомлений. Срочные статусы
+(DIGEST_URGENT, по умолчанию approved) отправляют сводку чата сразу.
+Остальные сообщения, например об ошибках, проходят без задержки.
+"""
+import threading
+import time
+from functools import partial
+
+from records import STATUS_CODES
+from settings import getenv
+
+DIGEST_WINDOW = float(getenv('DIGEST_WINDOW', 0))
+DIGEST_SIZE = int(getenv('DIGEST_SIZE', 10))
+DIGEST_URGENT = frozenset(
+    STATUS_CODES[name.strip()]
+    for name in getenv('DIGEST_URGENT', 'approved').split(',')
+    if name.strip())
+MESSAGE_LIMIT = 4096
+HEADER_RESERVE = 64
+DIGEST_HEADER = 'Изменились статусы проверки работ: {count}'
+DIGEST_SEPARATOR = '\n\n'
+
+
+def compose(messages, limit=MESSAGE_LIMIT):
+    """Разбиение уведомлений на сводки, каждая не длиннее limit."""
+    chunks = []
+    size = limit
+    for message in messages:
+        size += len(DIGEST_SEPARATOR) + len(message)
+        if size > limit - HEADER_RESERVE:
+            chunks.append([])
+            size = len(message)
+        chunks[-1].append(message)
+    return chunks
+
+
+def render(chunk):
+    """Текст сводки; одиночное уведомление отправляется как есть."""
+    if len(chunk) == 1:
+        return chunk[0]
+    return DIGEST_SEPARATOR.join(
+        [DIGEST_HEADER.format(count=len(chunk)), *chunk])
+
+
+def notify_all(callbacks, sent):
+    """Результат отправки сводки — каждому её уведомлению."""
+    for on_sent in callbacks:
+        on_sent(sent)
+
+
+class Digest:
+    """Накопление уведомлений о статусах по чатам перед очередью отправки.
+
+    Курсор подписки сдвигается только после доставки сводки, поэтому
+    уведомления, не дождавшиеся отправки до остановки, придут в следующий
+    запуск.
+    """
+
+    def __init__(self, deliveries, window=DIGEST_WINDOW, size=DIGEST_SIZE,
+                 urgent=DIGEST_URGENT, clock=time.monotonic):
+        """Готовые сводки уходят в очередь deliveries."""
+        self.deliveries = deliveries
+        self.window = window
+        self.size = size
+        self.urgent = urgent
+        self.clock = clock
+        self.condition = threading.Condition()
+        self.buffers = {}
+        self.stopped = False
+        self.thread = None
+
+    def put(self, chat_id, message, on_sent=None):
+        """Обычное сообщение уходит в очередь без накопления."""
+        self.deliveries.put(chat_id, message, on_sent)
+
+    def put_status(self, chat_id, message, on_sent=None, status=None,
+                   key=None):
+        """Уведомление о статусе попадает в сводку чата."""
+        with self.condition:
+            deadline, entries = self.buffers.setdefault(
+                chat_id, (self.clock() + self.window, []))
+            entries.append((message, on_sent))
+            ready = len(entries) >= self.size or status in self.urgent
+            if ready:
+                del self.buffers[chat_id]
+            else:
+                self.condition.notify()
+        if ready:
+            self.send(chat_id, entries)
+
+    def send(self, chat_id, entries):
+        """Постановка сводок чата в очередь отправки."""
+        offset = 0
+        for chunk in compose([message for message, _ in entries]):
+            callbacks = [
+                on_sent for _, on_sent in entries[offset:offset + len(chunk)]
+                if on_sent is not None]
+            offset += len(chunk)
+            self.deliveries.put(
+                chat_id, render(chunk), partial(notify_all, callbacks))
+
+    def flush(self, force=False):
+        """Отправка сводок, срок которых истёк, или всех с force."""
+        now = self.clock()
+        with self.condition:
+            due = [chat_id for chat_id, (deadline, _) in self.buffers.items()
+                   if force or deadline <= now]
+            ready = [(chat_id, self.buffers.pop(chat_id)[1])
+                     for chat_id in due]
+        for chat_id, entries in ready:
+            self.send(chat_id, entries)
+
+    def next_deadline(self):
+        """Ближайший срок отправки сводки или None."""
+        return min(
+            (deadline for deadline, _ in self.buffers.values()), default=None)
+
+    def run(self):
+        """Цикл потока: отправка сводок по истечении окна."""
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                deadline = self.next_deadline()
+                timeout = None if deadline is None else max(
+                    deadline - self.clock(), 0)
+                self.condition.wait(timeout)
+            self.flush()
+
+    def start(self):
+        """Запуск потока отправки сводок."""
+        self.thread = threading.Thread(
+            target=self.run, name='telegram-digest', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Остановка потока сводок и очереди отправки."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self.deliveries.stop(timeout)
+
+    def drain(self, timeout=None):
+        """Отправка всех сводок и ожидание их доставки."""
+        self.flush(force=True)
+        return self.deliveries.drain(timeout)
+
+    def depth(self):
+        """Сообщения в очереди и уведомления, ждущие сводки."""
+        with self.condition:
+            buffered = sum(
+                len(entries) for _, entries in self.buffers.values())
+        return self.deliveries.depth() + buffered
+
+    def stats(self):
+        """Статистика очереди отправки."""
+        return self.deliveries.stats()
@@ -1,2 +1,18 @@
 class ResponseCodeException(Exception):
-    pass
+    def __init__(self, message, code=None, retry_after=None):
+        super().__init__(message)
+        self.code = code
+        self.retry_after = retry_after
+
+
+class CircuitOpenException(ConnectionError):
+    def __init__(self, message, host=None, retry_after=None):
+        super().__init__(message)
+        self.host = host
+        self.retry_after = retry_after
+
+
+class DeadlineException(TimeoutError):
+    def __init__(self, message, budget=None):
+        super().__init__(message)
+        self.budget = budget
@@ -1,24 +1,48 @@
+import argparse
 import logging
-import os
-import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-import requests
-import telegram
-from dotenv import load_dotenv
+import api_client
+import coalesce
+from breaker import BREAKERS, CLOSED, OPEN, guard
+from changes import PendingBatch, detect_changes, queue_change
+from deadlines import Deadline
+from delivery import (DELIVERED_MESSAGE, DELIVERY_FAIL_MESSAGE, DRAIN_TIMEOUT,
+                      DeliveryQueue)
+from digest import DIGEST_WINDOW, Digest
+from exceptions import CircuitOpenException, ResponseCodeException
+from log_config import setup_logging
+from messages import StatusMessages, Template, register_secret
+from metrics import (ERRORS, METRICS_PORT, POLL_LAG, QUEUE_DEPTH,
+                     start_metrics_server, timed)
+from outbox import OUTBOX_FILE, Outbox, idempotency_key
+from records import STATUS_CODES, STATUSES
+from scheduler import AdaptiveScheduler
+from settings import getenv
+from state import STATE_FILE, open_store, tenant_key
+from streaming import CHUNK_SIZE, iter_answer
+from tenants import Tenant, load_tenants
+from timers import POLL_WORKERS, TICK_TIME, TimerDispatcher, TimerHeap
 
-from exceptions import ResponseCodeException
-
-load_dotenv()
-
-PRACTICUM_TOKEN = os.getenv('YP_TOKEN')
-TELEGRAM_TOKEN = os.getenv('T_TOKEN')
-TELEGRAM_CHAT_ID = os.getenv('T_CHAT_ID')
+PRACTICUM_TOKEN = getenv('YP_TOKEN')
+TELEGRAM_TOKEN = getenv('T_TOKEN')
+TELEGRAM_CHAT_ID = getenv('T_CHAT_ID')
+TENANTS_FILE = getenv('TENANTS_FILE')
+ALERT_CHAT_ID = getenv('ALERT_CHAT_ID')
+STREAM_ANSWERS = getenv('STREAM_ANSWERS', '') == '1'
 
 
 RETRY_TIME = 600
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+DEFAULT_ENDPOINT = (
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/')
+DEFAULT_TELEGRAM_BASE_URL = 'https://api.telegram.org/bot'
+ENDPOINT = getenv('PRACTICUM_ENDPOINT', DEFAULT_ENDPOINT)
+TELEGRAM_BASE_URL = getenv('TELEGRAM_BASE_URL', DEFAULT_TELEGRAM_BASE_URL)
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+AUTH_HEADER = 'OAuth {token}'
+LOG_FILE = __file__ + '.log'
 
 
 VERDICTS = {
@@ -27,48 +51,85 @@ VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 TOKENS = ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID',)
-BOT_MESSAGE = ('Бот успешно отправил сообщение - "{message}"'
-               f' в чат {TELEGRAM_CHAT_ID}')
-BOT_MESSAGE_FAIL = 'Отправка сообщения {message} не удалась по причине {error}'
-RESPONSE_EXCEPTION_MESSAGE = (
+BOT_MESSAGE = DELIVERED_MESSAGE
+BOT_MESSAGE_FAIL = DELIVERY_FAIL_MESSAGE
+RESPONSE_EXCEPTION_MESSAGE = Template(
     'При запросе с параметрами {url}, {headers}, {params}'
     ' произошел сбой сети по причине {error}')
-RESPONSE_CODE_EXCEPTION_MESSAGE = (
+RESPONSE_CODE_EXCEPTION_MESSAGE = Template(
     'На запрос с параметрами {url}, {headers}, {params}'
     ' получен код ответа {code}')
-JSON_ERROR_MESSAGE = (
+JSON_ERROR_MESSAGE = Template(
     'На запрос с параметрами {url}, {headers}, {params}'
     ' от сервера получен отказ от обслуживания по причине {error}.'
     'Информация о причине отказа соотвтетствует ключу {key}.')
 WRONG_STATUS_MESSAGE = ('Неожиданный статус {status}'
                         ' домашней работы {name} обнаружен в ответе.')
-TRUE_STATUS_MESSAGE = 'Изменился статус проверки работы "{name}". {verdict}'
-MAIN_EXCEPTION_MESSAGE = 'Сбой в работе программы: {error}'
+TRUE_STATUS_MESSAGE = Template(
+    'Изменился статус проверки работы "{name}". {verdict}')
+MAIN_EXCEPTION_MESSAGE = Template('Сбой в работе программы: {error}')
 CHECK_RESPONSE_TYPE_MESSAGE = ('Тип данных в ответе от API {type}'
                                'не сооответствует ожидаемому')
 CHECK_RESPONSE_KEY_MESSAGE = ('Тип данных по ключу "homeworks" {type}',
                               'не сооответствует ожидаемому')
 CHECK_TOKENS_MESSAGE = 'Переменная окружения {name} не доступна.'
 MAIN_CHECK_TOKENS_MESSAGE = 'Переменные окружения не доступны.'
+TENANTS_LOADED_MESSAGE = 'Загружено подписок из {path}: {count}'
+CIRCUIT_OPEN_ALERT = 'Сервис {host} недоступен, запросы к нему приостановлены'
+CIRCUIT_CLOSED_ALERT = 'Сервис {host} снова доступен'
+DRAIN_TIMEOUT_MESSAGE = ('За {timeout:.0f} с доставлены не все уведомления,'
+                         ' в очереди осталось {depth}; они будут отправлены'
+                         ' при следующем запуске')
+STATUS_MESSAGES = StatusMessages(
+    TRUE_STATUS_MESSAGE, [VERDICTS[status] for status in STATUSES])
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-console_handler = logging.StreamHandler(sys.stdout)
-file_handler = logging.FileHandler(__file__ + '.log')
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
-formatter = logging.Formatter(
-    '%(asctime)s %(levelname)s %(name)s %(funcName)s %(lineno)d %(message)s'
-)
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
+log_listener = None
+
+
+def read_settings():
+    """Перечитывание настроек окружения и учёт токенов как секретов."""
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, TENANTS_FILE
+    global ALERT_CHAT_ID, STREAM_ANSWERS, ENDPOINT, TELEGRAM_BASE_URL, HEADERS
+    PRACTICUM_TOKEN = getenv('YP_TOKEN')
+    TELEGRAM_TOKEN = getenv('T_TOKEN')
+    TELEGRAM_CHAT_ID = getenv('T_CHAT_ID')
+    TENANTS_FILE = getenv('TENANTS_FILE')
+    ALERT_CHAT_ID = getenv('ALERT_CHAT_ID')
+    STREAM_ANSWERS = getenv('STREAM_ANSWERS', '') == '1'
+    ENDPOINT = getenv('PRACTICUM_ENDPOINT', DEFAULT_ENDPOINT)
+    TELEGRAM_BASE_URL = getenv(
+        'TELEGRAM_BASE_URL', DEFAULT_TELEGRAM_BASE_URL)
+    HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+    register_secret(PRACTICUM_TOKEN)
+    register_secret(TELEGRAM_TOKEN)
+
+
+def init():
+    """Подготовка к запуску: настройки и логирование.
+
+    Импорт модуля читает только .env (settings.py) и не настраивает
+    логирование, поэтому точки входа вызывают init() сами; повторный
+    вызов ничего не делает.
+    """
+    global log_listener
+    if log_listener is not None:
+        return
+    read_settings()
+    log_listener = setup_logging(logger, LOG_FILE)
 
 
 def send_message(bot, message):
     """Отправка сообщения в Telegram чат."""
+    return send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+@timed('send_message')
+def send_chat_message(bot, chat_id, message):
+    """Отправка сообщения в указанный Telegram чат."""
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logger.info(BOT_MESSAGE.format(message=message))
+        bot.send_message(chat_id, message)
+        logger.info(BOT_MESSAGE.format(message=message, chat_id=chat_id))
         return True
     except Exception as error:
         logger.exception(BOT_MESSAGE_FAIL.format(message=message, error=error))
@@ -77,24 +138,109 @@ def send_message(bot, message):
 
 def get_api_answer(current_timestamp):
     """Запрос к API-сервису."""
+    return request_api_answer(HEADERS, current_timestamp)
+
+
+@timed('get_api_answer')
+def request_api_answer(headers, current_timestamp, cache_key=None,
+                       deadline=None, batch=None):
+    """Запрос к API-сервису с заголовками конкретной подписки.
+
+    С cache_key запрос условный, а неизменившийся ответ не разбирается:
+    вместо него возвращается None. Новый ответ подтверждается, когда
+    доставлена пачка batch его уведомлений. Тайм-ауты запроса ограничены
+    бюджетом deadline.
+    """
+    import requests
+
+    client = api_client.default_client()
+    if cache_key is not None:
+        headers = {**headers, **client.conditional_headers(cache_key)}
     params = {'from_date': current_timestamp}
     request_parameters = dict(
         url=ENDPOINT,
-        headers=HEADERS,
+        headers=headers,
         params=params,
     )
     try:
-        response = requests.get(**request_parameters)
+        response = client.get(deadline=deadline, **request_parameters)
     except requests.RequestException as error:
         raise ConnectionError(RESPONSE_EXCEPTION_MESSAGE.format(
             **request_parameters, error=error))
-    if response.status_code != 200:
+    observed = None
+    if cache_key is not None:
+        unchanged, observed = client.unchanged(cache_key, response)
+        if unchanged:
+            return None
+    check_status_code(
+        response.status_code, request_parameters,
+        getattr(response, 'headers', {}).get('Retry-After'))
+    answer = check_api_answer(response.json(), request_parameters)
+    if observed is not None and batch is not None:
+        batch.on_complete = client.track(cache_key, observed)
+    return answer
+
+
+def stream_api_answer(headers, current_timestamp, answer, deadline=None):
+    """Потоковый запрос к API: работы отдаются по одной по мере чтения.
+
+    Остальные поля ответа, например current_date, попадают в answer.
+    Бюджет deadline проверяется перед каждой порцией ответа.
+    """
+    import requests
+
+    request_parameters = dict(
+        url=ENDPOINT,
+        headers=headers,
+        params={'from_date': current_timestamp},
+    )
+    try:
+        response = api_client.default_client().get(
+            deadline=deadline, stream=True, **request_parameters)
+    except requests.RequestException as error:
+        raise ConnectionError(RESPONSE_EXCEPTION_MESSAGE.format(
+            **request_parameters, error=error))
+    try:
+        check_status_code(
+            response.status_code, request_parameters,
+            response.headers.get('Retry-After'))
+        chunks = response.iter_content(CHUNK_SIZE)
+        if deadline is not None:
+            chunks = deadline.iterate(chunks)
+        for key, value, item in iter_answer(chunks):
+            if item:
+                yield value
+            else:
+                answer[key] = check_api_answer(
+                    {key: value}, request_parameters)[key]
+    except requests.RequestException as error:
+        raise ConnectionError(RESPONSE_EXCEPTION_MESSAGE.format(
+            **request_parameters, error=error))
+    finally:
+        response.close()
+    check_response(answer)
+
+
+def tenant_headers(token):
+    """Заголовки авторизации для токена подписки."""
+    return {'Authorization': AUTH_HEADER.format(token=token)}
+
+
+def check_status_code(status_code, request_parameters, retry_after=None):
+    """Проверка кода ответа API."""
+    if status_code != 200:
         raise ResponseCodeException(
             RESPONSE_CODE_EXCEPTION_MESSAGE.format(
                 **request_parameters,
-                code=response.status_code
-            ))
-    response = response.json()
+                code=status_code
+            ),
+            code=status_code,
+            retry_after=retry_after,
+        )
+
+
+def check_api_answer(response, request_parameters):
+    """Проверка, что API не отказал в обслуживании."""
     for container in ['code', 'error']:
         if container in response:
             error = response.get(container)
@@ -107,6 +253,7 @@ def get_api_answer(current_timestamp):
     return response
 
 
+@timed('check_response')
 def check_response(response):
     """Проверка ответа API на корректность."""
     if not isinstance(response, dict):
@@ -121,13 +268,15 @@ def check_response(response):
     return homeworks
 
 
+@timed('parse_status')
 def parse_status(homework):
     """Проверка статуса домашней работы."""
     name = homework['homework_name']
     status = homework['status']
-    if status not in VERDICTS:
+    code = STATUS_CODES.get(status)
+    if code is None:
         raise ValueError(WRONG_STATUS_MESSAGE.format(status=status, name=name))
-    return TRUE_STATUS_MESSAGE.format(name=name, verdict=VERDICTS[status])
+    return STATUS_MESSAGES.render(name, code)
 
 
 def check_tokens():
@@ -139,26 +288,294 @@ def check_tokens():
     return True
 
 
-def main():
-    """Основная логика работы бота."""
+def mark_error_sent(tenant, message, sent):
+    """Запоминание доставленного сообщения об ошибке."""
+    if sent:
+        tenant.exception_message = message
+
+
+def pending_changes(tenant, homeworks, batch):
+    """Уведомления о сменившихся статусах, которые нужно отправить.
+
+    Общая часть синхронного и асинхронного опроса. Отдаёт четвёрки
+    (HomeworkRecord, работа, текст, on_sent) по мере разбора homeworks;
+    уведомления, которые уже в очереди, пачка batch только дождётся.
+    """
+    for record, homework in detect_changes(tenant.statuses, homeworks):
+        message = parse_status(homework)
+        on_sent = queue_change(tenant, record.key, record.status, batch)
+        if on_sent is not None:
+            yield record, homework, message, on_sent
+
+
+def poll_error(tenant, error):
+    """Учёт ошибки цикла опроса: метрика, лог и сообщение для чата.
+
+    Вызывается из обработчика исключения. Возвращает сообщение об ошибке
+    или None, если о ней в чат уже сообщали или сервис отключён автоматом.
+    """
+    ERRORS.labels(type(error).__name__).inc()
+    if isinstance(error, CircuitOpenException):
+        logger.debug(str(error))
+        return None
+    message = MAIN_EXCEPTION_MESSAGE.format(error=error)
+    logger.exception(message)
+    if message == tenant.exception_message:
+        return None
+    return message
+
+
+def notify_changes(deliveries, tenant, homeworks, batch):
+    """Постановка в очередь уведомлений о сменившихся статусах."""
+    queued = 0
+    for record, homework, message, on_sent in pending_changes(
+            tenant, homeworks, batch):
+        deliveries.put_status(
+            tenant.chat_id, message, on_sent,
+            record.status, idempotency_key(
+                tenant_key(tenant), record.key, record.status,
+                homework.get('date_updated')))
+        queued += 1
+    return queued
+
+
+def shared_api_answer(tenant, from_date, deadline=None):
+    """Проверенный ответ API для подписки.
+
+    Подписки с общим токеном делят один запрос и его ответ (coalesce).
+    """
+    headers = tenant_headers(tenant.token)
+
+    def fetch():
+        response = request_api_answer(headers, from_date, None, deadline)
+        check_response(response)
+        return response
+
+    if not tenant.shared:
+        return fetch()
+    return coalesce.FLIGHTS.do((tenant.token, from_date), fetch)
+
+
+def fetch_homeworks(tenant, cache_key, deadline, batch):
+    """Ответ API и работы подписки; None, если ответ не изменился.
+
+    Ответ подтверждается после доставки пачки batch.
+    """
+    if tenant.shared:
+        response = shared_api_answer(tenant, tenant.current_date, deadline)
+        return response, response['homeworks']
+    headers = tenant_headers(tenant.token)
+    if STREAM_ANSWERS:
+        response = {}
+        return response, stream_api_answer(
+            headers, tenant.current_date, response, deadline)
+    response = request_api_answer(
+        headers, tenant.current_date, cache_key, deadline, batch)
+    if response is None:
+        return None
+    return response, check_response(response)
+
+
+def poll_tenant(deliveries, tenant, clock=time.monotonic):
+    """Один цикл опроса API и постановки уведомлений в очередь.
+
+    Бюджет опроса отсчитывается по часам clock. Возвращает число
+    уведомлений в очереди и ошибку цикла, если она была.
+    """
+    batch = PendingBatch(tenant)
+    try:
+        answer = fetch_homeworks(
+            tenant, tenant_key(tenant), Deadline(clock=clock), batch)
+        if answer is None:
+            return 0, None
+        response, homeworks = answer
+        queued = notify_changes(deliveries, tenant, homeworks, batch)
+        batch.close(response.get('current_date', tenant.current_date))
+        return queued, None
+    except Exception as error:
+        batch.abandon()
+        message = poll_error(tenant, error)
+        if message is not None:
+            deliveries.put(
+                tenant.chat_id, message,
+                partial(mark_error_sent, tenant, message))
+        return 0, error
+
+
+def get_tenants(clock=time.time):
+    """Список подписок: из реестра TENANTS_FILE или из окружения.
+
+    Курсор новых подписок — текущее время по часам clock.
+    """
+    if TENANTS_FILE:
+        if TELEGRAM_TOKEN is None:
+            logger.critical(CHECK_TOKENS_MESSAGE.format(name='TELEGRAM_TOKEN'))
+            raise ValueError(MAIN_CHECK_TOKENS_MESSAGE)
+        tenants = load_tenants(TENANTS_FILE, int(clock()))
+        logger.info(TENANTS_LOADED_MESSAGE.format(
+            path=TENANTS_FILE, count=len(tenants)))
+        return tenants
     if not check_tokens():
         raise ValueError(MAIN_CHECK_TOKENS_MESSAGE)
-    current_timestamp = int(time.time())
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    exception_message = ''
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            if send_message(bot, check_response(response)[0]):
-                current_timestamp = response.get(
-                    'current_date', current_timestamp)
-        except Exception as error:
-            message = MAIN_EXCEPTION_MESSAGE.format(error=error)
-            logger.exception(message)
-            if message != exception_message:
-                if send_message(bot, message):
-                    exception_message = message
-        time.sleep(RETRY_TIME)
+    return [Tenant(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, int(clock()))]
+
+
+def start_deliveries(send=None, clock=None):
+    """Очередь отправки в Telegram с запущенным рабочим потоком.
+
+    send(chat_id, message) заменяет отправку через Bot API, например
+    симулятором; clock — часы очереди, сводок и журнала, если заданы.
+    """
+    import telegram
+
+    if send is None:
+        bot = telegram.Bot(token=TELEGRAM_TOKEN, base_url=TELEGRAM_BASE_URL)
+        send = timed('send_message')(bot.send_message)
+    send = guard(
+        BREAKERS.for_url(TELEGRAM_BASE_URL), send,
+        telegram.error.NetworkError, telegram.error.BadRequest)
+    clocks = {} if clock is None else {'clock': clock}
+    deliveries = DeliveryQueue(send, logger, **clocks).start()
+    if DIGEST_WINDOW > 0:
+        deliveries = Digest(deliveries, DIGEST_WINDOW, **clocks).start()
+    if OUTBOX_FILE:
+        deliveries = Outbox(OUTBOX_FILE, deliveries, logger, **clocks).start()
+    return deliveries
+
+
+def alert_circuit(deliveries, host, previous, state):
+    """Одно оповещение на сбой хоста вместо ошибок каждой подписки.
+
+    Повторное размыкание после пробного запроса не оповещает заново.
+    """
+    if state == OPEN and previous == CLOSED:
+        message = CIRCUIT_OPEN_ALERT.format(host=host)
+        logger.error(message)
+    elif state == CLOSED:
+        message = CIRCUIT_CLOSED_ALERT.format(host=host)
+        logger.info(message)
+    else:
+        return
+    chat_id = ALERT_CHAT_ID or TELEGRAM_CHAT_ID
+    if chat_id:
+        deliveries.put(chat_id, message)
+
+
+def poll_and_reschedule(deliveries, store, scheduler, tenant,
+                        clock=time.time):
+    """Опрос подписки, запоминание её состояния и срок следующего опроса."""
+    if tenant.next_poll:
+        POLL_LAG.observe(max(clock() - tenant.next_poll, 0))
+    sent, error = poll_tenant(deliveries, tenant, clock)
+    store.remember(tenant)
+    return scheduler.reschedule(tenant, sent, error, clock())
+
+
+def run_bot(tenants, coordinator=None, metrics_port=METRICS_PORT,
+            clock=time.time, sleep=None, send=None, on_tick=None,
+            tick=TICK_TIME):
+    """Цикл опроса подписок.
+
+    Без coordinator опрашиваются все подписки, иначе только те, которые
+    координатор закрепил за этим узлом. Время берётся из clock, а с sleep
+    цикл не ждёт следующего срока, а переводит часы (TimerDispatcher).
+    send заменяет отправку через Bot API. on_tick(dispatcher, deliveries)
+    вызывается не реже раза в tick секунд; цикл завершается вызовом
+    dispatcher.stop().
+    """
+    store = open_store(STATE_FILE, clock=clock)
+    store.restore(tenants)
+    scheduler = AdaptiveScheduler(RETRY_TIME)
+    deliveries = start_deliveries(send, clock)
+    alert = partial(alert_circuit, deliveries)
+    BREAKERS.subscribe(alert)
+
+    def handle(tenant):
+        if coordinator is not None and not coordinator.owns(tenant):
+            return None
+        return poll_and_reschedule(
+            deliveries, store, scheduler, tenant, clock)
+
+    timers = TimerHeap()
+    if coordinator is None:
+        for tenant in tenants:
+            timers.schedule(tenant, tenant.next_poll)
+    dispatcher = TimerDispatcher(
+        timers, handle, clock=clock, logger=logger, sleep=sleep)
+
+    def on_dispatched():
+        store.maybe_flush()
+        if coordinator is not None:
+            coordinator.rebalance(dispatcher, store)
+        if on_tick is not None:
+            on_tick(dispatcher, deliveries)
+
+    QUEUE_DEPTH.set_function(deliveries.depth, 'delivery')
+    QUEUE_DEPTH.set_function(timers.__len__, 'timers')
+    if metrics_port:
+        start_metrics_server(metrics_port)
+    try:
+        dispatcher.run(on_dispatched, tick)
+    finally:
+        BREAKERS.unsubscribe(alert)
+        deliveries.stop()
+        for tenant in tenants:
+            if coordinator is None or coordinator.owns(tenant):
+                store.remember(tenant)
+        store.close()
+        if coordinator is not None:
+            coordinator.leave()
+
+
+def drain_deliveries(deliveries):
+    """Ожидание доставки не дольше DRAIN_TIMEOUT секунд.
+
+    Курсоры подписок с недоставленными уведомлениями не сдвигаются,
+    поэтому следующий запуск поставит эти уведомления в очередь снова.
+    """
+    if not deliveries.drain(DRAIN_TIMEOUT):
+        logger.warning(DRAIN_TIMEOUT_MESSAGE.format(
+            timeout=DRAIN_TIMEOUT, depth=deliveries.depth()))
+
+
+def run_once(tenants):
+    """Один опрос всех подписок и доставка уведомлений, затем выход."""
+    store = open_store(STATE_FILE)
+    store.restore(tenants)
+    deliveries = start_deliveries()
+    alert = partial(alert_circuit, deliveries)
+    BREAKERS.subscribe(alert)
+    try:
+        with ThreadPoolExecutor(max_workers=POLL_WORKERS) as pool:
+            list(pool.map(partial(poll_tenant, deliveries), tenants))
+        drain_deliveries(deliveries)
+    finally:
+        BREAKERS.unsubscribe(alert)
+        deliveries.stop(DRAIN_TIMEOUT)
+        for tenant in tenants:
+            store.remember(tenant)
+        store.close()
+
+
+def parse_args():
+    """Режим запуска из командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Бот статусов домашних работ Практикума')
+    parser.add_argument(
+        '--once', action='store_true',
+        help='один опрос и отправка уведомлений, например из cron')
+    return parser.parse_args()
+
+
+def main():
+    """Основная логика работы бота."""
+    args = parse_args()
+    init()
+    tenants = get_tenants()
+    if args.once:
+        run_once(tenants)
+    else:
+        run_bot(tenants)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,105 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import sys
+from logging.handlers import (QueueHandler, QueueListener,
+                              RotatingFileHandler, TimedRotatingFileHandler)
+
+from messages import redact
+from settings import getenv
+
+LOG_LEVEL = getenv('LOG_LEVEL', 'DEBUG')
+LOG_FORMAT = getenv('LOG_FORMAT', 'text')
+LOG_ROTATION = getenv('LOG_ROTATION', 'size')
+LOG_MAX_BYTES = int(getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_WHEN = getenv('LOG_WHEN', 'midnight')
+LOG_BACKUP_COUNT = int(getenv('LOG_BACKUP_COUNT', 5))
+LOG_COMPRESS = getenv('LOG_COMPRESS', '') == '1'
+TEXT_FORMAT = (
+    '%(asctime)s %(levelname)s %(name)s %(funcName)s %(lineno)d %(message)s'
+)
+
+
+class RedactingFormatter(logging.Formatter):
+    """Формат записи, в трассировках которой скрыты секреты."""
+
+    def formatException(self, exc_info):
+        """Трассировка исключения без токенов."""
+        return redact(super().formatException(exc_info))
+
+
+class JsonFormatter(RedactingFormatter):
+    """Запись лога одной строкой JSON."""
+
+    def format(self, record):
+        """Поля записи и трассировка исключения в JSON."""
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'function': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def gzip_namer(name):
+    """Имя архива для ротированного файла."""
+    return name + '.gz'
+
+
+def gzip_rotator(source, destination):
+    """Сжатие ротированного файла."""
+    with open(source, 'rb') as log_file:
+        with gzip.open(destination, 'wb') as archive:
+            shutil.copyfileobj(log_file, archive)
+    os.remove(source)
+
+
+def file_handler(path, rotation=LOG_ROTATION, compress=LOG_COMPRESS):
+    """Файловый обработчик с ротацией по размеру или по времени."""
+    if rotation == 'time':
+        handler = TimedRotatingFileHandler(
+            path, when=LOG_WHEN, backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8')
+    else:
+        handler = RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8')
+    if compress:
+        handler.namer = gzip_namer
+        handler.rotator = gzip_rotator
+    return handler
+
+
+def stop_logging(listener):
+    """Запись оставшихся в очереди записей и остановка потока."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_logging(logger, path, log_format=LOG_FORMAT, level=LOG_LEVEL):
+    """Неблокирующий вывод лога через очередь.
+
+    Логгер только кладёт записи в очередь, а в консоль и в файл их пишет
+    отдельный поток QueueListener.
+    """
+    formatter = (JsonFormatter() if log_format == 'json'
+                 else RedactingFormatter(TEXT_FORMAT))
+    handlers = [logging.StreamHandler(sys.stdout), file_handler(path)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.SimpleQueue()
+    logger.setLevel(level)
+    logger.addHandler(QueueHandler(records))
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_logging, listener)
+    return listener
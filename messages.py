@@ -0,0 +1,95 @@
+"""Шаблоны сообщений бота, кэш уведомлений и скрытие секретов.
+
+Тексты уведомлений о статусах зависят только от названия работы и кода
+статуса, поэтому собираются один раз и дальше берутся из LRU-кэша.
+Шаблоны ошибок перед выводом очищаются от токенов.
+"""
+import re
+import string
+from functools import lru_cache
+
+from settings import getenv
+
+MESSAGE_CACHE_SIZE = int(getenv('MESSAGE_CACHE_SIZE', 16384))
+REDACTED = '***'
+OAUTH_PATTERN = re.compile(r'(OAuth\s+)[^\s\'",}]+')
+SECRETS = set()
+TEMPLATE_FIELDS_MESSAGE = 'В шаблоне {template!r} нет полей {fields}'
+
+
+def register_secret(secret):
+    """Значение, которое не должно попадать в сообщения и логи."""
+    if secret:
+        SECRETS.add(str(secret))
+
+
+def redact(text):
+    """Текст без OAuth-токенов и зарегистрированных секретов."""
+    text = OAUTH_PATTERN.sub(r'\g<1>' + REDACTED, text)
+    for secret in SECRETS:
+        if secret in text:
+            text = text.replace(secret, REDACTED)
+    return text
+
+
+class Template:
+    """Шаблон сообщения, разобранный один раз при создании.
+
+    format() совместим с str.format, но результат очищается от секретов,
+    поэтому заголовки запроса можно подставлять в текст ошибки как есть.
+    """
+
+    __slots__ = ('text', 'fields', 'render')
+
+    def __init__(self, text):
+        """Разбор шаблона и проверка имён полей."""
+        self.text = text
+        self.fields = frozenset(
+            field for _, field, _, _ in string.Formatter().parse(text)
+            if field)
+        self.render = text.format
+
+    def __str__(self):
+        """Исходный текст шаблона."""
+        return self.text
+
+    def format(self, **values):
+        """Подстановка значений и скрытие секретов."""
+        return redact(self.render(**values))
+
+    def check(self, *fields):
+        """Проверка, что шаблон содержит все нужные поля."""
+        missing = set(fields) - self.fields
+        if missing:
+            raise ValueError(TEMPLATE_FIELDS_MESSAGE.format(
+                template=self.text, fields=', '.join(sorted(missing))))
+        return self
+
+
+class StatusMessages:
+    """Тексты уведомлений о статусах с кэшем по (название, код статуса).
+
+    verdicts — вердикты в порядке кодов статусов; для другого языка
+    достаточно создать экземпляр с переведёнными шаблоном и вердиктами.
+    """
+
+    def __init__(self, template, verdicts, cache_size=MESSAGE_CACHE_SIZE):
+        """Шаблон с полями name и verdict и вердикты по кодам."""
+        self.template = template.check('name', 'verdict')
+        self.verdicts = tuple(verdicts)
+        self.cached = lru_cache(maxsize=cache_size)(self.compose)
+
+    def compose(self, name, code):
+        """Сборка текста без кэша."""
+        return self.template.render(name=name, verdict=self.verdicts[code])
+
+    def render(self, name, code):
+        """Текст уведомления; нехешируемое название собирается без кэша."""
+        try:
+            return self.cached(name, code)
+        except TypeError:
+            return self.compose(name, code)
+
+    def cache_info(self):
+        """Статистика попаданий в кэш."""
+        return self.cached.cache_info()
@@ -0,0 +1,315 @@
+import math
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from settings import getenv
+
+METRICS_PORT = getenv('METRICS_PORT')
+METRICS_HOST = getenv('METRICS_HOST', '127.0.0.1')
+LATENCY_BUCKETS = (0.00001, 0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LAG_BUCKETS = (0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 600)
+QUANTILE_WINDOW = int(getenv('QUANTILE_WINDOW', 1000))
+QUANTILE_REFRESH = int(getenv('QUANTILE_REFRESH', 50))
+EXPORTED_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(names, values, extra=()):
+    """Метки в формате Prometheus: {name="value",...}."""
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('"', '\\"'))
+        for name, value in pairs) + '}'
+
+
+class Metric:
+    """Метрика с метками; значения для каждого набора меток свои."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        """Имя, описание и имена меток метрики."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.children = {}
+
+    def labels(self, *values, **labels):
+        """Значение метрики для набора меток."""
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        with self.lock:
+            child = self.children.get(values)
+            if child is None:
+                child = self.children[values] = self.new_child()
+        return child
+
+    def new_child(self):
+        """Новое значение метрики."""
+        raise NotImplementedError
+
+    def samples(self):
+        """Строки выборки для всех наборов меток."""
+        raise NotImplementedError
+
+    def render(self):
+        """Текстовое представление метрики."""
+        return '\n'.join([
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+            *self.samples(),
+        ])
+
+
+class CounterValue:
+    """Значение счётчика."""
+
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        """Счётчик начинается с нуля."""
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Увеличение счётчика."""
+        with self.lock:
+            self.value += amount
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def new_child(self):
+        """Новый счётчик."""
+        return CounterValue()
+
+    def inc(self, amount=1):
+        """Увеличение счётчика без меток."""
+        self.labels().inc(amount)
+
+    def samples(self):
+        """Значения счётчика."""
+        return [
+            f'{self.name}{format_labels(self.labelnames, values)} '
+            f'{child.value}'
+            for values, child in list(self.children.items())
+        ]
+
+
+class HistogramValue:
+    """Распределение наблюдений по корзинам."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, buckets):
+        """Пустое распределение."""
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        """Учёт одного наблюдения."""
+        with self.lock:
+            self.sum += value
+            self.count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+
+class Histogram(Metric):
+    """Гистограмма длительностей."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        """Гистограмма с заданными верхними границами корзин."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def new_child(self):
+        """Новая пустая гистограмма."""
+        return HistogramValue(self.buckets)
+
+    def observe(self, value):
+        """Наблюдение без меток."""
+        self.labels().observe(value)
+
+    def samples(self):
+        """Накопительные корзины, сумма и число наблюдений."""
+        lines = []
+        for values, child in list(self.children.items()):
+            cumulative = 0
+            for bound, count in zip(child.buckets, child.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket' + format_labels(
+                    self.labelnames, values, [('le', bound)])
+                    + f' {cumulative}')
+            labels = format_labels(self.labelnames, values)
+            lines.append(
+                f'{self.name}_bucket'
+                + format_labels(self.labelnames, values, [('le', '+Inf')])
+                + f' {child.count}')
+            lines.append(f'{self.name}_sum{labels} {child.sum}')
+            lines.append(f'{self.name}_count{labels} {child.count}')
+        return lines
+
+
+class Gauge(Metric):
+    """Мгновенное значение, которое вычисляется при каждом чтении."""
+
+    kind = 'gauge'
+
+    def new_child(self):
+        """Значения датчика задаются функциями через set_function."""
+        return None
+
+    def set_function(self, function, *values):
+        """Функция, возвращающая текущее значение."""
+        with self.lock:
+            self.children[tuple(values)] = function
+
+    def samples(self):
+        """Текущие значения датчика."""
+        return [
+            f'{self.name}{format_labels(self.labelnames, values)} '
+            f'{function()}'
+            for values, function in list(self.children.items())
+        ]
+
+
+class SlidingQuantiles:
+    """Квантили по последним window наблюдениям.
+
+    Отсортированная копия окна пересобирается не чаще, чем раз в refresh
+    наблюдений, поэтому чтение квантилей почти ничего не стоит.
+    """
+
+    def __init__(self, window=QUANTILE_WINDOW, refresh=QUANTILE_REFRESH):
+        """Окно из window последних наблюдений."""
+        self.values = deque(maxlen=window)
+        self.refresh = refresh
+        self.lock = threading.Lock()
+        self.ordered = []
+        self.stale = 0
+
+    def observe(self, value):
+        """Учёт одного наблюдения."""
+        with self.lock:
+            self.values.append(value)
+            self.stale += 1
+
+    def __len__(self):
+        """Число наблюдений в окне."""
+        return len(self.values)
+
+    def quantile(self, q):
+        """Квантиль q окна; NaN, пока наблюдений нет."""
+        with self.lock:
+            if self.stale >= self.refresh or (
+                    self.stale and len(self.values) < self.refresh):
+                self.ordered = sorted(self.values)
+                self.stale = 0
+            ordered = self.ordered
+        if not ordered:
+            return math.nan
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Registry:
+    """Набор метрик, которые отдаются одной страницей."""
+
+    def __init__(self):
+        """Пустой набор."""
+        self.metrics = {}
+
+    def register(self, metric):
+        """Регистрация метрики; повторная регистрация возвращает прежнюю."""
+        return self.metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        return '\n'.join(
+            metric.render() for metric in self.metrics.values()) + '\n'
+
+
+REGISTRY = Registry()
+CALL_SECONDS = REGISTRY.register(Histogram(
+    'homework_call_seconds',
+    'Длительность вызовов на пути опрос-проверка-отправка',
+    ['function']))
+ERRORS = REGISTRY.register(Counter(
+    'homework_errors_total', 'Ошибки цикла опроса по типу', ['type']))
+POLL_LAG = REGISTRY.register(Histogram(
+    'homework_poll_lag_seconds', 'Опоздание опроса относительно расписания',
+    buckets=LAG_BUCKETS))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'homework_queue_depth', 'Глубина очередей', ['queue']))
+
+
+def timed(function_name):
+    """Декоратор: длительность вызова попадает в CALL_SECONDS."""
+    histogram = CALL_SECONDS.labels(function_name)
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def metrics_handler(registry=REGISTRY):
+    """Класс обработчика страницы /metrics для registry.
+
+    http.server импортируется только при запуске сервера метрик.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Страница /metrics в текстовом формате Prometheus."""
+
+        def do_GET(self):
+            """Отдача метрик."""
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            """Запросы к метрикам не пишутся в лог."""
+
+    return MetricsHandler
+
+
+def start_metrics_server(port, host=METRICS_HOST, registry=REGISTRY):
+    """Запуск HTTP-сервера метрик в фоновом потоке."""
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer(
+        (host, int(port)), metrics_handler(registry))
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
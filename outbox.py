@@ -0,0 +1,282 @@
+"""Журнал исходящих уведомлений, переживающий падение процесса.
+
+Уведомление о статусе сначала записывается в таблицу SQLite и только
+после фиксации считается принятым: подписка запоминает статус и
+сдвигает курсор, не дожидаясь Telegram. Рабочий поток журнала отдаёт
+записи в очередь отправки и отмечает доставленные. После падения
+неотмеченные записи отправляются заново, а повторный опрос тех же работ
+не создаёт дублей: у каждой записи есть ключ идемпотентности.
+
+Записи фиксируются группами, а база работает в режиме WAL с
+synchronous=NORMAL, поэтому fsync выполняется не на каждое уведомление,
+а при контрольных точках. Фиксация переживает падение процесса; при
+отключении питания могут потеряться последние группы.
+"""
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from functools import partial
+
+from metrics import REGISTRY, Counter
+from settings import getenv
+
+OUTBOX_FILE = getenv('OUTBOX_FILE')
+OUTBOX_COMMIT_INTERVAL = float(getenv('OUTBOX_COMMIT_INTERVAL', 0.05))
+OUTBOX_ATTEMPTS = int(getenv('OUTBOX_ATTEMPTS', 5))
+OUTBOX_RETRY_TIME = float(getenv('OUTBOX_RETRY_TIME', 60))
+OUTBOX_CLAIM_TIME = float(getenv('OUTBOX_CLAIM_TIME', 600))
+OUTBOX_SCAN_INTERVAL = float(getenv('OUTBOX_SCAN_INTERVAL', 30))
+OUTBOX_RETENTION = float(getenv('OUTBOX_RETENTION', 7 * 24 * 60 * 60))
+TICK_TIME = 1.0
+OUTBOX_GAVE_UP_MESSAGE = ('Уведомление {key} в чат {chat_id} не доставлено'
+                          ' после {attempts} попыток')
+OUTBOX_RECOVERED_MESSAGE = ('Из журнала повторно отправляется'
+                            ' уведомлений: {count}')
+
+OUTBOX_EVENTS = REGISTRY.register(Counter(
+    'homework_outbox_events_total', 'События журнала уведомлений',
+    ['event']))
+
+
+def idempotency_key(*parts):
+    """Ключ записи журнала из частей, однозначно задающих уведомление."""
+    return hashlib.blake2b(
+        '\x1f'.join(map(str, parts)).encode(), digest_size=16).hexdigest()
+
+
+class Outbox:
+    """Журнал уведомлений перед очередью отправки deliveries.
+
+    Обычные сообщения, например об ошибках, идут мимо журнала.
+    """
+
+    def __init__(self, path, deliveries, logger,
+                 commit_interval=OUTBOX_COMMIT_INTERVAL,
+                 attempts=OUTBOX_ATTEMPTS, retry_time=OUTBOX_RETRY_TIME,
+                 claim_time=OUTBOX_CLAIM_TIME,
+                 scan_interval=OUTBOX_SCAN_INTERVAL,
+                 retention=OUTBOX_RETENTION, clock=time.time):
+        """Журнал в файле SQLite path.
+
+        Запись, отданная в очередь, закрепляется за процессом на
+        claim_time секунд; недоставленная запись повторяется через
+        retry_time секунд с удвоением, но не больше attempts раз.
+        """
+        self.deliveries = deliveries
+        self.logger = logger
+        self.commit_interval = commit_interval
+        self.attempts = attempts
+        self.retry_time = retry_time
+        self.claim_time = claim_time
+        self.scan_interval = scan_interval
+        self.retention = retention
+        self.clock = clock
+        self.commands = queue.SimpleQueue()
+        self.inflight = set()
+        self.idle = threading.Condition()
+        self.uncommitted = 0
+        self.unfinished = 0
+        self.stopped = threading.Event()
+        self.thread = None
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS outbox ('
+                'id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, '
+                'chat_id NOT NULL, message TEXT NOT NULL, status INTEGER, '
+                'created REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, '
+                'retry_at REAL NOT NULL, delivered_at REAL, '
+                'gave_up INTEGER NOT NULL DEFAULT 0)')
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS outbox_pending ON outbox '
+                '(retry_at) WHERE delivered_at IS NULL AND gave_up = 0')
+
+    def put(self, chat_id, message, on_sent=None):
+        """Обычное сообщение уходит в очередь мимо журнала."""
+        self.deliveries.put(chat_id, message, on_sent)
+
+    def put_status(self, chat_id, message, on_sent=None, status=None,
+                   key=None):
+        """Запись уведомления; on_sent(True) — после фиксации в журнале."""
+        if key is None:
+            key = idempotency_key(chat_id, message)
+        with self.idle:
+            self.uncommitted += 1
+            self.unfinished += 1
+        self.commands.put(('add', chat_id, message, status, key, on_sent))
+
+    def mark(self, row_id, sent):
+        """Результат отправки записи; фиксируется следующей группой."""
+        self.commands.put(('mark', row_id, sent))
+
+    def collect(self, timeout):
+        """Команды следующей группы: первая и пришедшие за commit_interval.
+
+        None в очереди команд только будит поток, например при остановке.
+        """
+        try:
+            command = self.commands.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        commands = []
+        linger_until = time.monotonic() + self.commit_interval
+        while command is not None:
+            commands.append(command)
+            try:
+                command = self.commands.get(
+                    timeout=max(linger_until - time.monotonic(), 0))
+            except queue.Empty:
+                break
+        return commands
+
+    def step(self, timeout=TICK_TIME):
+        """Фиксация одной группы команд и передача записей в очередь."""
+        commands = self.collect(timeout)
+        if not commands:
+            return False
+        now = self.clock()
+        added = []
+        finished = 0
+        with self.connection:
+            for command in commands:
+                if command[0] == 'add':
+                    added.append(self.insert(now, *command[1:]))
+                else:
+                    self.record(now, *command[1:])
+                    finished += 1
+        for row_id, chat_id, message, status, on_sent in added:
+            if on_sent is not None:
+                on_sent(True)
+            if row_id is None:
+                OUTBOX_EVENTS.labels('duplicate').inc()
+                finished += 1
+            else:
+                self.dispatch(row_id, chat_id, message, status)
+        self.settle(len(added), finished)
+        return True
+
+    def insert(self, now, chat_id, message, status, key, on_sent):
+        """Новая запись, сразу закреплённая за процессом; дубль — None."""
+        cursor = self.connection.execute(
+            'INSERT OR IGNORE INTO outbox (key, chat_id, message, status, '
+            'created, retry_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (key, chat_id, message, status, now, now + self.claim_time))
+        row_id = cursor.lastrowid if cursor.rowcount else None
+        return row_id, chat_id, message, status, on_sent
+
+    def record(self, now, row_id, sent):
+        """Отметка доставки или откладывание повторной попытки."""
+        self.inflight.discard(row_id)
+        if sent:
+            OUTBOX_EVENTS.labels('delivered').inc()
+            self.connection.execute(
+                'UPDATE outbox SET delivered_at = ? WHERE id = ?',
+                (now, row_id))
+            return
+        OUTBOX_EVENTS.labels('failed').inc()
+        self.connection.execute(
+            'UPDATE outbox SET attempts = attempts + 1, retry_at = ? '
+            '+ ? * (1 << attempts), gave_up = attempts + 1 >= ? '
+            'WHERE id = ?', (now, self.retry_time, self.attempts, row_id))
+        key, chat_id, attempts = self.connection.execute(
+            'SELECT key, chat_id, attempts FROM outbox WHERE id = ?',
+            (row_id,)).fetchone()
+        if attempts >= self.attempts:
+            self.logger.error(OUTBOX_GAVE_UP_MESSAGE.format(
+                key=key, chat_id=chat_id, attempts=attempts))
+
+    def dispatch(self, row_id, chat_id, message, status):
+        """Передача записи в очередь отправки."""
+        self.inflight.add(row_id)
+        self.deliveries.put_status(
+            chat_id, message, partial(self.mark, row_id), status)
+
+    def settle(self, committed, finished):
+        """Учёт зафиксированных и завершённых записей для drain()."""
+        with self.idle:
+            self.uncommitted -= committed
+            self.unfinished -= finished
+            self.idle.notify_all()
+
+    def scan(self):
+        """Повтор записей без отметки и удаление старых записей.
+
+        Запись закрепляется за процессом условным UPDATE, поэтому два
+        процесса с общим журналом не отправят её оба.
+        """
+        now = self.clock()
+        rows = self.connection.execute(
+            'SELECT id, chat_id, message, status FROM outbox '
+            'WHERE delivered_at IS NULL AND gave_up = 0 AND retry_at <= ?',
+            (now,)).fetchall()
+        claimed = []
+        with self.connection:
+            for row in rows:
+                if row[0] in self.inflight:
+                    continue
+                if self.connection.execute(
+                        'UPDATE outbox SET retry_at = ? '
+                        'WHERE id = ? AND retry_at <= ?',
+                        (now + self.claim_time, row[0], now)).rowcount:
+                    claimed.append(row)
+            self.connection.execute(
+                'DELETE FROM outbox WHERE (delivered_at IS NOT NULL '
+                'OR gave_up = 1) AND created < ?', (now - self.retention,))
+        if claimed:
+            OUTBOX_EVENTS.labels('recovered').inc(len(claimed))
+            self.logger.warning(
+                OUTBOX_RECOVERED_MESSAGE.format(count=len(claimed)))
+        with self.idle:
+            self.unfinished += len(claimed)
+        for row in claimed:
+            self.dispatch(*row)
+        return len(claimed)
+
+    def run(self):
+        """Цикл рабочего потока до вызова stop()."""
+        self.scan()
+        scanned = time.monotonic()
+        while not self.stopped.is_set():
+            self.step()
+            if time.monotonic() - scanned >= self.scan_interval:
+                self.scan()
+                scanned = time.monotonic()
+        while self.step(0):
+            pass
+
+    def start(self):
+        """Запуск рабочего потока журнала."""
+        self.thread = threading.Thread(
+            target=self.run, name='telegram-outbox', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Фиксация оставшихся команд, остановка потока и очереди."""
+        self.stopped.set()
+        self.commands.put(None)
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self.deliveries.stop(timeout)
+        self.connection.close()
+
+    def drain(self, timeout=None):
+        """Ожидание фиксации и доставки всех записей журнала."""
+        with self.idle:
+            if not self.idle.wait_for(lambda: not self.uncommitted, timeout):
+                return False
+        self.deliveries.drain(timeout)
+        with self.idle:
+            return self.idle.wait_for(lambda: not self.unfinished, timeout)
+
+    def depth(self):
+        """Сообщения в очереди и записи, ждущие фиксации."""
+        return self.deliveries.depth() + self.uncommitted
+
+    def stats(self):
+        """Статистика очереди отправки."""
+        return self.deliveries.stats()
@@ -0,0 +1,110 @@
+"""Компактное представление домашних работ в памяти.
+
+Словари из ответа API не хранятся: работа переводится в запись с ключом,
+названием и кодом статуса, а подписка запоминает только отправленные
+статусы «ключ → код». Строки ключей и названий интернируются, а статус
+хранится малым целым, поэтому повторяющиеся значения не копируются.
+"""
+import json
+import sys
+import tracemalloc
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+REVIEWING = STATUS_CODES['reviewing']
+
+
+def status_code(status):
+    """Код статуса или None для неизвестного статуса."""
+    return STATUS_CODES.get(status)
+
+
+def status_name(code):
+    """Название статуса по коду."""
+    return STATUSES[code]
+
+
+def intern_key(key):
+    """Ключ работы, разделяемый всеми записями с тем же значением."""
+    return sys.intern(str(key))
+
+
+def homework_key(homework):
+    """Ключ домашней работы: её id, а без него — название."""
+    return intern_key(homework.get('id', homework.get('homework_name')))
+
+
+class HomeworkRecord:
+    """Работа из ответа API: ключ, название и код статуса."""
+
+    __slots__ = ('key', 'name', 'status')
+
+    def __init__(self, key, name, status):
+        """Запись с уже интернированными строками и кодом статуса."""
+        self.key = key
+        self.name = name
+        self.status = status
+
+    def __repr__(self):
+        """Представление с названием статуса."""
+        status = None if self.status is None else status_name(self.status)
+        return f'HomeworkRecord({self.key!r}, {self.name!r}, {status!r})'
+
+    @classmethod
+    def from_homework(cls, homework):
+        """Запись из словаря работы в ответе API."""
+        name = homework.get('homework_name')
+        return cls(
+            homework_key(homework),
+            sys.intern(name) if isinstance(name, str) else name,
+            status_code(homework.get('status')),
+        )
+
+
+def encode_statuses(statuses):
+    """Отправленные статусы в виде названий для сохранения."""
+    return {key: status_name(code) for key, code in statuses.items()}
+
+
+def decode_statuses(statuses):
+    """Сохранённые статусы в виде кодов с интернированными ключами.
+
+    Неизвестные статусы пропускаются: по ним уведомлений не бывает.
+    """
+    decoded = {}
+    for key, status in statuses.items():
+        code = status if isinstance(status, int) else status_code(status)
+        if code is not None:
+            decoded[intern_key(key)] = code
+    return decoded
+
+
+def measure_homework_memory(count=10000):
+    """Байты на отслеживаемую работу: словарь из JSON и отправленный статус.
+
+    Возвращает пару (словари, статусы) для ответа из count работ с
+    повторяющимися названиями и статусами. Статусы — то, что подписка
+    хранит между опросами вместо словарей ответа.
+    """
+    payload = json.dumps({'homeworks': [
+        {'id': index, 'status': STATUSES[index % len(STATUSES)],
+         'homework_name': f'student__hw{index % 20}.zip',
+         'reviewer_comment': 'Комментарий ревьюера',
+         'date_updated': '2022-02-13T14:40:57Z',
+         'lesson_name': 'Итоговый проект'}
+        for index in range(count)
+    ]})
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        homeworks = json.loads(payload)['homeworks']
+        raw = tracemalloc.get_traced_memory()[0] - before
+        before = tracemalloc.get_traced_memory()[0]
+        statuses = {}
+        for homework in homeworks:
+            record = HomeworkRecord.from_homework(homework)
+            statuses[record.key] = record.status
+        compact = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return raw / count, compact / len(statuses)
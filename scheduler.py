@@ -0,0 +1,80 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from exceptions import ResponseCodeException
+from records import REVIEWING
+from settings import getenv
+
+REVIEWING_RETRY_TIME = int(getenv('REVIEWING_RETRY_TIME', 120))
+IDLE_RETRY_TIME = int(getenv('IDLE_RETRY_TIME', 3600))
+IDLE_FACTOR = float(getenv('IDLE_FACTOR', 1.5))
+ERROR_RETRY_TIME = int(getenv('ERROR_RETRY_TIME', 60))
+MAX_BACKOFF_TIME = int(getenv('MAX_BACKOFF_TIME', 3600))
+JITTER = float(getenv('POLL_JITTER', 0.1))
+BACKOFF_ERRORS = (ConnectionError, TimeoutError, ResponseCodeException)
+
+
+def parse_retry_after(value, now=None):
+    """Секунды ожидания из заголовка Retry-After: число или HTTP-дата."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(moment - (time.time() if now is None else now), 0)
+
+
+class AdaptiveScheduler:
+    """Выбор времени следующего опроса по недавней активности подписки."""
+
+    def __init__(self, retry_time, reviewing_retry_time=REVIEWING_RETRY_TIME,
+                 idle_retry_time=IDLE_RETRY_TIME, idle_factor=IDLE_FACTOR,
+                 error_retry_time=ERROR_RETRY_TIME,
+                 max_backoff_time=MAX_BACKOFF_TIME, jitter=JITTER, rng=None):
+        """Интервалы в секундах, jitter — доля случайного разброса."""
+        self.retry_time = retry_time
+        self.reviewing_retry_time = reviewing_retry_time
+        self.idle_retry_time = idle_retry_time
+        self.idle_factor = idle_factor
+        self.error_retry_time = error_retry_time
+        self.max_backoff_time = max_backoff_time
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+
+    def next_delay(self, tenant, sent, error):
+        """Пауза до следующего опроса и обновление счётчиков подписки."""
+        if isinstance(error, BACKOFF_ERRORS):
+            tenant.failures += 1
+            delay = min(
+                self.error_retry_time * 2 ** (tenant.failures - 1),
+                self.max_backoff_time)
+            retry_after = parse_retry_after(
+                getattr(error, 'retry_after', None))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            return self.spread(delay)
+        tenant.failures = 0
+        if sent:
+            tenant.idle_polls = 0
+        elif error is None:
+            tenant.idle_polls += 1
+        if REVIEWING in tenant.statuses.values():
+            return self.spread(self.reviewing_retry_time)
+        return self.spread(min(
+            self.retry_time * self.idle_factor ** tenant.idle_polls,
+            max(self.idle_retry_time, self.retry_time)))
+
+    def spread(self, delay):
+        """Случайный разброс, чтобы подписки не опрашивали API разом."""
+        return delay * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def reschedule(self, tenant, sent, error, now):
+        """Назначение времени следующего опроса подписки."""
+        tenant.next_poll = now + self.next_delay(tenant, sent, error)
+        return tenant.next_poll
@@ -0,0 +1,49 @@
+import os
+from os.path import abspath, dirname, join
+
+ENV_FILE = os.getenv('ENV_FILE', join(dirname(abspath(__file__)), '.env'))
+EXPORT_PREFIX = 'export '
+QUOTES = ('"', "'")
+
+loaded = False
+
+
+def parse_env(lines):
+    """Пары «имя, значение» из строк файла .env.
+
+    Пустые строки и комментарии пропускаются, префикс export и кавычки
+    вокруг значения отбрасываются.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#') or '=' not in line:
+            continue
+        if line.startswith(EXPORT_PREFIX):
+            line = line[len(EXPORT_PREFIX):]
+        name, value = (part.strip() for part in line.split('=', 1))
+        if len(value) > 1 and value[0] in QUOTES and value[-1] == value[0]:
+            value = value[1:-1]
+        yield name, value
+
+
+def load_env(path=ENV_FILE):
+    """Загрузка .env без перезаписи переменных, уже заданных окружением."""
+    try:
+        with open(path, encoding='utf-8') as env_file:
+            for name, value in parse_env(env_file):
+                os.environ.setdefault(name, value)
+    except FileNotFoundError:
+        pass
+
+
+def getenv(name, default=None):
+    """Настройка окружения; первое чтение загружает файл .env.
+
+    Модули читают настройки при импорте, поэтому .env загружается раньше
+    любой из них, а не в init().
+    """
+    global loaded
+    if not loaded:
+        loaded = True
+        load_env()
+    return os.getenv(name, default)
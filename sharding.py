@@ -0,0 +1,338 @@
+"""Распределение подписок между процессами и узлами.
+
+Подписка закрепляется за обработчиком по согласованному хешированию
+отпечатка её токена, поэтому при смене числа обработчиков переезжает
+только малая часть подписок, а подписки с общим токеном попадают в один
+процесс и делят запросы к API.
+"""
+import argparse
+import bisect
+import hashlib
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+
+from delivery import DRAIN_TIMEOUT
+from settings import getenv
+from state import SQLITE_SUFFIXES, STATE_FILE, tenant_key
+
+HASH_REPLICAS = int(getenv('HASH_REPLICAS', 64))
+LEASE_FILE = getenv('LEASE_FILE', STATE_FILE)
+LEASE_TTL = float(getenv('LEASE_TTL', 30))
+SHARDED_STATE_MESSAGE = (
+    'Для запуска в несколько процессов STATE_FILE должен быть базой SQLite'
+    ' ({suffixes}) или не задан'
+)
+LEASE_FILE_MESSAGE = 'Для режима node нужен LEASE_FILE или STATE_FILE'
+NODE_STATE_MESSAGE = (
+    'Для режима node STATE_FILE должен быть общей для всех узлов базой'
+    ' SQLite ({suffixes}): через неё новый владелец подписки получает'
+    ' курсор и отправленные статусы'
+)
+SHARD_STARTED_MESSAGE = 'Шард {name}: подписок {count}'
+REBALANCE_MESSAGE = 'Узел {worker}: взято {claimed}, отдано {released}'
+DRAIN_EXPIRED_MESSAGE = ('Узел {worker}: уведомления подписки {chat_id} не'
+                         ' доставлены за {timeout:.0f} с, аренда отдана,'
+                         ' новый владелец может их повторить')
+
+
+def ring_hash(value):
+    """Позиция строки на кольце хешей."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Кольцо согласованного хеширования с виртуальными узлами."""
+
+    def __init__(self, nodes, replicas=HASH_REPLICAS):
+        """Кольцо для узлов nodes по replicas точек на узел."""
+        points = sorted(
+            (ring_hash(f'{node}#{replica}'), node)
+            for node in nodes for replica in range(replicas))
+        self.hashes = [point for point, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def node_for(self, key):
+        """Узел, отвечающий за ключ, или None для пустого кольца."""
+        if not self.nodes:
+            return None
+        index = bisect.bisect(self.hashes, ring_hash(key))
+        return self.nodes[index % len(self.nodes)]
+
+
+def route_key(key):
+    """Часть ключа tenant_key, по которой выбирается узел: отпечаток токена."""
+    return key.rpartition(':')[2]
+
+
+def shard_tenants(tenants, nodes, replicas=HASH_REPLICAS):
+    """Разбиение подписок по узлам: узел → список подписок."""
+    ring = HashRing(nodes, replicas)
+    shards = {node: [] for node in nodes}
+    for tenant in tenants:
+        shards[ring.node_for(route_key(tenant_key(tenant)))].append(tenant)
+    return shards
+
+
+def check_state_file(path):
+    """Общее состояние нескольких процессов хранится только в SQLite.
+
+    JSON-файл каждый процесс перезаписывает целиком и затёр бы курсоры
+    остальных.
+    """
+    if path and not path.endswith(SQLITE_SUFFIXES):
+        raise ValueError(SHARDED_STATE_MESSAGE.format(
+            suffixes=', '.join(SQLITE_SUFFIXES)))
+
+
+def check_node_state_file(path):
+    """Узлам нужна общая база состояния SQLite.
+
+    Без неё подписка переезжает на другой узел без курсора и отправленных
+    статусов, и новый владелец повторил бы все уведомления.
+    """
+    if not path or not path.endswith(SQLITE_SUFFIXES):
+        raise ValueError(NODE_STATE_MESSAGE.format(
+            suffixes=', '.join(SQLITE_SUFFIXES)))
+
+
+class LeaseTable:
+    """Таблица аренды подписок в общей базе SQLite.
+
+    Узел продлевает свою запись в workers и аренду своих подписок
+    каждым heartbeat(); аренда, не продлённая за ttl секунд, свободна.
+    """
+
+    def __init__(self, path, worker, ttl=LEASE_TTL, clock=time.time):
+        """Таблица в файле path от имени узла worker."""
+        self.worker = worker
+        self.ttl = ttl
+        self.clock = clock
+        self.connection = sqlite3.connect(path, timeout=ttl)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS workers '
+                '(worker TEXT PRIMARY KEY, expires REAL NOT NULL)')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, '
+                'worker TEXT NOT NULL, expires REAL NOT NULL)')
+
+    def heartbeat(self):
+        """Продление аренды узла; возвращает живые узлы."""
+        now = self.clock()
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO workers (worker, expires) '
+                'VALUES (?, ?)', (self.worker, now + self.ttl))
+            self.connection.execute(
+                'UPDATE leases SET expires = ? WHERE worker = ?',
+                (now + self.ttl, self.worker))
+            self.connection.execute(
+                'DELETE FROM workers WHERE expires < ?', (now,))
+            rows = self.connection.execute(
+                'SELECT worker FROM workers ORDER BY worker').fetchall()
+        return [worker for worker, in rows]
+
+    def claim(self, keys):
+        """Аренда свободных ключей; возвращает все ключи узла из keys."""
+        now = self.clock()
+        keys = list(keys)
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO leases (key, worker, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET '
+                'worker = excluded.worker, expires = excluded.expires '
+                'WHERE leases.worker = excluded.worker OR leases.expires < ?',
+                [(key, self.worker, now + self.ttl, now) for key in keys])
+        return {key for key in keys if self.holder(key) == self.worker}
+
+    def holder(self, key):
+        """Узел, арендующий ключ, или None."""
+        row = self.connection.execute(
+            'SELECT worker FROM leases WHERE key = ? AND expires >= ?',
+            (key, self.clock())).fetchone()
+        return row[0] if row else None
+
+    def release(self, keys):
+        """Освобождение аренды ключей узла."""
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM leases WHERE key = ? AND worker = ?',
+                [(key, self.worker) for key in keys])
+
+    def leave(self):
+        """Уход узла: освобождение всех его аренд."""
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM leases WHERE worker = ?', (self.worker,))
+            self.connection.execute(
+                'DELETE FROM workers WHERE worker = ?', (self.worker,))
+        self.connection.close()
+
+
+class LeaseCoordinator:
+    """Перебалансировка подписок между узлами без повторных уведомлений.
+
+    Отдаваемая подписка сначала снимается с опроса и удерживается не
+    меньше interval секунд, чтобы начатый опрос успел поставить
+    уведомления в очередь, и дальше, пока они не доставлены; затем её
+    состояние сбрасывается в общее хранилище и только после этого аренда
+    освобождается. Если уведомления не доставлены за drain_timeout
+    секунд, аренда всё равно освобождается, и новый владелец может их
+    повторить. Новый владелец берёт подписку лишь после освобождения или
+    истечения аренды и начинает с сохранённого курсора.
+    """
+
+    def __init__(self, leases, tenants, interval=None,
+                 clock=time.monotonic, logger=None,
+                 drain_timeout=DRAIN_TIMEOUT):
+        """Координатор узла leases для подписок tenants."""
+        self.leases = leases
+        self.tenants = {tenant_key(tenant): tenant for tenant in tenants}
+        self.interval = leases.ttl / 3 if interval is None else interval
+        self.drain_timeout = max(drain_timeout, self.interval)
+        self.clock = clock
+        self.logger = logger
+        self.owned = frozenset()
+        self.draining = {}
+        self.checked_at = None
+
+    def owns(self, tenant):
+        """Опрашивает ли узел подписку сейчас."""
+        return tenant_key(tenant) in self.owned
+
+    def wanted(self):
+        """Ключи, которые кольцо отводит этому узлу."""
+        ring = HashRing(self.leases.heartbeat())
+        return {key for key in self.tenants
+                if ring.node_for(route_key(key)) == self.leases.worker}
+
+    def drained(self, key, elapsed):
+        """Можно ли отдать подписку, которая отдаётся elapsed секунд."""
+        if elapsed < self.interval:
+            return False
+        tenant = self.tenants[key]
+        if not tenant.inflight:
+            return True
+        if elapsed < self.drain_timeout:
+            return False
+        if self.logger is not None:
+            self.logger.warning(DRAIN_EXPIRED_MESSAGE.format(
+                worker=self.leases.worker, chat_id=tenant.chat_id,
+                timeout=self.drain_timeout))
+        return True
+
+    def rebalance(self, dispatcher, store):
+        """Шаг перебалансировки; вызывается из цикла диспетчера."""
+        now = self.clock()
+        if self.checked_at is not None and (
+                now - self.checked_at < self.interval):
+            return
+        self.checked_at = now
+        wanted = self.wanted()
+        for key in self.owned - wanted:
+            dispatcher.cancel(self.tenants[key])
+            self.draining[key] = now
+        released = [key for key, started in self.draining.items()
+                    if key not in wanted and self.drained(key, now - started)]
+        if released:
+            for key in released:
+                store.remember(self.tenants[key])
+                del self.draining[key]
+            store.flush()
+            self.leases.release(released)
+        resumed = {key for key in wanted if key in self.draining}
+        for key in resumed:
+            del self.draining[key]
+        held = self.leases.claim(wanted - resumed) | resumed
+        claimed = held - self.owned
+        fresh = [self.tenants[key] for key in claimed - resumed]
+        if fresh:
+            store.restore(fresh)
+        self.owned = frozenset(held)
+        for key in claimed:
+            dispatcher.schedule(self.tenants[key], self.tenants[key].next_poll)
+        if (claimed or released) and self.logger is not None:
+            self.logger.info(REBALANCE_MESSAGE.format(
+                worker=self.leases.worker, claimed=len(claimed),
+                released=len(released)))
+
+    def leave(self):
+        """Освобождение аренды при остановке узла."""
+        self.owned = frozenset()
+        self.leases.leave()
+
+
+def run_shard(name, index, tenants):
+    """Процесс локального шарда: свой цикл опроса для части подписок."""
+    import homework
+    from metrics import METRICS_PORT
+
+    homework.init()
+    homework.logger.info(
+        SHARD_STARTED_MESSAGE.format(name=name, count=len(tenants)))
+    homework.run_bot(
+        tenants,
+        metrics_port=METRICS_PORT and str(int(METRICS_PORT) + index))
+
+
+def run_local(workers):
+    """Локальный пул процессов со статическим разбиением подписок."""
+    import homework
+
+    homework.init()
+    check_state_file(STATE_FILE)
+    names = [f'local-{index}' for index in range(workers)]
+    shards = shard_tenants(homework.get_tenants(), names)
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=run_shard, args=(name, index, shards[name]),
+                        name=name)
+        for index, name in enumerate(names)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+def run_node(worker):
+    """Узел кластера: подписки распределяются через таблицу аренды."""
+    import homework
+
+    homework.init()
+    check_node_state_file(STATE_FILE)
+    if not LEASE_FILE:
+        raise ValueError(LEASE_FILE_MESSAGE)
+    tenants = homework.get_tenants()
+    coordinator = LeaseCoordinator(
+        LeaseTable(LEASE_FILE, worker), tenants, logger=homework.logger)
+    homework.run_bot(tenants, coordinator=coordinator)
+
+
+def parse_args():
+    """Режим запуска из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    modes = parser.add_subparsers(dest='mode', required=True)
+    local = modes.add_parser('local', help='пул процессов на одной машине')
+    local.add_argument('--workers', type=int, default=os.cpu_count())
+    node = modes.add_parser('node', help='узел с общей таблицей аренды')
+    node.add_argument(
+        '--worker-id', default=f'{socket.gethostname()}-{os.getpid()}')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.mode == 'local':
+        run_local(args.workers)
+    else:
+        run_node(args.worker_id)
@@ -0,0 +1,270 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+STATUSES_PATH = '/api/user_api/homework_statuses/'
+STATUS_CYCLE = {
+    None: 'reviewing',
+    'reviewing': ('approved', 'rejected'),
+    'rejected': 'reviewing',
+    'approved': 'approved',
+}
+STARTED_MESSAGE = ('Симулятор запущен: API {host}:{port}{path},'
+                   ' Telegram {host}:{port}/bot')
+
+
+class SimulatorConfig:
+    """Задержки, доли ошибок и частота смены статусов симулятора."""
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1, change_probability=0.1,
+                 homeworks_per_token=3, telegram_latency=0.0,
+                 telegram_rate_limit_rate=0.0, seed=None):
+        """Доли задаются числами от 0 до 1, задержки — в секундах."""
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.change_probability = change_probability
+        self.homeworks_per_token = homeworks_per_token
+        self.telegram_latency = telegram_latency
+        self.telegram_rate_limit_rate = telegram_rate_limit_rate
+        self.seed = seed
+
+
+class Simulator:
+    """Состояние домашних работ по токенам и счётчики запросов."""
+
+    def __init__(self, config=None, clock=time.time):
+        """Симулятор с пустым набором токенов."""
+        self.config = config or SimulatorConfig()
+        self.clock = clock
+        self.rng = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.homeworks = {}
+        self.polls = 0
+        self.sent = {}
+        self.errors = 0
+        self.rate_limited = 0
+
+    def delay(self, latency):
+        """Искусственная задержка ответа."""
+        jitter = self.config.latency_jitter
+        pause = latency + (self.rng.uniform(0, jitter) if jitter else 0)
+        if pause > 0:
+            time.sleep(pause)
+
+    def advance(self, token, now):
+        """Случайная смена статусов работ токена."""
+        homeworks = self.homeworks.get(token)
+        if homeworks is None:
+            homeworks = self.homeworks[token] = [
+                {'id': index, 'status': None, 'date_updated': 0,
+                 'homework_name': f'{token[-8:]}__hw{index}.zip',
+                 'lesson_name': f'Спринт {index}'}
+                for index in range(1, self.config.homeworks_per_token + 1)
+            ]
+        for homework in homeworks:
+            if self.rng.random() >= self.config.change_probability:
+                continue
+            following = STATUS_CYCLE[homework['status']]
+            if isinstance(following, tuple):
+                following = self.rng.choice(following)
+            if following != homework['status']:
+                homework['status'] = following
+                homework['date_updated'] = now
+        return homeworks
+
+    def statuses(self, authorization, from_date):
+        """Ответ эндпоинта homework_statuses: код, тело и заголовки."""
+        self.delay(self.config.latency)
+        with self.lock:
+            self.polls += 1
+            if not authorization.startswith('OAuth ') or not authorization[6:]:
+                return 401, {
+                    'code': 'not_authenticated',
+                    'message': 'Учетные данные не были предоставлены.',
+                    'source': '__response__'}, {}
+            if self.rng.random() < self.config.rate_limit_rate:
+                self.rate_limited += 1
+                return 429, {}, {'Retry-After': str(self.config.retry_after)}
+            if self.rng.random() < self.config.error_rate:
+                self.errors += 1
+                return 500, {}, {}
+            now = int(self.clock())
+            homeworks = [
+                dict(homework) for homework in
+                self.advance(authorization[6:], now)
+                if homework['status'] and homework['date_updated'] >= from_date
+            ]
+        return 200, {'homeworks': homeworks, 'current_date': now}, {}
+
+    def send_message(self, payload):
+        """Ответ метода sendMessage Bot API."""
+        self.delay(self.config.telegram_latency)
+        with self.lock:
+            if self.rng.random() < self.config.telegram_rate_limit_rate:
+                self.rate_limited += 1
+                retry_after = self.config.retry_after
+                return 429, {
+                    'ok': False, 'error_code': 429,
+                    'description': 'Too Many Requests: retry after '
+                                   f'{retry_after}',
+                    'parameters': {'retry_after': retry_after}}, {}
+            chat_id = payload.get('chat_id')
+            self.sent.setdefault(str(chat_id), []).append(payload.get('text'))
+            message_id = sum(len(texts) for texts in self.sent.values())
+        return 200, {'ok': True, 'result': {
+            'message_id': message_id,
+            'date': int(self.clock()),
+            'chat': {'id': int(chat_id), 'type': 'private'},
+            'text': payload.get('text'),
+        }}, {}
+
+
+class SimulatedResponse:
+    """Ответ симулятора с интерфейсом ответа requests."""
+
+    def __init__(self, status_code, body, headers):
+        """Код, тело в виде JSON и заголовки ответа."""
+        self.status_code = status_code
+        self.headers = headers
+        self.content = json.dumps(body, ensure_ascii=False).encode()
+
+    def json(self):
+        """Разобранное тело ответа."""
+        return json.loads(self.content)
+
+    def close(self):
+        """Ответ не держит соединения."""
+
+
+class SimulatorSession:
+    """Сессия в стиле requests, которая обращается к симулятору без сети.
+
+    Подходит как session для PracticumClient, когда время симулятора
+    виртуальное и HTTP-сервер не нужен.
+    """
+
+    def __init__(self, simulator):
+        """Сессия поверх simulator."""
+        self.simulator = simulator
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        """Запрос статусов домашних работ."""
+        from_date = int(float((params or {}).get('from_date', 0)))
+        return SimulatedResponse(*self.simulator.statuses(
+            (headers or {}).get('Authorization', ''), from_date))
+
+    def close(self):
+        """Закрывать нечего."""
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """HTTP-обработчик эндпоинтов Практикума и Telegram."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    simulator = None
+
+    def respond(self, code, body, headers):
+        """Отправка JSON-ответа."""
+        content = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def read_payload(self):
+        """Тело запроса в виде JSON или формы."""
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length).decode() if length else ''
+        if 'json' in self.headers.get('Content-Type', ''):
+            return json.loads(raw or '{}')
+        return {key: values[0] for key, values in parse_qs(raw).items()}
+
+    def do_GET(self):
+        """Запрос статусов домашних работ."""
+        url = urlsplit(self.path)
+        if url.path != STATUSES_PATH:
+            self.respond(404, {'detail': 'Not found'}, {})
+            return
+        try:
+            from_date = int(float(
+                parse_qs(url.query).get('from_date', ['0'])[0]))
+        except ValueError:
+            self.respond(400, {'error': {'error': 'Wrong from_date format'}},
+                         {})
+            return
+        self.respond(*self.simulator.statuses(
+            self.headers.get('Authorization', ''), from_date))
+
+    def do_POST(self):
+        """Вызов метода Bot API."""
+        if not self.path.startswith('/bot') or not self.path.endswith(
+                '/sendMessage'):
+            self.respond(404, {'ok': False, 'error_code': 404,
+                               'description': 'Not Found'}, {})
+            return
+        self.respond(*self.simulator.send_message(self.read_payload()))
+
+    def log_message(self, *args):
+        """Запросы к симулятору не пишутся в лог."""
+
+
+def start_simulator(simulator=None, host='127.0.0.1', port=0):
+    """Запуск симулятора в фоновом потоке; возвращает сервер."""
+    handler = type('Handler', (SimulatorHandler,), {
+        'simulator': simulator or Simulator()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name='simulator', daemon=True).start()
+    return server
+
+
+def endpoints(server):
+    """Адреса, которые нужно передать боту через окружение."""
+    host, port = server.server_address[:2]
+    return {
+        'PRACTICUM_ENDPOINT': f'http://{host}:{port}{STATUSES_PATH}',
+        'TELEGRAM_BASE_URL': f'http://{host}:{port}/bot',
+    }
+
+
+def parse_args():
+    """Параметры симулятора из командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Локальный симулятор API Практикума и Telegram')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--change-probability', type=float, default=0.1)
+    parser.add_argument('--homeworks-per-token', type=int, default=3)
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--telegram-rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    options = vars(args)
+    host, port = options.pop('host'), options.pop('port')
+    server = ThreadingHTTPServer((host, port), type(
+        'Handler', (SimulatorHandler,),
+        {'simulator': Simulator(SimulatorConfig(**options))}))
+    print(STARTED_MESSAGE.format(host=host, port=port, path=STATUSES_PATH))
+    server.serve_forever()
@@ -0,0 +1,280 @@
+"""Долгий прогон бота в виртуальном времени.
+
+Неделя опросов проходит за секунды: часы виртуальные, а API Практикума
+и Telegram заменены симулятором в том же процессе. Прогон запускает сам
+цикл run_bot с диспетчером таймеров, очередью отправки, сводками и
+журналом уведомлений. По ходу прогона статусы работ меняются, API
+периодически недоступен, а бот перезапускается с восстановлением
+состояния. Раз в виртуальные сутки снимаются замеры памяти
+(tracemalloc), числа открытых дескрипторов и размера лога, а в конце
+состояние подписок сверяется с симулятором.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import tracemalloc
+from contextlib import ExitStack
+from unittest import mock
+
+from telegram.error import NetworkError, RetryAfter
+
+import api_client
+import coalesce
+import homework
+from breaker import CIRCUIT_COOLDOWN, Breakers
+from delivery import DirectDelivery
+from log_config import TEXT_FORMAT
+from records import STATUS_CODES, homework_key
+from settings import getenv
+from simulator import Simulator, SimulatorConfig, SimulatorSession
+from timers import VirtualClock
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+SOAK_START = 1640995200
+SOAK_DAYS = float(getenv('SOAK_DAYS', 7))
+SOAK_TENANTS = int(getenv('SOAK_TENANTS', 20))
+SOAK_MEMORY_LIMIT = int(getenv('SOAK_MEMORY_LIMIT', 1024 * 1024))
+SOAK_FD_LIMIT = int(getenv('SOAK_FD_LIMIT', 4))
+SOAK_TICK = 60
+SETTLE_TIMEOUT = 0.01
+SAMPLE_MESSAGE = ('День {day:>3}: память {memory:.0f} КБ,'
+                  ' дескрипторов {fds}, лог {log:.0f} КБ, опросов {polls},'
+                  ' сообщений {messages}, перезапусков {restarts}')
+MEMORY_PROBLEM = 'Память выросла на {growth:.0f} КБ с первых суток'
+FD_PROBLEM = 'Открытых дескрипторов стало больше на {growth}'
+DRIFT_PROBLEM = 'Состояние подписок разошлось с API в {drift} работах'
+TIMERS_PROBLEM = 'Таймеров {timers} при {tenants} подписках'
+SOAK_OK_MESSAGE = 'Долгий прогон прошёл без замечаний'
+
+
+def open_fds():
+    """Число открытых дескрипторов процесса или None, если его не узнать."""
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+class Soak:
+    """Прогон бота на days виртуальных суток.
+
+    Подписок tenants, каждые две соседние делят токен. API недоступен
+    последние outage_length секунд каждых outage_every секунд, а бот
+    перезапускается каждые restart_every секунд. Уведомления собираются
+    в сводки за digest_window секунд и проходят через журнал.
+    """
+
+    def __init__(self, directory, days=SOAK_DAYS, tenants=SOAK_TENANTS,
+                 change_probability=0.05, error_rate=0.01,
+                 outage_every=DAY, outage_length=HOUR,
+                 restart_every=DAY / 2, digest_window=60, seed=1):
+        """Реестр подписок, файлы состояния, журнала и лога — в directory."""
+        self.days = days
+        self.error_rate = error_rate
+        self.outage_every = outage_every
+        self.outage_length = outage_length
+        self.restart_every = restart_every
+        self.digest_window = digest_window
+        self.tenants_file = os.path.join(directory, 'tenants.json')
+        self.state_file = os.path.join(directory, 'state.sqlite3')
+        self.outbox_file = os.path.join(directory, 'outbox.sqlite3')
+        self.log_file = os.path.join(directory, 'soak.log')
+        with open(self.tenants_file, 'w', encoding='utf-8') as registry:
+            json.dump([
+                {'token': f'y0_soak_{index // 2:08d}', 'chat_id': index}
+                for index in range(tenants)], registry)
+        self.clock = VirtualClock(SOAK_START)
+        self.started = self.clock()
+        self.end = self.started + days * DAY
+        self.simulator = Simulator(SimulatorConfig(
+            change_probability=change_probability, error_rate=error_rate,
+            seed=seed), clock=self.clock)
+        self.client = api_client.PracticumClient(
+            session=SimulatorSession(self.simulator),
+            breakers=Breakers(clock=self.clock))
+        self.messages = 0
+        self.restarts = 0
+        self.samples = []
+        self.tenants = []
+        self.on_sample = None
+        self.next_sample = self.started + DAY
+        self.next_restart = self.started + restart_every
+
+    def send(self, chat_id, message):
+        """Отправка в Telegram симулятора с ошибками Bot API."""
+        code, answer, _ = self.simulator.send_message(
+            {'chat_id': chat_id, 'text': message})
+        if code == 429:
+            raise RetryAfter(answer['parameters']['retry_after'])
+        if code != 200:
+            raise NetworkError(answer.get('description'))
+        self.messages += 1
+
+    def in_outage(self):
+        """Недоступен ли API в текущий момент."""
+        elapsed = (self.clock() - self.started) % self.outage_every
+        return elapsed >= self.outage_every - self.outage_length
+
+    def settle(self, deliveries):
+        """Доставка очереди; пока она идёт, часы тоже идут вперёд."""
+        while not deliveries.drain(SETTLE_TIMEOUT):
+            self.clock.sleep(1)
+
+    def tick(self, dispatcher, deliveries):
+        """Шаг цикла бота: сбои API, замеры, перезапуск и конец прогона."""
+        self.simulator.config.error_rate = (
+            1.0 if self.in_outage() else self.error_rate)
+        self.settle(deliveries)
+        if self.clock() >= self.next_sample:
+            self.next_sample += DAY
+            self.sample(len(dispatcher.timers))
+        if self.clock() >= min(self.next_restart, self.end):
+            dispatcher.stop()
+
+    def sample(self, timers):
+        """Замер памяти, дескрипторов и размера лога."""
+        self.simulator.sent.clear()
+        gc.collect()
+        sample = {
+            'day': round((self.clock() - self.started) / DAY),
+            'memory': tracemalloc.get_traced_memory()[0],
+            'fds': open_fds(),
+            'log': os.path.getsize(self.log_file),
+            'polls': self.simulator.polls,
+            'messages': self.messages,
+            'restarts': self.restarts,
+            'timers': timers,
+        }
+        self.samples.append(sample)
+        if self.on_sample is not None:
+            self.on_sample(sample)
+        return sample
+
+    def reconcile(self):
+        """Опрос без сбоев и смен статусов; число расхождений с API."""
+        self.simulator.config.error_rate = 0
+        self.simulator.config.change_probability = 0
+        self.clock.advance_to(self.clock() + CIRCUIT_COOLDOWN + 1)
+        deliveries = DirectDelivery(
+            lambda chat_id, message: self.send(chat_id, message) or True)
+        for tenant in self.tenants:
+            homework.poll_tenant(deliveries, tenant, self.clock)
+        return sum(
+            tenant.statuses.get(homework_key(item))
+            != STATUS_CODES[item['status']]
+            for tenant in self.tenants
+            for item in self.simulator.homeworks.get(tenant.token, [])
+            if item['status'])
+
+    def patches(self):
+        """Настройки бота на время прогона: симулятор и файлы прогона."""
+        stack = ExitStack()
+        for target, name, value in (
+                (api_client, 'default_client', lambda: self.client),
+                (coalesce, 'FLIGHTS', coalesce.SingleFlight(clock=self.clock)),
+                (homework, 'TENANTS_FILE', self.tenants_file),
+                (homework, 'TELEGRAM_TOKEN', 'soak'),
+                (homework, 'STATE_FILE', self.state_file),
+                (homework, 'OUTBOX_FILE', self.outbox_file),
+                (homework, 'DIGEST_WINDOW', self.digest_window)):
+            stack.enter_context(mock.patch.object(target, name, value))
+        return stack
+
+    def run(self, on_sample=None):
+        """Прогон целиком; возвращает замеры и число расхождений."""
+        self.on_sample = on_sample
+        handler = logging.FileHandler(self.log_file, encoding='utf-8')
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        level, propagate = homework.logger.level, homework.logger.propagate
+        homework.logger.addHandler(handler)
+        homework.logger.setLevel(logging.INFO)
+        homework.logger.propagate = False
+        tracemalloc.start()
+        try:
+            with self.patches():
+                self.loop()
+                drift = self.reconcile()
+        finally:
+            tracemalloc.stop()
+            homework.logger.removeHandler(handler)
+            homework.logger.setLevel(level)
+            homework.logger.propagate = propagate
+            handler.close()
+        return {'samples': self.samples, 'drift': drift,
+                'tenants': len(self.tenants)}
+
+    def loop(self):
+        """Запуски run_bot до конца прогона; каждый следующий — перезапуск."""
+        while True:
+            self.tenants = homework.get_tenants(self.clock)
+            homework.run_bot(
+                self.tenants, metrics_port=None, clock=self.clock,
+                sleep=self.clock.sleep, send=self.send, on_tick=self.tick,
+                tick=SOAK_TICK)
+            if self.clock() >= self.end:
+                return
+            self.restarts += 1
+            self.next_restart += self.restart_every
+
+
+def problems(result, memory_limit=SOAK_MEMORY_LIMIT, fd_limit=SOAK_FD_LIMIT):
+    """Замечания по итогам прогона: утечки, дрейф и потерянные таймеры."""
+    found = []
+    samples = result['samples']
+    if samples:
+        first, last = samples[0], samples[-1]
+        growth = last['memory'] - first['memory']
+        if growth > memory_limit:
+            found.append(MEMORY_PROBLEM.format(growth=growth / 1024))
+        if first['fds'] is not None and (
+                last['fds'] - first['fds'] > fd_limit):
+            found.append(FD_PROBLEM.format(growth=last['fds'] - first['fds']))
+        if last['timers'] != result['tenants']:
+            found.append(TIMERS_PROBLEM.format(
+                timers=last['timers'], tenants=result['tenants']))
+    if result['drift']:
+        found.append(DRIFT_PROBLEM.format(drift=result['drift']))
+    return found
+
+
+def print_sample(sample):
+    """Строка суточного замера."""
+    print(SAMPLE_MESSAGE.format(
+        **{**sample, 'memory': sample['memory'] / 1024,
+           'log': sample['log'] / 1024}))
+
+
+def parse_args():
+    """Параметры прогона из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=float, default=SOAK_DAYS)
+    parser.add_argument('--tenants', type=int, default=SOAK_TENANTS)
+    parser.add_argument('--change-probability', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--outage-every', type=float, default=DAY)
+    parser.add_argument('--outage-length', type=float, default=HOUR)
+    parser.add_argument('--restart-every', type=float, default=DAY / 2)
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args()
+
+
+def main():
+    """Прогон с выводом суточных замеров; код 1 при замечаниях."""
+    options = vars(parse_args())
+    with tempfile.TemporaryDirectory() as directory:
+        result = Soak(directory, **options).run(print_sample)
+    found = problems(result)
+    for problem in found:
+        print(problem)
+    if not found:
+        print(SOAK_OK_MESSAGE)
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
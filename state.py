@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from records import decode_statuses, encode_statuses
+from settings import getenv
+
+STATE_FILE = getenv('STATE_FILE')
+STATE_FLUSH_INTERVAL = float(getenv('STATE_FLUSH_INTERVAL', 60))
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def tenant_key(tenant):
+    """Ключ состояния подписки без токена в открытом виде."""
+    digest = hashlib.sha256(str(tenant.token).encode()).hexdigest()[:16]
+    return f'{tenant.chat_id}:{digest}'
+
+
+def snapshot(tenant):
+    """Сохраняемая часть состояния подписки."""
+    return {
+        'current_date': tenant.current_date,
+        'exception_message': tenant.exception_message,
+        'statuses': encode_statuses(tenant.statuses),
+    }
+
+
+class StateStore:
+    """Хранилище курсоров и отправленных статусов с отложенной записью.
+
+    Базовый класс ничего не сохраняет и используется без STATE_FILE.
+    """
+
+    persistent = False
+
+    def __init__(self, flush_interval=STATE_FLUSH_INTERVAL,
+                 clock=time.monotonic):
+        """Запись на диск не чаще, чем раз в flush_interval секунд."""
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.saved = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.flushed_at = clock()
+
+    def read(self):
+        """Чтение всех сохранённых состояний."""
+        return {}
+
+    def write(self, states):
+        """Атомарная запись изменённых состояний."""
+
+    def close(self):
+        """Сброс отложенных изменений и освобождение ресурсов."""
+        self.flush()
+
+    def restore(self, tenants):
+        """Восстановление состояния подписок после перезапуска."""
+        self.saved = self.read()
+        for tenant in tenants:
+            state = self.saved.get(tenant_key(tenant))
+            if state is None:
+                continue
+            tenant.current_date = state['current_date']
+            tenant.exception_message = state['exception_message']
+            tenant.statuses = decode_statuses(state['statuses'])
+
+    def remember(self, tenant):
+        """Отметка состояния подписки для ближайшей записи."""
+        if not self.persistent:
+            return
+        key = tenant_key(tenant)
+        state = snapshot(tenant)
+        with self.lock:
+            if self.saved.get(key) != state:
+                self.pending[key] = state
+
+    def maybe_flush(self):
+        """Запись, если с прошлого сброса прошло flush_interval секунд."""
+        if self.clock() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Немедленная запись отложенных изменений."""
+        with self.lock:
+            self.flushed_at = self.clock()
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        self.write(pending)
+        self.saved.update(pending)
+
+
+class FileStateStore(StateStore):
+    """Состояние в JSON-файле, заменяемом атомарно через os.replace."""
+
+    persistent = True
+
+    def __init__(self, path, **kwargs):
+        """Путь к JSON-файлу состояния."""
+        super().__init__(**kwargs)
+        self.path = path
+
+    def read(self):
+        """Чтение JSON-файла, если он уже создан."""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding='utf-8') as state_file:
+            return json.load(state_file)
+
+    def write(self, states):
+        """Запись во временный файл, fsync и атомарная замена."""
+        merged = dict(self.saved)
+        merged.update(states)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as state_file:
+                json.dump(merged, state_file, ensure_ascii=False)
+                state_file.flush()
+                os.fsync(state_file.fileno())
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+class SqliteStateStore(StateStore):
+    """Состояние в таблице SQLite, изменения пишутся одной транзакцией."""
+
+    persistent = True
+
+    def __init__(self, path, **kwargs):
+        """Путь к файлу базы SQLite."""
+        super().__init__(**kwargs)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS state '
+            '(key TEXT PRIMARY KEY, data TEXT NOT NULL)')
+
+    def read(self):
+        """Чтение всех строк таблицы состояния."""
+        rows = self.connection.execute('SELECT key, data FROM state')
+        return {key: json.loads(data) for key, data in rows}
+
+    def write(self, states):
+        """Запись изменённых состояний в одной транзакции."""
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO state (key, data) VALUES (?, ?)',
+                [(key, json.dumps(state, ensure_ascii=False))
+                 for key, state in states.items()])
+
+    def close(self):
+        """Сброс изменений и закрытие соединения с базой."""
+        super().close()
+        self.connection.close()
+
+
+def open_store(path, **kwargs):
+    """Хранилище по расширению файла: SQLite, JSON или без сохранения."""
+    if not path:
+        return StateStore(**kwargs)
+    if path.endswith(SQLITE_SUFFIXES):
+        return SqliteStateStore(path, **kwargs)
+    return FileStateStore(path, **kwargs)
@@ -0,0 +1,116 @@
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+STREAM_END_MESSAGE = 'Ответ API оборвался на позиции {position}'
+STREAM_CHAR_MESSAGE = ('В ответе API на позиции {position} ожидался'
+                       ' символ {expected}, получен {actual}')
+STREAM_TYPE_MESSAGE = 'Тип данных в ответе от API не соответствует ожидаемому'
+
+
+class JsonStream:
+    """Пошаговый разбор JSON из последовательности байтовых фрагментов.
+
+    В памяти держится только непрочитанный остаток буфера, поэтому
+    расход памяти не зависит от размера ответа.
+    """
+
+    def __init__(self, chunks):
+        """Источник chunks — итератор байтов, например iter_content."""
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.offset = 0
+        self.finished = False
+
+    def fill(self):
+        """Дочитывание следующего фрагмента; False в конце потока."""
+        if self.finished:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.finished = True
+            text = self.decoder.decode(b'', final=True)
+        else:
+            text = self.decoder.decode(chunk)
+        self.offset += self.position
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        return True
+
+    def peek(self):
+        """Следующий значимый символ без его чтения."""
+        while True:
+            self.position = WHITESPACE.match(
+                self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                raise ValueError(STREAM_END_MESSAGE.format(
+                    position=self.offset + self.position))
+
+    def expect(self, *expected):
+        """Чтение одного из ожидаемых символов."""
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(STREAM_CHAR_MESSAGE.format(
+                position=self.offset + self.position,
+                expected=' или '.join(expected), actual=char))
+        self.position += 1
+        return char
+
+    def value(self):
+        """Чтение одного JSON-значения целиком."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.position = end
+            return value
+
+    def items(self):
+        """Элементы массива по одному."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',', ']') == ']':
+                return
+
+
+def iter_answer(chunks, array_key='homeworks'):
+    """События разбора ответа API: (ключ, значение, элемент_массива).
+
+    Для массива array_key сначала отдаётся пустой список с признаком
+    False, а затем каждый элемент отдельно с признаком True. Остальные
+    поля верхнего уровня отдаются целиком с признаком False.
+    """
+    stream = JsonStream(chunks)
+    if stream.peek() != '{':
+        raise TypeError(STREAM_TYPE_MESSAGE)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == array_key and stream.peek() == '[':
+            yield key, [], False
+            for item in stream.items():
+                yield key, item, True
+        else:
+            yield key, stream.value(), False
+        if stream.expect(',', '}') == '}':
+            return
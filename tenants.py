@@ -0,0 +1,97 @@
+import json
+import threading
+import tracemalloc
+from collections import Counter
+
+TENANTS_FILE_MESSAGE = ('Реестр подписок {path} должен содержать список'
+                        ' объектов с ключами "token" и "chat_id"')
+
+
+class Tenant:
+    """Подписка: токен Практикума, чат и собственное состояние опроса."""
+
+    __slots__ = ('token', 'chat_id', 'current_date', 'exception_message',
+                 'statuses', 'next_poll', 'failures', 'idle_polls', 'shared',
+                 'inflight', 'lock')
+
+    def __init__(self, token, chat_id, current_date, exception_message=''):
+        """Состояние подписки хранится отдельно от остальных."""
+        self.token = token
+        self.chat_id = chat_id
+        self.current_date = current_date
+        self.exception_message = exception_message
+        self.statuses = {}
+        self.next_poll = 0
+        self.failures = 0
+        self.idle_polls = 0
+        self.shared = False
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        """Состояние для передачи в другой процесс.
+
+        Блокировка и уведомления в пути принадлежат процессу и не
+        передаются.
+        """
+        return {name: getattr(self, name) for name in self.__slots__
+                if name not in ('inflight', 'lock')}
+
+    def __setstate__(self, state):
+        """Подписка из переданного состояния со своей блокировкой."""
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        """Представление без токена, чтобы он не попадал в логи."""
+        return f'Tenant(chat_id={self.chat_id!r})'
+
+
+def parse_tenants(entries, current_date):
+    """Сборка подписок из записей реестра."""
+    return [
+        Tenant(
+            entry['token'],
+            entry['chat_id'],
+            entry.get('current_date', current_date),
+        )
+        for entry in entries
+    ]
+
+
+def mark_shared(tenants):
+    """Отметка подписок, токен которых есть и у других подписок."""
+    subscribers = Counter(tenant.token for tenant in tenants)
+    for tenant in tenants:
+        tenant.shared = subscribers[tenant.token] > 1
+    return tenants
+
+
+def load_tenants(path, current_date):
+    """Загрузка реестра подписок из JSON-файла."""
+    with open(path, encoding='utf-8') as registry:
+        entries = json.load(registry)
+    if not isinstance(entries, list):
+        raise TypeError(TENANTS_FILE_MESSAGE.format(path=path))
+    try:
+        return mark_shared(parse_tenants(entries, current_date))
+    except (KeyError, TypeError):
+        raise ValueError(TENANTS_FILE_MESSAGE.format(path=path))
+
+
+def measure_tenant_memory(count=10000):
+    """Средний расход памяти на одну подписку в байтах."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tenants = parse_tenants(
+            ({'token': f'y0_{index:040d}', 'chat_id': index}
+             for index in range(count)),
+            0,
+        )
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / len(tenants)
@@ -1,9 +1,33 @@
 import sys
 from os.path import abspath, dirname
 
+import pytest
+import requests
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 pytest_plugins = [
     'tests.fixtures.fixture_data'
 ]
+
+
+@pytest.fixture(autouse=True)
+def unpooled_api_client(monkeypatch):
+    """Запросы к API идут через `requests.get`, который подменяют тесты."""
+    import api_client
+    import breaker
+
+    client = api_client.PracticumClient(
+        session=requests, breakers=breaker.Breakers())
+    monkeypatch.setattr(api_client, 'default_client', lambda: client)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def fresh_flights(monkeypatch):
+    """Кэш общих ответов API не переходит из теста в тест."""
+    import coalesce
+
+    monkeypatch.setattr(coalesce, 'FLIGHTS', coalesce.SingleFlight())
+    monkeypatch.setattr(coalesce, 'ASYNC_FLIGHTS', coalesce.AsyncSingleFlight())
@@ -0,0 +1,146 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"homeworks": [], "current_date": 1}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPracticumClient:
+
+    def test_connections_reused(self):
+        import api_client
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        client = api_client.PracticumClient(pool_maxsize=2)
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/'
+            for _ in range(5):
+                assert client.get(url=url).json()['current_date'] == 1
+            stats = client.stats()
+        finally:
+            client.close()
+            server.shutdown()
+            server.server_close()
+        assert stats['connections'] == 1 and stats['reused'] == 4, (
+            'Проверьте, что клиент переиспользует соединение keep-alive'
+        )
+
+
+class MockResponse:
+
+    def __init__(self, content, status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        import json
+
+        return json.loads(self.content)
+
+
+class TestConditionalRequests:
+
+    def test_fingerprint_short_circuit(self, monkeypatch):
+        import api_client
+        import delivery
+        import homework
+        import tenants
+
+        bodies = iter([
+            b'{"homeworks": [], "current_date": 1}',
+            b'{"homeworks": [], "current_date": 2}',
+            b'{"homeworks": [{"id": 1, "homework_name": "hw",'
+            b' "status": "approved"}], "current_date": 3}',
+        ])
+        client = api_client.PracticumClient(session=None)
+        client.get = lambda **kwargs: MockResponse(next(bodies))
+        monkeypatch.setattr(api_client, 'default_client', lambda: client)
+        sent = []
+        deliveries = delivery.DirectDelivery(
+            lambda chat_id, message: sent.append(message) or True)
+        tenant = tenants.Tenant('token', 1, 0)
+        results = [homework.poll_tenant(deliveries, tenant) for _ in range(3)]
+        assert results == [(0, None), (0, None), (1, None)], (
+            'Проверьте, что изменившийся ответ разбирается полностью'
+        )
+        assert client.stats()['short_circuited'] == 1, (
+            'Проверьте, что ответ, отличающийся только current_date, '
+            'не разбирается повторно'
+        )
+
+    def test_etag_not_modified(self, monkeypatch):
+        import api_client
+        import changes
+        import homework
+        import tenants
+
+        seen = []
+        responses = iter([
+            MockResponse(b'{"homeworks": []}', headers={'ETag': '"v1"'}),
+            MockResponse(b'', status_code=304),
+        ])
+        client = api_client.PracticumClient(session=None)
+
+        def get(**kwargs):
+            seen.append(kwargs['headers'].get('If-None-Match'))
+            return next(responses)
+
+        client.get = get
+        monkeypatch.setattr(api_client, 'default_client', lambda: client)
+        batch = changes.PendingBatch(tenants.Tenant('token', 1, 0))
+        assert homework.request_api_answer(
+            {}, 0, 'key', None, batch) == {'homeworks': []}
+        batch.close(0)
+        assert homework.request_api_answer({}, 0, 'key') is None, (
+            'Проверьте, что ответ 304 не разбирается'
+        )
+        assert seen == [None, '"v1"'], (
+            'Проверьте, что ETag передаётся в If-None-Match'
+        )
+
+    def test_commit_waits_for_every_batch(self, monkeypatch):
+        import api_client
+        import homework
+        import tenants
+
+        first = (b'{"homeworks": [{"id": 1, "homework_name": "hw1",'
+                 b' "status": "approved"}], "current_date": 1}')
+        second = (b'{"homeworks": [{"id": 1, "homework_name": "hw1",'
+                  b' "status": "approved"}, {"id": 2, "homework_name": "hw2",'
+                  b' "status": "approved"}], "current_date": 2}')
+        bodies = iter([first, second, second])
+        client = api_client.PracticumClient(session=None)
+        client.get = lambda **kwargs: MockResponse(next(bodies))
+        monkeypatch.setattr(api_client, 'default_client', lambda: client)
+        pending = []
+
+        class ManualDelivery:
+
+            def put_status(self, chat_id, message, on_sent, *args):
+                pending.append(on_sent)
+
+        deliveries = ManualDelivery()
+        tenant = tenants.Tenant('token', 1, 0)
+        assert homework.poll_tenant(deliveries, tenant) == (1, None)
+        assert homework.poll_tenant(deliveries, tenant) == (1, None)
+        first_sent, second_sent = pending
+        first_sent(True)
+        second_sent(False)
+        assert homework.poll_tenant(deliveries, tenant) == (1, None), (
+            'Проверьте, что ответ не подтверждается, пока не доставлены '
+            'уведомления всех пачек по подписке'
+        )
@@ -0,0 +1,111 @@
+import asyncio
+
+
+class MockResponse:
+
+    def __init__(self, data, status=200):
+        self.data = data
+        self.status = status
+        self.headers = {}
+
+    async def json(self, content_type=None):
+        return self.data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class MockSession:
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.sent = []
+
+    def get(self, url=None, headers=None, params=None, **kwargs):
+        return self.track(MockResponse({
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': params['from_date'] + 1,
+        }))
+
+    def post(self, url, json=None, **kwargs):
+        self.sent.append(json['chat_id'])
+        return self.track(MockResponse({'ok': True}))
+
+    def track(self, response):
+        session = self
+
+        class Tracked:
+            async def __aenter__(self):
+                session.in_flight += 1
+                session.max_in_flight = max(
+                    session.max_in_flight, session.in_flight)
+                await asyncio.sleep(0.001)
+                return response
+
+            async def __aexit__(self, *args):
+                session.in_flight -= 1
+                return False
+
+        return Tracked()
+
+
+class TestAsyncBot:
+
+    def test_poll_tenants_bounded(self):
+        import async_bot
+        import tenants
+
+        session = MockSession()
+        registry = [tenants.Tenant(str(index), index, 0)
+                    for index in range(50)]
+
+        async def run():
+            await async_bot.poll_tenants(
+                session, asyncio.Semaphore(5), registry)
+
+        asyncio.run(run())
+        assert session.max_in_flight <= 5, (
+            'Проверьте, что семафор ограничивает число одновременных запросов'
+        )
+        assert sorted(session.sent) == list(range(50)), (
+            'Проверьте, что уведомление отправлено в чат каждой подписки'
+        )
+        assert all(tenant.current_date == 1 for tenant in registry), (
+            'Проверьте, что `current_date` обновляется после отправки'
+        )
+
+    def test_get_api_answer_error_key(self):
+        import async_bot
+
+        session = MockSession()
+        session.get = lambda **kwargs: MockResponse({'code': 'not_auth'})
+        try:
+            asyncio.run(async_bot.get_api_answer(session, 'token', 0))
+        except ValueError:
+            pass
+        else:
+            assert False, (
+                'Убедитесь, что асинхронный `get_api_answer` проверяет '
+                'ключи `code` и `error` в ответе'
+            )
+
+    def test_in_flight_change_not_counted(self):
+        import async_bot
+        import records
+        import tenants
+
+        session = MockSession()
+        tenant = tenants.Tenant('token', 1, 0)
+        record = records.HomeworkRecord.from_homework(
+            {'homework_name': 'hw', 'status': 'approved'})
+        tenant.inflight[(record.key, record.status)] = []
+        result = asyncio.run(async_bot.poll_tenant(
+            session, asyncio.Semaphore(5), tenant))
+        assert result == (0, None) and session.sent == [], (
+            'Проверьте, что уведомление, которое уже отправляется, '
+            'не отправляется и не учитывается повторно'
+        )
@@ -0,0 +1,73 @@
+class TestBackfill:
+
+    def test_backfill_chronological(self, monkeypatch):
+        import backfill
+        import delivery
+        import homework
+        import tenants
+
+        history = [
+            {'id': 1, 'homework_name': 'first', 'status': 'approved',
+             'date_updated': 250},
+            {'id': 2, 'homework_name': 'second', 'status': 'reviewing',
+             'date_updated': '1970-01-01T00:00:50Z'},
+            {'id': 3, 'homework_name': 'third', 'status': 'rejected',
+             'date_updated': 120},
+        ]
+        queries = []
+
+        def answer(headers, from_date, *args):
+            queries.append(from_date)
+            return {
+                'homeworks': [hw for hw in history
+                              if backfill.updated_at(hw) >= from_date],
+                'current_date': 300 + from_date,
+            }
+
+        monkeypatch.setattr(homework, 'request_api_answer', answer)
+        sent = []
+        deliveries = delivery.DirectDelivery(
+            lambda chat_id, message: sent.append(message) or True)
+        tenant = tenants.Tenant('token', 1, 0)
+        tenant.statuses['3'] = 2
+        backfill.backfill(deliveries, [tenant], 0, 300)
+        assert queries == [0], (
+            'Проверьте, что подписка запрашивается один раз с начала периода'
+        )
+        assert sent == [homework.parse_status(history[1]),
+                        homework.parse_status(history[0])], (
+            'Проверьте, что уведомления уходят по порядку, без повторов и '
+            'без уже отправленных статусов'
+        )
+        assert tenant.current_date == 300, (
+            'Проверьте, что курсор сдвигается к концу периода'
+        )
+
+    def test_backfill_until(self, monkeypatch):
+        import backfill
+        import delivery
+        import homework
+        import tenants
+
+        answer = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'first', 'status': 'approved',
+                 'date_updated': 250},
+                {'id': 2, 'homework_name': 'second', 'status': 'reviewing',
+                 'date_updated': 50},
+            ],
+            'current_date': 300,
+        }
+        monkeypatch.setattr(
+            homework, 'request_api_answer', lambda *args: answer)
+        sent = []
+        deliveries = delivery.DirectDelivery(
+            lambda chat_id, message: sent.append(message) or True)
+        tenant = tenants.Tenant('token', 1, 0)
+        backfill.backfill(deliveries, [tenant], 0, 200)
+        assert sent == [homework.parse_status(answer['homeworks'][1])], (
+            'Проверьте, что работы, обновлённые после --until, отбрасываются'
+        )
+        assert tenant.current_date == 200, (
+            'Проверьте, что курсор не сдвигается дальше --until'
+        )
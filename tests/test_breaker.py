@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from timers import VirtualClock
+
+
+class TestCircuitBreaker:
+
+    def test_open_half_open_close(self):
+        import breaker
+        from exceptions import CircuitOpenException
+
+        clock = VirtualClock()
+        changes = []
+        circuit = breaker.CircuitBreaker(
+            'api', failure_threshold=2, cooldown=10, clock=clock,
+            on_change=lambda *change: changes.append(change[1:]))
+        circuit.before()
+        circuit.failure()
+        circuit.before()
+        circuit.failure()
+        with pytest.raises(CircuitOpenException) as error:
+            circuit.before()
+        assert error.value.retry_after == 10, (
+            'Проверьте, что разомкнутый автомат сообщает время до повтора'
+        )
+        clock.now = 10
+        circuit.before()
+        with pytest.raises(CircuitOpenException):
+            circuit.before()
+        circuit.failure()
+        clock.now = 20
+        circuit.before()
+        circuit.success()
+        assert changes == [
+            ('closed', 'open'), ('open', 'half_open'), ('half_open', 'open'),
+            ('open', 'half_open'), ('half_open', 'closed')], (
+            'Проверьте переходы: закрыт, разомкнут, полуоткрыт'
+        )
+
+    def test_outage_alert_once(self, monkeypatch, unpooled_api_client):
+        import delivery
+        import homework
+        import tenants
+
+        def fail(*args, **kwargs):
+            raise requests.ConnectionError('connection refused')
+
+        monkeypatch.setattr(requests, 'get', fail)
+        monkeypatch.setattr(homework, 'ALERT_CHAT_ID', 'admin')
+        sent = []
+        deliveries = delivery.DirectDelivery(
+            lambda chat_id, message: sent.append(chat_id) or True)
+        breakers = unpooled_api_client.breakers
+        breakers.options = {'failure_threshold': 2, 'cooldown': 60}
+        breakers.subscribe(
+            lambda *change: homework.alert_circuit(deliveries, *change))
+        registry = [tenants.Tenant(f'token{index}', index, 0)
+                    for index in range(10)]
+        for _ in range(3):
+            for tenant in registry:
+                homework.poll_tenant(deliveries, tenant)
+        assert sent.count('admin') == 1, (
+            'Проверьте, что на один сбой отправляется одно общее оповещение'
+        )
+        assert len(sent) == 3, (
+            'Проверьте, что при разомкнутом автомате подписки не получают '
+            'сообщений об ошибке'
+        )
+
+    def test_guard_counts_only_transport_errors(self):
+        from telegram.error import BadRequest, NetworkError, TimedOut
+
+        import breaker
+        from exceptions import CircuitOpenException
+
+        circuit = breaker.CircuitBreaker('telegram', failure_threshold=2)
+        errors = []
+
+        def send():
+            raise errors.pop(0)
+
+        send = breaker.guard(circuit, send, NetworkError, BadRequest)
+        for error in (BadRequest('chat not found'), TimedOut(),
+                      BadRequest('message is too long'),
+                      NetworkError('Bad Gateway')):
+            errors.append(error)
+            with pytest.raises(type(error)):
+                send()
+        assert circuit.state == breaker.CLOSED, (
+            'Проверьте, что BadRequest не считается сбоем хоста'
+        )
+        errors.append(TimedOut())
+        with pytest.raises(TimedOut):
+            send()
+        with pytest.raises(CircuitOpenException):
+            send()
@@ -0,0 +1,108 @@
+class TestChanges:
+
+    def test_detect_changes(self):
+        import changes
+        import records
+
+        homeworks = [
+            {'id': 1, 'homework_name': 'first', 'status': 'approved'},
+            {'id': 2, 'homework_name': 'second', 'status': 'reviewing'},
+        ]
+        found = changes.detect_changes(
+            {'1': records.STATUS_CODES['approved']}, homeworks)
+        assert [(record.key, record.status, answer)
+                for record, answer in found] == [
+            ('2', records.REVIEWING, homeworks[1])], (
+            'Проверьте, что уже отправленный статус не отправляется повторно'
+        )
+
+    def test_poll_sends_each_changed_status(self, monkeypatch):
+        import delivery
+        import homework
+        import tenants
+
+        answer = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'first', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'second', 'status': 'rejected'},
+            ],
+            'current_date': 200,
+        }
+        monkeypatch.setattr(
+            homework, 'request_api_answer', lambda *args: answer)
+        sent = []
+        results = iter([True, False, True, True])
+
+        def send(chat_id, message):
+            sent.append(message)
+            return next(results)
+
+        tenant = tenants.Tenant('token', 1, 100)
+        deliveries = delivery.DirectDelivery(send)
+        homework.poll_tenant(deliveries, tenant)
+        assert sent == [homework.parse_status(hw)
+                        for hw in answer['homeworks']], (
+            'Проверьте, что для каждой работы отправляется текст parse_status'
+        )
+        assert tenant.current_date == 100, (
+            'Проверьте, что курсор не сдвигается, пока пачка не доставлена'
+        )
+        homework.poll_tenant(deliveries, tenant)
+        assert len(sent) == 3 and tenant.current_date == 200, (
+            'Проверьте, что повторно отправляется только недоставленный статус'
+        )
+        assert homework.poll_tenant(deliveries, tenant) == (0, None), (
+            'Проверьте, что без изменений ничего не отправляется'
+        )
+        assert len(sent) == 3
+
+    def test_repoll_before_delivery_queues_nothing_new(self, monkeypatch):
+        import homework
+        import tenants
+
+        answer = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'first', 'status': 'approved'},
+            ],
+            'current_date': 200,
+        }
+        monkeypatch.setattr(
+            homework, 'request_api_answer', lambda *args: answer)
+        queued = []
+
+        class Deferred:
+            def put_status(self, chat_id, message, on_sent=None,
+                           status=None, key=None):
+                queued.append(on_sent)
+
+        tenant = tenants.Tenant('token', 1, 100)
+        homework.poll_tenant(Deferred(), tenant)
+        homework.poll_tenant(Deferred(), tenant)
+        assert len(queued) == 1, (
+            'Проверьте, что повторный опрос до доставки не ставит '
+            'в очередь то же уведомление'
+        )
+        assert tenant.current_date == 100
+        queued[0](True)
+        assert tenant.current_date == 200 and not tenant.inflight, (
+            'Проверьте, что курсор сдвигается после доставки уведомления'
+        )
+        homework.poll_tenant(Deferred(), tenant)
+        assert len(queued) == 1
+
+    def test_delivery_replaces_statuses(self):
+        import changes
+        import records
+        import tenants
+
+        tenant = tenants.Tenant('token', 1, 100)
+        batch = changes.PendingBatch(tenant)
+        statuses = tenant.statuses
+        on_sent = changes.queue_change(
+            tenant, '1', records.STATUS_CODES['approved'], batch)
+        on_sent(True)
+        assert statuses == {} and tenant.statuses == {
+            '1': records.STATUS_CODES['approved']}, (
+            'Проверьте, что доставка не меняет словарь статусов, который '
+            'может читать поток опроса'
+        )
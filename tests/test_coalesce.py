@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from timers import VirtualClock
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_request(self):
+        import coalesce
+
+        flights = coalesce.SingleFlight(ttl=0)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'homeworks': []}
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            leader = pool.submit(flights.do, ('token', 0), fetch)
+            started.wait(5)
+            followers = [pool.submit(flights.do, ('token', 0), fetch)
+                         for _ in range(4)]
+            release.set()
+            results = [leader.result()] + [
+                future.result() for future in followers]
+        assert len(calls) == 1, (
+            'Проверьте, что одновременные одинаковые опросы делят один запрос'
+        )
+        assert all(result is results[0] for result in results), (
+            'Проверьте, что все опросы получают один и тот же ответ'
+        )
+
+    def test_ttl_cache_and_errors(self):
+        import coalesce
+
+        clock = VirtualClock()
+        flights = coalesce.SingleFlight(ttl=30, clock=clock)
+        calls = []
+
+        def fetch():
+            calls.append(clock.now)
+            return len(calls)
+
+        assert flights.do(('token', 0), fetch) == 1
+        clock.now = 29
+        assert flights.do(('token', 0), fetch) == 1, (
+            'Проверьте, что ответ берётся из кэша в течение COALESCE_TTL'
+        )
+        assert flights.do(('token', 100), fetch) == 2, (
+            'Проверьте, что другой from_date запрашивается отдельно'
+        )
+        clock.now = 30
+        assert flights.do(('token', 0), fetch) == 3, (
+            'Проверьте, что устаревший ответ запрашивается заново'
+        )
+
+        def broken():
+            raise ConnectionError('сбой')
+
+        with pytest.raises(ConnectionError):
+            flights.do(('other', 0), broken)
+        assert flights.do(('other', 0), fetch) == 4, (
+            'Проверьте, что ошибки не кэшируются'
+        )
+
+    def test_async_calls_share_one_request(self):
+        import coalesce
+
+        flights = coalesce.AsyncSingleFlight(ttl=0)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'homeworks': []}
+
+        async def poll_all():
+            return await asyncio.gather(*(
+                flights.run(('token', 0), fetch) for _ in range(5)))
+
+        results = asyncio.run(poll_all())
+        assert len(calls) == 1 and len(results) == 5, (
+            'Проверьте, что асинхронные опросы с одним токеном делят запрос'
+        )
+
+
+class TestSharedTokens:
+
+    def test_mark_shared(self):
+        import tenants
+
+        registry = tenants.mark_shared([
+            tenants.Tenant('common', 1, 0),
+            tenants.Tenant('common', 2, 0),
+            tenants.Tenant('own', 3, 0),
+        ])
+        assert [tenant.shared for tenant in registry] == [True, True, False]
+
+    def test_change_fans_out_to_every_chat(self, monkeypatch):
+        import delivery
+        import homework
+        import tenants
+
+        requests_made = []
+
+        def answer(headers, from_date, *args):
+            requests_made.append(from_date)
+            return {
+                'homeworks': [
+                    {'id': 1, 'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 200,
+            }
+
+        monkeypatch.setattr(homework, 'request_api_answer', answer)
+        sent = []
+        deliveries = delivery.DirectDelivery(
+            lambda chat_id, message: sent.append(chat_id) or True)
+        registry = tenants.mark_shared([
+            tenants.Tenant('common', chat_id, 100) for chat_id in (1, 2, 3)])
+        results = [
+            homework.poll_tenant(deliveries, tenant) for tenant in registry]
+        assert results == [(1, None)] * 3 and sorted(sent) == [1, 2, 3], (
+            'Проверьте, что изменение статуса уходит в каждый чат подписчика'
+        )
+        assert requests_made == [100], (
+            'Проверьте, что подписчики одного токена делят запрос к API'
+        )
+        assert [tenant.current_date for tenant in registry] == [200] * 3
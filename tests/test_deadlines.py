@@ -0,0 +1,158 @@
+import threading
+import time
+
+import pytest
+
+from timers import VirtualClock
+
+
+class SlowResponse:
+
+    status_code = 200
+
+    def __init__(self, attempt):
+        self.attempt = attempt
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class SlowSession:
+
+    def __init__(self, delays):
+        self.delays = iter(delays)
+        self.lock = threading.Lock()
+        self.responses = []
+        self.timeouts = []
+
+    def get(self, **kwargs):
+        with self.lock:
+            attempt = len(self.responses)
+            delay = next(self.delays)
+            response = SlowResponse(attempt)
+            self.responses.append(response)
+            self.timeouts.append(kwargs.get('timeout'))
+        time.sleep(delay)
+        return response
+
+    def close(self):
+        pass
+
+
+class TestDeadline:
+
+    def test_timeout_clipped_to_budget(self):
+        import deadlines
+        import exceptions
+
+        clock = VirtualClock()
+        deadline = deadlines.Deadline(5, clock)
+        assert deadline.timeout((3.05, 10)) == (3.05, 5), (
+            'Проверьте, что тайм-аут чтения урезается до остатка бюджета'
+        )
+        clock.now = 4
+        assert deadline.timeout((3.05, 10)) == (1, 1), (
+            'Проверьте, что оба тайм-аута урезаются до остатка бюджета'
+        )
+        clock.now = 5
+        with pytest.raises(exceptions.DeadlineException):
+            deadline.timeout((3.05, 10))
+
+    def test_stream_checks_budget(self):
+        import deadlines
+        import exceptions
+
+        clock = VirtualClock()
+        deadline = deadlines.Deadline(1, clock)
+        chunks = []
+        with pytest.raises(exceptions.DeadlineException):
+            for chunk in deadline.iterate(iter([b'a', b'b', b'c'])):
+                chunks.append(chunk)
+                clock.now += 0.6
+        assert chunks == [b'a', b'b'], (
+            'Проверьте, что бюджет проверяется перед каждой порцией ответа'
+        )
+
+    def test_deadline_backs_off(self):
+        import exceptions
+        import scheduler
+        import tenants
+
+        tenant = tenants.Tenant('token', 1, 0)
+        planner = scheduler.AdaptiveScheduler(600, error_retry_time=60,
+                                              jitter=0)
+        error = exceptions.DeadlineException('slow', budget=30)
+        assert planner.next_delay(tenant, 0, error) == 60, (
+            'Проверьте, что превышение бюджета приводит к отсрочке опроса'
+        )
+
+
+class TestSlidingQuantiles:
+
+    def test_quantiles_of_window(self):
+        import math
+
+        import metrics
+
+        window = metrics.SlidingQuantiles(window=100, refresh=10)
+        assert math.isnan(window.quantile(0.5))
+        for value in range(1000):
+            window.observe(value)
+        assert window.quantile(0.5) == 950 and window.quantile(0.99) == 999, (
+            'Проверьте, что квантили считаются по последним наблюдениям'
+        )
+
+
+class TestHedgedRequests:
+
+    def client(self, delays, **options):
+        import api_client
+        import breaker
+
+        session = SlowSession(delays)
+        client = api_client.PracticumClient(
+            session=session, breakers=breaker.Breakers(), hedge=True,
+            hedge_min_samples=1, **options)
+        client.latencies.observe(0.05)
+        return client, session
+
+    def test_hedge_wins_when_first_is_slow(self):
+        client, session = self.client([1, 0])
+        try:
+            response = client.get(url='http://api.test/')
+            assert response.attempt == 1, (
+                'Проверьте, что при медленном ответе берётся ответ '
+                'повторной попытки'
+            )
+            time.sleep(1.2)
+            assert session.responses[0].closed, (
+                'Проверьте, что ответ проигравшей попытки закрывается'
+            )
+        finally:
+            client.close()
+
+    def test_fast_answer_is_not_hedged(self):
+        client, session = self.client([0])
+        try:
+            client.get(url='http://api.test/', timeout=(1, 2))
+        finally:
+            client.close()
+        assert len(session.responses) == 1, (
+            'Проверьте, что быстрый ответ не дублируется'
+        )
+        assert session.timeouts == [(1, 2)], (
+            'Проверьте, что тайм-ауты передаются в запрос'
+        )
+
+    def test_default_timeout(self):
+        import api_client
+        import deadlines
+
+        session = SlowSession([0])
+        client = api_client.PracticumClient(session=session)
+        client.get(url='http://api.test/',
+                   deadline=deadlines.Deadline(5, VirtualClock()))
+        assert session.timeouts == [(deadlines.REQUEST_CONNECT_TIMEOUT, 5)], (
+            'Проверьте, что тайм-ауты запроса ограничены бюджетом цикла'
+        )
@@ -0,0 +1,121 @@
+import logging
+import threading
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from timers import VirtualClock
+
+
+class TestDeliveryQueue:
+
+    def make(self, send, **kwargs):
+        import delivery
+
+        clock = VirtualClock()
+        deliveries = delivery.DeliveryQueue(
+            send, logging.getLogger('tests'), clock=clock, sleep=clock.sleep,
+            **kwargs)
+        return deliveries, clock
+
+    def drain(self, deliveries, clock):
+        while deliveries.depth():
+            if deliveries.delayed and deliveries.queue.empty():
+                clock.now = max(clock.now, deliveries.delayed[0][0])
+            item = deliveries.next_delivery()
+            if item is not None:
+                deliveries.deliver(item)
+
+    def test_rate_limits(self):
+        sent = []
+        deliveries, clock = self.make(
+            lambda chat_id, message: sent.append((clock.now, chat_id)),
+            global_rate=2, chat_rate=1)
+        for chat_id in (1, 1, 2, 3):
+            deliveries.put(chat_id, 'сообщение')
+        self.drain(deliveries, clock)
+        chat_one = [moment for moment, chat_id in sent if chat_id == 1]
+        assert chat_one[1] - chat_one[0] >= 1, (
+            'Проверьте ограничение частоты отправки в один чат'
+        )
+        assert sent[-1][0] >= 1, (
+            'Проверьте общее ограничение частоты отправки'
+        )
+        assert deliveries.stats()['sent'] == 4
+
+    def test_retry_after_and_network_error(self):
+        errors = [RetryAfter(5), NetworkError('сбой')]
+        results = []
+
+        def send(chat_id, message):
+            if errors:
+                raise errors.pop(0)
+
+        deliveries, clock = self.make(send)
+        deliveries.put(1, 'сообщение', results.append)
+        self.drain(deliveries, clock)
+        assert results == [True] and clock.now >= 5, (
+            'Проверьте повтор отправки после RetryAfter и NetworkError'
+        )
+        assert deliveries.stats()['retried'] == 2
+
+    def test_gives_up_after_attempts(self):
+        def send(chat_id, message):
+            raise NetworkError('сбой')
+
+        results = []
+        deliveries, clock = self.make(send, attempts=3)
+        deliveries.put(1, 'сообщение', results.append)
+        self.drain(deliveries, clock)
+        assert results == [False] and deliveries.stats()['failed'] == 1, (
+            'Проверьте, что после исчерпания попыток отправка прекращается'
+        )
+
+    def test_bad_request_not_retried(self):
+        def send(chat_id, message):
+            raise BadRequest('chat not found')
+
+        results = []
+        deliveries, clock = self.make(send, attempts=3)
+        deliveries.put(1, 'сообщение', results.append)
+        self.drain(deliveries, clock)
+        assert results == [False] and deliveries.stats()['retried'] == 0, (
+            'Проверьте, что BadRequest не отправляется повторно'
+        )
+
+    def test_failed_send_hides_token(self, monkeypatch, caplog):
+        import messages
+
+        monkeypatch.setattr(messages, 'SECRETS', set())
+        messages.register_secret('123456:SECRETbottoken')
+
+        def send(chat_id, message):
+            raise NetworkError(
+                'Max retries exceeded with url: '
+                '/bot123456:SECRETbottoken/sendMessage')
+
+        deliveries, clock = self.make(send, attempts=2)
+        deliveries.put(1, 'сообщение')
+        with caplog.at_level(logging.INFO, logger='tests'):
+            self.drain(deliveries, clock)
+        assert len(caplog.records) == 2 and all(
+            '/bot***/sendMessage' in record.getMessage()
+            for record in caplog.records), (
+            'Проверьте, что в логе очереди отправки токен бота скрыт'
+        )
+        assert 'SECRETbottoken' not in caplog.text
+
+    def test_put_does_not_block(self):
+        import delivery
+
+        release = threading.Event()
+        done = threading.Event()
+        deliveries = delivery.DeliveryQueue(
+            lambda chat_id, message: release.wait(5),
+            logging.getLogger('tests')).start()
+        deliveries.put(1, 'сообщение', lambda sent: done.set())
+        assert deliveries.depth() <= 1, (
+            'Проверьте, что постановка в очередь не ждёт отправки'
+        )
+        release.set()
+        assert done.wait(5)
+        deliveries.stop(5)
@@ -0,0 +1,90 @@
+from timers import VirtualClock
+
+
+class TestDigest:
+
+    def make(self, **options):
+        import delivery
+        import digest
+
+        sent = []
+        clock = VirtualClock()
+        deliveries = delivery.DirectDelivery(
+            lambda chat_id, message: sent.append((chat_id, message)) or True)
+        return digest.Digest(deliveries, clock=clock, **options), sent, clock
+
+    def test_window_coalesces_statuses(self):
+        from records import STATUS_CODES
+
+        buffer, sent, clock = self.make(window=60, size=10)
+        results = []
+        for name in ('first', 'second', 'third'):
+            buffer.put_status(1, f'{name} rejected', results.append,
+                              STATUS_CODES['rejected'])
+        buffer.flush()
+        assert sent == [], (
+            'Проверьте, что уведомления копятся до конца окна'
+        )
+        clock.now = 60
+        buffer.flush()
+        assert len(sent) == 1 and sent[0][1].count('rejected') == 3, (
+            'Проверьте, что уведомления окна уходят одним сообщением'
+        )
+        assert results == [True] * 3, (
+            'Проверьте, что о доставке сводки узнаёт каждое уведомление'
+        )
+
+    def test_urgent_and_size_flush(self):
+        from records import STATUS_CODES
+
+        buffer, sent, _ = self.make(window=60, size=3)
+        buffer.put_status(1, 'first', None, STATUS_CODES['reviewing'])
+        buffer.put_status(2, 'other chat', None, STATUS_CODES['reviewing'])
+        buffer.put_status(1, 'second', None, STATUS_CODES['approved'])
+        assert sent and sent[0][0] == 1 and 'first' in sent[0][1], (
+            'Проверьте, что срочный статус сразу отправляет сводку чата'
+        )
+        assert len(sent) == 1, (
+            'Проверьте, что сводки других чатов не отправляются досрочно'
+        )
+        for index in range(3):
+            buffer.put_status(2, str(index), None, STATUS_CODES['rejected'])
+        assert len(sent) == 2, (
+            'Проверьте, что сводка отправляется при накоплении DIGEST_SIZE'
+        )
+
+    def test_errors_are_not_delayed(self):
+        buffer, sent, _ = self.make(window=60)
+        buffer.put(1, 'ошибка')
+        assert sent == [(1, 'ошибка')]
+
+    def test_compose_respects_limit(self):
+        import digest
+
+        chunks = digest.compose(['x' * 100] * 10, limit=400)
+        assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+        assert all(len(digest.render(chunk)) <= 400 for chunk in chunks)
+
+    def test_cursor_moves_after_digest(self, monkeypatch):
+        import homework
+        import tenants
+
+        answer = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'first', 'status': 'rejected'},
+                {'id': 2, 'homework_name': 'second', 'status': 'reviewing'},
+            ],
+            'current_date': 200,
+        }
+        monkeypatch.setattr(
+            homework, 'request_api_answer', lambda *args: answer)
+        buffer, sent, clock = self.make(window=60)
+        tenant = tenants.Tenant('token', 1, 100)
+        assert homework.poll_tenant(buffer, tenant) == (2, None)
+        assert tenant.current_date == 100, (
+            'Проверьте, что курсор не сдвигается до отправки сводки'
+        )
+        buffer.flush(force=True)
+        assert len(sent) == 1 and tenant.current_date == 200, (
+            'Проверьте, что курсор сдвигается после доставки сводки'
+        )
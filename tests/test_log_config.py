@@ -0,0 +1,69 @@
+import gzip
+import json
+import logging
+import sys
+
+
+class TestLogConfig:
+
+    def test_json_records_via_queue(self, tmp_path):
+        import log_config
+
+        logger = logging.getLogger('tests.log_config.json')
+        logger.propagate = False
+        path = tmp_path / 'bot.log'
+        listener = log_config.setup_logging(
+            logger, str(path), log_format='json')
+        try:
+            logger.info('сообщение')
+        finally:
+            log_config.stop_logging(listener)
+            for handler in listener.handlers:
+                handler.close()
+        entry = json.loads(path.read_text(encoding='utf-8'))
+        assert entry['message'] == 'сообщение' and entry['level'] == 'INFO', (
+            'Проверьте, что записи пишутся в файл в формате JSON'
+        )
+
+    def test_size_rotation_with_compression(self, tmp_path, monkeypatch):
+        import log_config
+
+        monkeypatch.setattr(log_config, 'LOG_MAX_BYTES', 200)
+        monkeypatch.setattr(log_config, 'LOG_BACKUP_COUNT', 2)
+        path = tmp_path / 'bot.log'
+        handler = log_config.file_handler(str(path), compress=True)
+        logger = logging.getLogger('tests.log_config.rotation')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for index in range(50):
+                logger.warning('строка %s', index)
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+        archives = sorted(tmp_path.glob('bot.log.*.gz'))
+        assert [archive.name for archive in archives] == [
+            'bot.log.1.gz', 'bot.log.2.gz'], (
+            'Проверьте, что число архивов ограничено LOG_BACKUP_COUNT'
+        )
+        assert gzip.decompress(archives[0].read_bytes()).startswith(
+            'строка'.encode())
+
+    def test_traceback_hides_secrets(self, monkeypatch):
+        import log_config
+        import messages
+
+        monkeypatch.setattr(messages, 'SECRETS', set())
+        messages.register_secret('123456:SECRETbottoken')
+        try:
+            raise ConnectionError('/bot123456:SECRETbottoken/sendMessage')
+        except ConnectionError:
+            record = logging.LogRecord(
+                'tests', logging.ERROR, __file__, 1, 'сбой', None,
+                sys.exc_info())
+        for formatter in (log_config.RedactingFormatter(),
+                          log_config.JsonFormatter()):
+            text = formatter.format(record)
+            assert 'SECRETbottoken' not in text and 'bot***' in text, (
+                'Проверьте, что токены скрываются и в трассировках'
+            )
@@ -0,0 +1,50 @@
+import requests
+
+
+class TestMessages:
+
+    def test_error_message_hides_token(self, monkeypatch):
+        import homework
+
+        def fail(*args, **kwargs):
+            raise requests.ConnectionError('connection refused')
+
+        monkeypatch.setattr(requests, 'get', fail)
+        try:
+            homework.request_api_answer(
+                homework.tenant_headers('y0_secret-token'), 0)
+        except ConnectionError as error:
+            message = str(error)
+        else:
+            assert False, 'Ожидался ConnectionError'
+        assert 'y0_secret-token' not in message and 'OAuth ***' in message, (
+            'Проверьте, что токен не попадает в текст ошибки'
+        )
+
+    def test_registered_secret_hidden(self):
+        import messages
+
+        messages.register_secret('1234:bot-secret')
+        text = messages.Template('Сбой {error}').format(
+            error='POST /bot1234:bot-secret/sendMessage')
+        assert text == 'Сбой POST /bot***/sendMessage'
+
+    def test_status_messages_cached(self):
+        import messages
+
+        status_messages = messages.StatusMessages(
+            messages.Template('{name}: {verdict}'), ['ok', 'wait'])
+        first = status_messages.render('hw', 1)
+        assert status_messages.render('hw', 1) is first, (
+            'Проверьте, что текст уведомления берётся из кэша'
+        )
+        assert status_messages.render(['hw'], 0) == "['hw']: ok"
+        assert status_messages.cache_info().hits == 1
+        try:
+            messages.StatusMessages(messages.Template('{name}'), ['ok'])
+        except ValueError:
+            pass
+        else:
+            assert False, (
+                'Убедитесь, что шаблон без поля verdict вызывает ошибку'
+            )
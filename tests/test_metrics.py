@@ -0,0 +1,48 @@
+from urllib.request import urlopen
+
+
+class TestMetrics:
+
+    def test_render_and_serve(self):
+        import metrics
+
+        registry = metrics.Registry()
+        calls = registry.register(metrics.Histogram(
+            'test_seconds', 'Длительность', ['function'], buckets=(0.1, 1)))
+        errors = registry.register(metrics.Counter(
+            'test_errors_total', 'Ошибки', ['type']))
+        depth = registry.register(metrics.Gauge(
+            'test_depth', 'Глубина', ['queue']))
+        calls.labels('parse_status').observe(0.05)
+        calls.labels('parse_status').observe(0.5)
+        errors.labels(type='KeyError').inc()
+        depth.set_function(lambda: 7, 'delivery')
+
+        server = metrics.start_metrics_server(0, '127.0.0.1', registry)
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/metrics'
+            text = urlopen(url).read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        for line in (
+            'test_seconds_bucket{function="parse_status",le="0.1"} 1',
+            'test_seconds_bucket{function="parse_status",le="+Inf"} 2',
+            'test_seconds_count{function="parse_status"} 2',
+            'test_errors_total{type="KeyError"} 1',
+            'test_depth{queue="delivery"} 7',
+        ):
+            assert line in text.splitlines(), (
+                f'Проверьте, что страница метрик содержит строку {line}'
+            )
+
+    def test_hot_path_timed(self):
+        import homework
+        import metrics
+
+        histogram = metrics.CALL_SECONDS.labels('parse_status')
+        before = histogram.count
+        homework.parse_status({'homework_name': 'hw', 'status': 'approved'})
+        assert histogram.count == before + 1, (
+            'Проверьте, что длительность parse_status попадает в метрики'
+        )
@@ -0,0 +1,127 @@
+import logging
+
+from timers import VirtualClock
+
+
+class HeldDeliveries:
+    """Очередь, которая только запоминает сообщения."""
+
+    def __init__(self):
+        self.held = []
+
+    def put(self, chat_id, message, on_sent=None):
+        self.held.append((chat_id, message, on_sent))
+
+    def put_status(self, chat_id, message, on_sent=None, status=None,
+                   key=None):
+        self.put(chat_id, message, on_sent)
+
+    def stop(self, timeout=None):
+        pass
+
+
+class TestOutbox:
+
+    def make(self, path, clock, **options):
+        import outbox
+
+        deliveries = HeldDeliveries()
+        journal = outbox.Outbox(
+            str(path), deliveries, logging.getLogger(__name__),
+            commit_interval=0, clock=clock, **options)
+        return journal, deliveries
+
+    def test_accepted_after_commit(self, tmp_path):
+        clock = VirtualClock(1000)
+        journal, deliveries = self.make(tmp_path / 'outbox.db', clock)
+        accepted = []
+        journal.put_status(1, 'сообщение', accepted.append, key='a')
+        assert accepted == [] and deliveries.held == [], (
+            'Проверьте, что уведомление принимается только после фиксации'
+        )
+        journal.step(0)
+        assert accepted == [True] and len(deliveries.held) == 1
+        deliveries.held[0][2](True)
+        journal.step(0)
+        delivered = journal.connection.execute(
+            'SELECT delivered_at FROM outbox').fetchone()[0]
+        assert delivered == clock.now and not journal.unfinished, (
+            'Проверьте, что доставка отмечается в журнале'
+        )
+
+    def test_duplicate_key_sent_once(self, tmp_path):
+        clock = VirtualClock(1000)
+        journal, deliveries = self.make(tmp_path / 'outbox.db', clock)
+        accepted = []
+        journal.put_status(1, 'сообщение', accepted.append, key='a')
+        journal.put_status(1, 'сообщение', accepted.append, key='a')
+        journal.step(0)
+        assert accepted == [True, True] and len(deliveries.held) == 1, (
+            'Проверьте, что повтор с тем же ключом не отправляется дважды'
+        )
+
+    def test_pending_resent_after_crash(self, tmp_path):
+        clock = VirtualClock(1000)
+        path = tmp_path / 'outbox.db'
+        journal, deliveries = self.make(path, clock, claim_time=600)
+        journal.put_status(1, 'сообщение', key='a')
+        journal.step(0)
+        journal.connection.close()
+        restarted, resent = self.make(path, clock, claim_time=600)
+        assert restarted.scan() == 0, (
+            'Проверьте, что запись, закреплённая за процессом, не берётся'
+        )
+        clock.now += 600
+        assert restarted.scan() == 1 and resent.held[0][1] == 'сообщение', (
+            'Проверьте, что неотмеченная запись отправляется после падения'
+        )
+        restarted.put_status(1, 'сообщение', key='a')
+        restarted.step(0)
+        assert len(resent.held) == 1, (
+            'Проверьте, что повторный опрос не создаёт дубль записи'
+        )
+
+    def test_failed_delivery_retried(self, tmp_path):
+        clock = VirtualClock(1000)
+        journal, deliveries = self.make(
+            tmp_path / 'outbox.db', clock, attempts=2, retry_time=10)
+        journal.put_status(1, 'сообщение', key='a')
+        journal.step(0)
+        deliveries.held.pop()[2](False)
+        journal.step(0)
+        assert journal.scan() == 0
+        clock.now += 10
+        assert journal.scan() == 1
+        deliveries.held.pop()[2](False)
+        journal.step(0)
+        clock.now += 1000
+        assert journal.scan() == 0, (
+            'Проверьте, что после OUTBOX_ATTEMPTS попыток запись не повторяется'
+        )
+
+    def test_cursor_moves_after_commit(self, tmp_path, monkeypatch):
+        import homework
+        import tenants
+
+        answer = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw', 'status': 'approved',
+                 'date_updated': '2022-02-01T10:00:00Z'}],
+            'current_date': 200,
+        }
+        monkeypatch.setattr(
+            homework, 'request_api_answer', lambda *args: answer)
+        journal, deliveries = self.make(
+            tmp_path / 'outbox.db', VirtualClock(1000))
+        tenant = tenants.Tenant('token', 1, 100)
+        homework.poll_tenant(journal, tenant)
+        journal.step(0)
+        assert tenant.current_date == 200 and len(deliveries.held) == 1, (
+            'Проверьте, что курсор сдвигается после записи в журнал'
+        )
+        tenant.statuses.clear()
+        homework.poll_tenant(journal, tenant)
+        journal.step(0)
+        assert len(deliveries.held) == 1, (
+            'Проверьте, что у уведомлений есть ключ идемпотентности'
+        )
@@ -0,0 +1,38 @@
+class TestRecords:
+
+    def test_record_from_homework(self):
+        import records
+
+        first = records.HomeworkRecord.from_homework(
+            {'id': 7, 'homework_name': ''.join(['hw', '.zip']),
+             'status': 'reviewing', 'reviewer_comment': 'текст'})
+        second = records.HomeworkRecord.from_homework(
+            {'id': 7, 'homework_name': ''.join(['hw', '.zip']),
+             'status': 'approved'})
+        assert first.key is second.key and first.name is second.name, (
+            'Проверьте, что ключи и названия работ интернируются'
+        )
+        assert first.status == records.REVIEWING
+        assert not hasattr(first, '__dict__'), (
+            'Проверьте, что запись работы объявляет `__slots__`'
+        )
+
+    def test_statuses_roundtrip(self):
+        import records
+
+        codes = records.decode_statuses(
+            {'1': 'approved', '2': 'unknown', '3': 1})
+        assert codes == {'1': records.STATUS_CODES['approved'], '3': 1}, (
+            'Проверьте перевод сохранённых статусов в коды'
+        )
+        assert records.encode_statuses(codes) == {
+            '1': 'approved', '3': 'reviewing'}
+
+    def test_records_use_less_memory(self):
+        import records
+
+        raw, compact = records.measure_homework_memory(2000)
+        assert compact < raw / 3, (
+            'Проверьте, что отправленный статус работы заметно меньше '
+            'словаря из ответа'
+        )
@@ -0,0 +1,61 @@
+from exceptions import ResponseCodeException
+
+
+class TestAdaptiveScheduler:
+
+    def make(self):
+        import scheduler
+
+        return scheduler.AdaptiveScheduler(
+            600, reviewing_retry_time=120, idle_retry_time=3600,
+            idle_factor=2, error_retry_time=60, max_backoff_time=900,
+            jitter=0)
+
+    def test_reviewing_polls_sooner(self):
+        import records
+        import tenants
+
+        tenant = tenants.Tenant('token', 1, 0)
+        tenant.statuses['1'] = records.REVIEWING
+        assert self.make().next_delay(tenant, 1, None) == 120, (
+            'Проверьте, что работа на ревью опрашивается чаще'
+        )
+
+    def test_idle_backoff(self):
+        import tenants
+
+        tenant = tenants.Tenant('token', 1, 0)
+        scheduler = self.make()
+        delays = [scheduler.next_delay(tenant, 0, None) for _ in range(4)]
+        assert delays == [1200, 2400, 3600, 3600], (
+            'Проверьте, что без изменений интервал растёт до предела'
+        )
+        assert scheduler.next_delay(tenant, 1, None) == 600, (
+            'Проверьте, что после изменения статуса интервал сбрасывается'
+        )
+
+    def test_error_backoff_and_retry_after(self):
+        import tenants
+
+        tenant = tenants.Tenant('token', 1, 0)
+        scheduler = self.make()
+        delays = [scheduler.next_delay(tenant, 0, ConnectionError())
+                  for _ in range(5)]
+        assert delays == [60, 120, 240, 480, 900], (
+            'Проверьте экспоненциальную задержку при сбоях сети'
+        )
+        error = ResponseCodeException('429', code=429, retry_after='1800')
+        assert scheduler.next_delay(tenant, 0, error) == 1800, (
+            'Проверьте, что учитывается заголовок Retry-After'
+        )
+
+    def test_jitter(self):
+        import scheduler
+        import tenants
+
+        tenant = tenants.Tenant('token', 1, 0)
+        adaptive = scheduler.AdaptiveScheduler(600, idle_factor=1, jitter=0.1)
+        delays = {adaptive.next_delay(tenant, 0, None) for _ in range(20)}
+        assert len(delays) > 1 and all(540 <= d <= 660 for d in delays), (
+            'Проверьте, что к интервалу добавляется случайный разброс'
+        )
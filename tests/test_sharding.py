@@ -0,0 +1,167 @@
+import pytest
+
+from timers import VirtualClock
+
+
+class FakeDispatcher:
+
+    def __init__(self):
+        self.scheduled = set()
+
+    def schedule(self, key, due):
+        self.scheduled.add(key)
+
+    def cancel(self, key):
+        self.scheduled.discard(key)
+
+
+class TestSharding:
+
+    def test_ring_moves_few_keys(self):
+        import sharding
+
+        keys = [f'{index}:key' for index in range(1000)]
+        before = sharding.HashRing(['a', 'b', 'c'])
+        after = sharding.HashRing(['a', 'b', 'c', 'd'])
+        moved = [key for key in keys
+                 if before.node_for(key) != after.node_for(key)]
+        assert all(after.node_for(key) == 'd' for key in moved), (
+            'Проверьте, что при добавлении узла ключи переезжают только на него'
+        )
+        assert 100 < len(moved) < 400, (
+            'Проверьте, что новому узлу достаётся примерно его доля ключей'
+        )
+
+    def test_lease_is_exclusive(self, tmp_path):
+        import sharding
+
+        path = str(tmp_path / 'leases.sqlite3')
+        clock = VirtualClock(1000)
+        first = sharding.LeaseTable(path, 'a', ttl=30, clock=clock)
+        second = sharding.LeaseTable(path, 'b', ttl=30, clock=clock)
+        assert first.claim(['x', 'y']) == {'x', 'y'}
+        assert second.claim(['x']) == set(), (
+            'Проверьте, что занятую подписку нельзя взять до конца аренды'
+        )
+        first.release(['x'])
+        assert second.claim(['x']) == {'x'}
+        clock.now += 31
+        assert second.claim(['y']) == {'y'}, (
+            'Проверьте, что просроченная аренда освобождается'
+        )
+
+    def test_handoff_without_duplicates(self, tmp_path):
+        import sharding
+        import state
+        import tenants
+
+        path = str(tmp_path / 'state.sqlite3')
+        registry = [tenants.Tenant(f'token{index}', index, 0)
+                    for index in range(20)]
+        wall, ticks = VirtualClock(1000), VirtualClock()
+        store_a = state.open_store(path)
+        node_a = sharding.LeaseCoordinator(
+            sharding.LeaseTable(path, 'a', clock=wall),
+            registry, interval=1, clock=ticks)
+        dispatcher_a = FakeDispatcher()
+        node_a.rebalance(dispatcher_a, store_a)
+        assert len(dispatcher_a.scheduled) == 20
+        for tenant in registry:
+            tenant.current_date = 500
+            tenant.statuses['1'] = 0
+
+        copies = [tenants.Tenant(f'token{index}', index, 0)
+                  for index in range(20)]
+        store_b = state.open_store(path)
+        node_b = sharding.LeaseCoordinator(
+            sharding.LeaseTable(path, 'b', clock=wall),
+            copies, interval=1, clock=ticks)
+        dispatcher_b = FakeDispatcher()
+        node_b.rebalance(dispatcher_b, store_b)
+        assert not dispatcher_b.scheduled, (
+            'Проверьте, что узел не берёт подписки, пока их держит другой'
+        )
+        for _ in range(3):
+            ticks.now += 1
+            node_a.rebalance(dispatcher_a, store_a)
+            node_b.rebalance(dispatcher_b, store_b)
+        assert dispatcher_a.scheduled and dispatcher_b.scheduled
+        assert not dispatcher_a.scheduled & dispatcher_b.scheduled
+        assert len(node_a.owned) + len(node_b.owned) == 20
+        for tenant in dispatcher_b.scheduled:
+            assert tenant.current_date == 500, (
+                'Проверьте, что новый владелец продолжает с сохранённого '
+                'курсора'
+            )
+            assert tenant.statuses == {'1': 0}
+        store_a.close()
+        store_b.close()
+
+    def test_release_waits_for_deliveries(self, tmp_path):
+        import sharding
+        import state
+        import tenants
+
+        path = str(tmp_path / 'state.sqlite3')
+        tenant = tenants.Tenant('token', 1, 0)
+        key = state.tenant_key(tenant)
+        wall, ticks = VirtualClock(1000), VirtualClock()
+        store = state.open_store(path)
+        node = sharding.LeaseCoordinator(
+            sharding.LeaseTable(path, 'a', clock=wall),
+            [tenant], interval=1, clock=ticks, drain_timeout=10)
+        node.rebalance(FakeDispatcher(), store)
+        other = next(
+            name for name in (f'b{index}' for index in range(100))
+            if sharding.HashRing(['a', name]).node_for(
+                sharding.route_key(key)) == name)
+        sharding.LeaseTable(path, other, clock=wall).heartbeat()
+        tenant.inflight[('1', 0)] = []
+        for _ in range(3):
+            ticks.now += 1
+            node.rebalance(FakeDispatcher(), store)
+        assert node.leases.holder(key) == 'a', (
+            'Проверьте, что аренда не отдаётся, пока уведомления подписки '
+            'не доставлены'
+        )
+        tenant.inflight.clear()
+        ticks.now += 1
+        node.rebalance(FakeDispatcher(), store)
+        assert node.leases.holder(key) is None, (
+            'Проверьте, что после доставки аренда освобождается'
+        )
+        store.close()
+
+    def test_shard_arguments_pickle(self):
+        import pickle
+
+        import sharding
+        import tenants
+
+        registry = [tenants.Tenant(f'token{index}', index, 100)
+                    for index in range(4)]
+        registry[0].statuses = {'1': 0}
+        registry[0].inflight[('2', 1)] = []
+        shards = sharding.shard_tenants(registry, ['local-0', 'local-1'])
+        for index, name in enumerate(shards):
+            _, _, copies = pickle.loads(
+                pickle.dumps((name, index, shards[name])))
+            for original, copy in zip(shards[name], copies):
+                assert (copy.token, copy.chat_id, copy.current_date,
+                        copy.statuses) == (
+                    original.token, original.chat_id,
+                    original.current_date, original.statuses), (
+                    'Проверьте, что подписки передаются в процесс шарда'
+                )
+                assert copy.inflight == {} and copy.lock is not original.lock
+
+    @pytest.mark.parametrize('state_file', [None, 'state.json'])
+    def test_node_requires_shared_sqlite(self, monkeypatch, state_file):
+        import homework
+        import sharding
+
+        monkeypatch.setattr(homework, 'init', lambda: None)
+        monkeypatch.setattr(sharding, 'STATE_FILE', state_file)
+        monkeypatch.setattr(sharding, 'LEASE_FILE', 'leases.sqlite3')
+        with pytest.raises(ValueError, match='SQLite'):
+            sharding.run_node('a')
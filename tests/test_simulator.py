@@ -0,0 +1,69 @@
+import pytest
+import telegram
+from telegram.error import RetryAfter
+
+from exceptions import ResponseCodeException
+
+
+@pytest.fixture
+def simulated(monkeypatch):
+    import homework
+    import simulator
+
+    def start(**options):
+        sim = simulator.Simulator(simulator.SimulatorConfig(seed=1, **options))
+        server = simulator.start_simulator(sim)
+        urls = simulator.endpoints(server)
+        monkeypatch.setattr(homework, 'ENDPOINT', urls['PRACTICUM_ENDPOINT'])
+        servers.append(server)
+        return sim, urls
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class TestSimulator:
+
+    def test_status_changes(self, simulated):
+        import homework
+
+        sim, _ = simulated(change_probability=1)
+        headers = homework.tenant_headers('token')
+        first = homework.request_api_answer(headers, 0)
+        second = homework.request_api_answer(headers, 0)
+        assert {hw['status'] for hw in first['homeworks']} == {'reviewing'}, (
+            'Проверьте, что симулятор сначала берёт работы на ревью'
+        )
+        assert {hw['status'] for hw in second['homeworks']} <= {
+            'approved', 'rejected'}, (
+            'Проверьте, что симулятор меняет статусы работ'
+        )
+        later = homework.request_api_answer(
+            headers, second['current_date'] + 1)
+        assert later['homeworks'] == [] and sim.polls == 3, (
+            'Проверьте, что симулятор учитывает from_date'
+        )
+
+    def test_errors_and_rate_limit(self, simulated):
+        import homework
+
+        simulated(rate_limit_rate=1, retry_after=7)
+        with pytest.raises(ResponseCodeException) as error:
+            homework.request_api_answer(homework.tenant_headers('token'), 0)
+        assert error.value.code == 429 and error.value.retry_after == '7', (
+            'Проверьте, что симулятор отвечает 429 с Retry-After'
+        )
+
+    def test_telegram_send(self, simulated):
+        sim, urls = simulated(telegram_rate_limit_rate=0)
+        bot = telegram.Bot('1234:abcdefg', base_url=urls['TELEGRAM_BASE_URL'])
+        bot.send_message(42, 'сообщение')
+        assert sim.sent == {'42': ['сообщение']}, (
+            'Проверьте, что симулятор принимает sendMessage'
+        )
+        sim.config.telegram_rate_limit_rate = 1
+        with pytest.raises(RetryAfter):
+            bot.send_message(42, 'сообщение')
@@ -0,0 +1,22 @@
+class TestSoak:
+
+    def test_virtual_days_without_leaks(self, tmp_path):
+        import soak
+
+        result = soak.Soak(str(tmp_path), days=3, tenants=6).run()
+        samples = result['samples']
+        assert len(samples) == 3 and samples[-1]['restarts'] == 5, (
+            'Проверьте, что прогон идёт в виртуальном времени '
+            'с перезапусками бота'
+        )
+        assert samples[-1]['messages'] > 0 and samples[-1]['log'] > 0
+        assert soak.problems(result) == [], (
+            'Проверьте, что за долгий прогон нет утечек и дрейфа состояния'
+        )
+
+    def test_drift_detected(self):
+        import soak
+
+        result = {'samples': [], 'drift': 2, 'tenants': 1}
+        assert soak.problems(result) == [
+            soak.DRIFT_PROBLEM.format(drift=2)]
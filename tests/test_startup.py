@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT_DIR = dirname(dirname(abspath(__file__)))
+
+
+class TestStartup:
+
+    def test_import_is_lazy(self):
+        code = (
+            'import sys, homework; '
+            'print(sorted(name for name in ("telegram", "requests", "dotenv")'
+            ' if name in sys.modules), homework.log_listener, '
+            'homework.logger.handlers)'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code], cwd=ROOT_DIR, check=True,
+            capture_output=True, text=True).stdout.strip()
+        assert output == '[] None []', (
+            'Проверьте, что импорт модуля не загружает telegram, requests и '
+            'dotenv и не настраивает логирование'
+        )
+
+    def test_env_file_read_before_settings(self, tmp_path):
+        env_file = tmp_path / '.env'
+        env_file.write_text(
+            '# настройки\n'
+            'export STATE_FILE=state.sqlite3\n'
+            'DIGEST_WINDOW = 5\n'
+            "LOG_FORMAT='json'\n"
+            'POLL_WORKERS=7\n'
+        )
+        code = (
+            'import homework, digest, log_config, state, timers; '
+            'print(state.STATE_FILE, digest.DIGEST_WINDOW, '
+            'log_config.LOG_FORMAT, timers.POLL_WORKERS, '
+            'homework.STATE_FILE)'
+        )
+        environment = {**os.environ, 'ENV_FILE': str(env_file),
+                       'POLL_WORKERS': '2'}
+        for name in ('STATE_FILE', 'DIGEST_WINDOW', 'LOG_FORMAT'):
+            environment.pop(name, None)
+        output = subprocess.run(
+            [sys.executable, '-c', code], cwd=ROOT_DIR, check=True,
+            capture_output=True, text=True, env=environment).stdout.strip()
+        assert output == 'state.sqlite3 5.0 json 2 state.sqlite3', (
+            'Проверьте, что .env загружается раньше настроек модулей, '
+            'а окружение важнее значений из .env'
+        )
+
+    def test_run_once(self, monkeypatch):
+        import delivery
+        import homework
+        import tenants
+
+        answer = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'first', 'status': 'approved'}],
+            'current_date': 200,
+        }
+        sent = []
+        monkeypatch.setattr(
+            homework, 'request_api_answer', lambda *args: answer)
+        monkeypatch.setattr(homework, 'start_deliveries', lambda: (
+            delivery.DeliveryQueue(
+                lambda chat_id, message: sent.append((chat_id, message)),
+                homework.logger).start()))
+        registry = [tenants.Tenant('first', 1, 100),
+                    tenants.Tenant('second', 2, 100)]
+        homework.run_once(registry)
+        assert sorted(chat_id for chat_id, _ in sent) == [1, 2], (
+            'Проверьте, что `--once` опрашивает все подписки и дожидается '
+            'отправки уведомлений'
+        )
+        assert [tenant.current_date for tenant in registry] == [200, 200]
+
+    def test_run_once_drain_is_bounded(self, monkeypatch):
+        import threading
+
+        import delivery
+        import homework
+        import tenants
+
+        answer = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'first', 'status': 'approved'}],
+            'current_date': 200,
+        }
+        release = threading.Event()
+        monkeypatch.setattr(
+            homework, 'request_api_answer', lambda *args: answer)
+        monkeypatch.setattr(homework, 'DRAIN_TIMEOUT', 0.1)
+        monkeypatch.setattr(homework, 'start_deliveries', lambda: (
+            delivery.DeliveryQueue(
+                lambda chat_id, message: release.wait(5),
+                homework.logger).start()))
+        registry = [tenants.Tenant('first', 1, 100)]
+        try:
+            homework.run_once(registry)
+            assert registry[0].current_date == 100, (
+                'Проверьте, что `--once` не ждёт доставки дольше '
+                'DRAIN_TIMEOUT и не сдвигает курсор недоставленных '
+                'уведомлений'
+            )
+        finally:
+            release.set()
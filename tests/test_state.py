@@ -0,0 +1,62 @@
+import pytest
+
+
+class TestStateStore:
+
+    @pytest.mark.parametrize('name', ['state.json', 'state.sqlite3'])
+    def test_restore_after_restart(self, tmp_path, name):
+        import records
+        import state
+        import tenants
+
+        path = str(tmp_path / name)
+        tenant = tenants.Tenant('token', 1, 100)
+        store = state.open_store(path, flush_interval=3600)
+        store.restore([tenant])
+        tenant.current_date = 200
+        tenant.statuses['7'] = records.STATUS_CODES['approved']
+        tenant.exception_message = 'сбой'
+        store.remember(tenant)
+        store.maybe_flush()
+        store.close()
+
+        restarted = tenants.Tenant('token', 1, 999)
+        other = tenants.Tenant('other', 1, 999)
+        store = state.open_store(path)
+        store.restore([restarted, other])
+        store.close()
+        assert restarted.current_date == 200, (
+            'Проверьте, что курсор `from_date` восстанавливается после '
+            'перезапуска'
+        )
+        assert restarted.statuses == {
+            '7': records.STATUS_CODES['approved']}, (
+            'Проверьте, что сохраняются отправленные статусы'
+        )
+        assert restarted.exception_message == 'сбой', (
+            'Проверьте, что сохраняется последнее сообщение об ошибке'
+        )
+        assert other.current_date == 999, (
+            'Проверьте, что состояние привязано к токену подписки'
+        )
+
+    def test_flush_is_batched(self, tmp_path):
+        import state
+        import tenants
+
+        writes = []
+        store = state.open_store(
+            str(tmp_path / 'state.json'), flush_interval=3600)
+        store.write = writes.append
+        tenant = tenants.Tenant('token', 1, 100)
+        for current_date in range(5):
+            tenant.current_date = current_date
+            store.remember(tenant)
+            store.maybe_flush()
+        assert not writes, (
+            'Проверьте, что запись откладывается до истечения интервала'
+        )
+        store.flush()
+        assert len(writes) == 1, (
+            'Проверьте, что изменения записываются одной пачкой'
+        )
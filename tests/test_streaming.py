@@ -0,0 +1,91 @@
+import json
+import tracemalloc
+
+import pytest
+
+
+def split(body, size):
+    return (body[index:index + size] for index in range(0, len(body), size))
+
+
+class TestStreaming:
+
+    def test_items_one_by_one(self):
+        import streaming
+
+        answer = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'Ёжик', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'hw', 'status': 'rejected'},
+            ],
+            'current_date': 1234567,
+        }
+        body = json.dumps(answer, ensure_ascii=False, indent=1).encode()
+        events = list(streaming.iter_answer(split(body, 1)))
+        assert events == [
+            ('homeworks', [], False),
+            ('homeworks', answer['homeworks'][0], True),
+            ('homeworks', answer['homeworks'][1], True),
+            ('current_date', 1234567, False),
+        ], (
+            'Проверьте разбор ответа, разрезанного на фрагменты по байту'
+        )
+
+    @pytest.mark.parametrize('body, error', [
+        (b'[1, 2]', TypeError),
+        (b'{"homeworks": [{"id": 1}', ValueError),
+    ])
+    def test_invalid(self, body, error):
+        import streaming
+
+        with pytest.raises(error):
+            list(streaming.iter_answer(split(body, 4)))
+
+    def test_memory_is_flat(self):
+        import streaming
+
+        item = json.dumps({'homework_name': 'x' * 100, 'status': 'approved'})
+
+        def chunks(count):
+            yield b'{"homeworks": ['
+            for index in range(count):
+                yield (item + (',' if index < count - 1 else '')).encode()
+            yield b'], "current_date": 1}'
+
+        peaks = []
+        for count in (1000, 20000):
+            tracemalloc.start()
+            for _ in streaming.iter_answer(chunks(count)):
+                pass
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        assert peaks[1] < peaks[0] * 2, (
+            'Проверьте, что пиковая память не растёт с размером ответа'
+        )
+
+    def test_poll_tenant_stream(self, monkeypatch):
+        import delivery
+        import homework
+        import simulator
+        import tenants
+
+        server = simulator.start_simulator(simulator.Simulator(
+            simulator.SimulatorConfig(change_probability=1, seed=1)))
+        monkeypatch.setattr(homework, 'ENDPOINT', simulator.endpoints(
+            server)['PRACTICUM_ENDPOINT'])
+        monkeypatch.setattr(homework, 'STREAM_ANSWERS', True)
+        sent = []
+        deliveries = delivery.DirectDelivery(
+            lambda chat_id, message: sent.append(message) or True)
+        tenant = tenants.Tenant('token', 1, 0)
+        try:
+            result = homework.poll_tenant(deliveries, tenant)
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert result == (3, None) and len(sent) == 3, (
+            'Проверьте, что в потоковом режиме отправляется каждая работа'
+        )
+        assert tenant.current_date > 0, (
+            'Проверьте, что курсор берётся из current_date потокового ответа'
+        )
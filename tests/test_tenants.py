@@ -0,0 +1,95 @@
+import json
+
+import requests
+
+
+class MockResponse:
+
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+
+class MockBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+
+class TestTenants:
+
+    def test_load_tenants(self, tmp_path):
+        import tenants
+
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'token': 'first', 'chat_id': 1},
+            {'token': 'second', 'chat_id': 2, 'current_date': 100},
+        ]))
+        registry = tenants.load_tenants(str(path), 500)
+        assert [tenant.current_date for tenant in registry] == [500, 100], (
+            'Проверьте, что `current_date` берётся из реестра, '
+            'а при его отсутствии используется текущее время'
+        )
+        assert 'first' not in repr(registry[0]), (
+            'Проверьте, что токен не попадает в представление подписки'
+        )
+
+    def test_load_tenants_invalid(self, tmp_path):
+        import tenants
+
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'chat_id': 1}]))
+        try:
+            tenants.load_tenants(str(path), 0)
+        except ValueError:
+            pass
+        else:
+            assert False, (
+                'Убедитесь, что запись реестра без токена вызывает ошибку'
+            )
+
+    def test_poll_tenant_state_apart(self, monkeypatch):
+        import delivery
+        import homework
+        import tenants
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            if headers['Authorization'] == 'OAuth broken':
+                return MockResponse({}, status_code=500)
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': params['from_date'] + 10,
+            })
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        good = tenants.Tenant('good', 1, 100)
+        broken = tenants.Tenant('broken', 2, 100)
+        bot = MockBot()
+        deliveries = delivery.DirectDelivery(
+            lambda chat_id, message: homework.send_chat_message(
+                bot, chat_id, message))
+        for tenant in (good, broken, broken):
+            homework.poll_tenant(deliveries, tenant)
+        assert good.current_date == 110 and broken.current_date == 100, (
+            'Проверьте, что курсор `current_date` у каждой подписки свой'
+        )
+        assert [chat_id for chat_id, _ in bot.sent] == [1, 2], (
+            'Проверьте, что повторная ошибка не отправляется в чат дважды'
+        )
+        assert good.exception_message == '', (
+            'Проверьте, что ошибки одной подписки не влияют на другие'
+        )
+
+    def test_measure_tenant_memory(self):
+        import tenants
+
+        assert 0 < tenants.measure_tenant_memory(1000) < 1024, (
+            'Проверьте, что подписка занимает меньше килобайта памяти'
+        )
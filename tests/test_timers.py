@@ -0,0 +1,91 @@
+import threading
+
+
+class TestTimers:
+
+    def test_heap_order_reschedule_cancel(self):
+        import timers
+
+        heap = timers.TimerHeap()
+        for key, due in (('a', 30), ('b', 10), ('c', 20), ('d', 5)):
+            heap.schedule(key, due)
+        heap.schedule('a', 1)
+        heap.cancel('d')
+        assert heap.next_due() == 1 and len(heap) == 3, (
+            'Проверьте перенос и отмену таймеров'
+        )
+        assert heap.pop_due(20) == ['a', 'b', 'c'], (
+            'Проверьте, что таймеры извлекаются в порядке сроков'
+        )
+        assert heap.next_due() is None, (
+            'Проверьте, что отменённый таймер не извлекается'
+        )
+        assert heap.wait_time(100, tick=5) == 5, (
+            'Проверьте, что без таймеров ожидание ограничено tick'
+        )
+
+    def test_dispatcher_reschedules(self):
+        import timers
+
+        calls = []
+        finished = threading.Event()
+        heap = timers.TimerHeap()
+
+        def handler(key):
+            calls.append(key)
+            if len(calls) == 3:
+                dispatcher.stop()
+                finished.set()
+                return None
+            return 0
+
+        heap.schedule('tenant', 0)
+        dispatcher = timers.TimerDispatcher(heap, handler, workers=2)
+        thread = threading.Thread(target=dispatcher.run, kwargs={'tick': 0.01})
+        thread.start()
+        assert finished.wait(5), (
+            'Проверьте, что диспетчер переносит таймер на срок из обработчика'
+        )
+        thread.join(5)
+        assert calls == ['tenant'] * 3 and 'tenant' not in heap
+
+    def test_dispatcher_reschedules_failed_handler(self):
+        import timers
+
+        heap = timers.TimerHeap()
+
+        def handler(key):
+            raise RuntimeError('сбой')
+
+        heap.schedule('tenant', 0)
+        dispatcher = timers.TimerDispatcher(
+            heap, handler, workers=1, clock=lambda: 100, retry_time=30)
+        dispatcher.dispatch_due()
+        dispatcher.pool.shutdown(wait=True)
+        assert heap.next_due() == 130, (
+            'Проверьте, что после сбоя обработчика таймер переносится '
+            'на retry_time'
+        )
+
+    def test_dispatcher_virtual_time(self):
+        import timers
+
+        clock = timers.VirtualClock()
+        calls = []
+        heap = timers.TimerHeap()
+
+        def handler(key):
+            calls.append(clock.now)
+            return clock.now + 10
+
+        def on_tick():
+            if len(calls) == 3:
+                dispatcher.stop()
+
+        heap.schedule('tenant', 0)
+        dispatcher = timers.TimerDispatcher(
+            heap, handler, workers=2, clock=clock, sleep=clock.sleep)
+        dispatcher.run(on_tick, tick=60)
+        assert calls == [0, 10, 20], (
+            'Проверьте, что с sleep диспетчер переводит часы к сроку таймера'
+        )
@@ -0,0 +1,190 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from messages import Template
+from settings import getenv
+
+POLL_WORKERS = int(getenv('POLL_WORKERS', 4))
+DISPATCH_RETRY_TIME = float(getenv('DISPATCH_RETRY_TIME', 60))
+TICK_TIME = 1.0
+DISPATCH_FAIL_MESSAGE = Template('Сбой обработки таймера {key}: {error}')
+
+
+class TimerHeap:
+    """Сроки N независимых таймеров в двоичной куче.
+
+    Перенос и добавление стоят O(log n), отмена помечает запись удалённой
+    за O(1), а из кучи она убирается, когда оказывается на вершине.
+    """
+
+    def __init__(self):
+        """Пустая куча таймеров."""
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+
+    def __len__(self):
+        """Число активных таймеров."""
+        return len(self.entries)
+
+    def __contains__(self, key):
+        """Есть ли активный таймер с таким ключом."""
+        return key in self.entries
+
+    def schedule(self, key, due):
+        """Установка или перенос таймера на момент due."""
+        self.cancel(key)
+        entry = [due, next(self.counter), key, True]
+        self.entries[key] = entry
+        heapq.heappush(self.heap, entry)
+
+    def cancel(self, key):
+        """Отмена таймера, если он установлен."""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            entry[-1] = False
+
+    def next_due(self):
+        """Ближайший срок или None, если таймеров нет."""
+        while self.heap and not self.heap[0][-1]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def wait_time(self, now, tick=TICK_TIME):
+        """Секунды от now до ближайшего срока, но не больше tick.
+
+        Без таймеров ждать нужно tick секунд: за это время их могут добавить.
+        """
+        due = self.next_due()
+        return tick if due is None else max(min(due - now, tick), 0)
+
+    def pop_due(self, now):
+        """Извлечение ключей всех таймеров со сроком не позже now."""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, _, key, active = heapq.heappop(self.heap)
+            if active:
+                del self.entries[key]
+                due.append(key)
+        return due
+
+
+class VirtualClock:
+    """Часы, которые идут только при явном переводе вперёд."""
+
+    def __init__(self, now=0.0):
+        """Часы, показывающие now."""
+        self.now = float(now)
+
+    def __call__(self):
+        """Текущее виртуальное время."""
+        return self.now
+
+    def advance_to(self, moment):
+        """Перевод часов вперёд; назад часы не идут."""
+        self.now = max(self.now, moment)
+
+    def sleep(self, seconds):
+        """Ожидание без ожидания: часы сразу уходят на seconds вперёд."""
+        self.advance_to(self.now + seconds)
+
+
+class TimerDispatcher:
+    """Передача наступивших таймеров в пул рабочих потоков.
+
+    handler(key) выполняется в пуле и возвращает следующий срок таймера
+    или None, если таймер больше не нужен. Если handler упал, таймер
+    переносится на retry_time секунд, чтобы ключ не выпал из опроса.
+
+    С sleep время виртуальное: диспетчер дожидается запущенных
+    обработчиков и вместо ожидания срока вызывает sleep(секунды), который
+    переводит часы clock.
+    """
+
+    def __init__(self, timers, handler, workers=POLL_WORKERS,
+                 clock=time.time, logger=None,
+                 retry_time=DISPATCH_RETRY_TIME, sleep=None):
+        """Диспетчер поверх кучи timers."""
+        self.timers = timers
+        self.handler = handler
+        self.clock = clock
+        self.retry_time = retry_time
+        self.sleep = sleep
+        self.running = 0
+        self.logger = logger
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.condition = threading.Condition()
+        self.stopped = False
+
+    def schedule(self, key, due):
+        """Потокобезопасная установка таймера с пробуждением диспетчера."""
+        with self.condition:
+            self.timers.schedule(key, due)
+            self.condition.notify()
+
+    def cancel(self, key):
+        """Потокобезопасная отмена таймера."""
+        with self.condition:
+            self.timers.cancel(key)
+
+    def dispatch(self, key):
+        """Обработка таймера в пуле и его перенос на следующий срок."""
+        try:
+            due = self.handler(key)
+        except Exception as error:
+            if self.logger is not None:
+                self.logger.exception(
+                    DISPATCH_FAIL_MESSAGE.format(key=key, error=error))
+            due = self.clock() + self.retry_time
+        with self.condition:
+            if due is not None:
+                self.timers.schedule(key, due)
+            self.running -= 1
+            self.condition.notify_all()
+
+    def dispatch_due(self):
+        """Отправка в пул всех наступивших таймеров."""
+        with self.condition:
+            due = self.timers.pop_due(self.clock())
+            self.running += len(due)
+        for key in due:
+            self.pool.submit(self.dispatch, key)
+        return len(due)
+
+    def join(self):
+        """Ожидание завершения запущенных обработчиков."""
+        with self.condition:
+            self.condition.wait_for(lambda: not self.running)
+
+    def wait(self, tick=TICK_TIME):
+        """Ожидание ближайшего срока, но не дольше tick секунд."""
+        with self.condition:
+            timeout = self.timers.wait_time(self.clock(), tick)
+            if self.sleep is None:
+                if timeout > 0 and not self.stopped:
+                    self.condition.wait(timeout)
+                return
+        if timeout > 0 and not self.stopped:
+            self.sleep(timeout)
+
+    def run(self, on_tick=None, tick=TICK_TIME):
+        """Цикл диспетчера до вызова stop()."""
+        try:
+            while not self.stopped:
+                self.dispatch_due()
+                if self.sleep is not None:
+                    self.join()
+                if on_tick is not None:
+                    on_tick()
+                self.wait(tick)
+        finally:
+            self.pool.shutdown(wait=True)
+
+    def stop(self):
+        """Остановка цикла диспетчера."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()